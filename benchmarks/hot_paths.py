@@ -0,0 +1,252 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict
+
+import requests_mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from marketpalce_handler import Wildberries  # noqa: E402
+from marketpalce_handler.codec import dumps, loads  # noqa: E402
+from marketpalce_handler.config import settings  # noqa: E402
+from marketpalce_handler.goods import parse_goods_page  # noqa: E402
+from marketpalce_handler.price_ladder import plan_price_ladder  # noqa: E402
+from marketpalce_handler.rate_limit import RateLimiter  # noqa: E402
+from marketpalce_handler.schemas import (  # noqa: E402
+    CollectorItem,
+    MappedItem,
+    MsItem,
+    WbUpdateItem,
+)
+from marketpalce_handler.utils import get_chunks  # noqa: E402
+from marketpalce_handler.validators import validate_ids_and_values  # noqa: E402
+from tests.helpers import echo_mapping  # noqa: E402
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+SIZES = (1_000, 10_000, 100_000)
+
+
+def ms_ids(size: int):
+    return [str(i) for i in range(size)]
+
+
+def mapped(size: int):
+    return [
+        {"ms_id": str(i), "barcodes": f"bc{i}", "nm_id": i, "name": "name"}
+        for i in range(size)
+    ]
+
+
+def goods_page(size: int):
+    return [
+        {"nmID": i, "sizes": [{"price": 100 + i}], "discount": 10} for i in range(size)
+    ]
+
+
+class _Validated:
+    @validate_ids_and_values
+    def call(self, ms_ids, values):
+        return len(ms_ids)
+
+
+def bench_validators(size: int) -> Callable:
+    ids, values, target = ms_ids(size), list(range(size)), _Validated()
+    return lambda: target.call(ids, values)
+
+
+def bench_ms_item(size: int) -> Callable:
+    rows = mapped(size)
+    return lambda: [MsItem(**row, value=1) for row in rows]
+
+
+def bench_mapped_item(size: int) -> Callable:
+    rows = mapped(size)
+    return lambda: [MappedItem.from_mapping(row, 1) for row in rows]
+
+
+def bench_wb_update_item(size: int) -> Callable:
+    rows = mapped(size)
+    return lambda: [WbUpdateItem(**row, value=1, current_value=1) for row in rows]
+
+
+def bench_collector_item(size: int) -> Callable:
+    rows = [
+        {
+            "ms_id": str(i),
+            "product_id": str(i),
+            "offer_id": str(i),
+            "price": 1,
+            "sku": "1",
+        }
+        for i in range(size)
+    ]
+    return lambda: [CollectorItem(**row) for row in rows]
+
+
+def bench_json_codec(size: int) -> Callable:
+    payload = {"stocks": [{"sku": f"bc{i}", "amount": i} for i in range(size)]}
+    return lambda: loads(dumps(payload))
+
+
+def bench_get_chunks(size: int) -> Callable:
+    ids, values = ms_ids(size), list(range(size))
+    return lambda: get_chunks(ids, values)
+
+
+def bench_price_ladder(size: int) -> Callable:
+    items = [WbUpdateItem(**row, value=1000, current_value=10) for row in mapped(size)]
+    return lambda: plan_price_ladder(items, "price")
+
+
+def bench_parse_goods_page(size: int) -> Callable:
+    body = dumps({"data": {"listGoods": goods_page(size)}})
+    return lambda: parse_goods_page(body)
+
+
+def _wildberries(mocker: requests_mock.Mocker) -> Wildberries:
+    mocker.get(
+        "https://token_service_url",
+        json=[{"warehouse_id": 1, "id": 1, "common_token": "token"}],
+    )
+    mocker.get("https://mapping_url", json=echo_mapping)
+    return Wildberries(
+        token_id=1,
+        token_service_token="token",
+        token_service_url="https://token_service_url",
+        mapping_url="https://mapping_url",
+        rate_limiter=RateLimiter({"default": (float("inf"), float("inf"))}),
+    )
+
+
+def bench_refresh_stocks(size: int) -> Callable:
+    ids, values = ms_ids(size), list(range(size))
+
+    def run():
+        with requests_mock.Mocker() as mocker:
+            wildberries = _wildberries(mocker)
+            mocker.put(f"{settings.wb_api_url}api/v3/stocks/1", status_code=204)
+            wildberries.refresh_stocks(ids, values)
+
+    return run
+
+
+def bench_update_prices(size: int) -> Callable:
+    items = [WbUpdateItem(**row, value=1000, current_value=10) for row in mapped(size)]
+
+    def run():
+        with requests_mock.Mocker() as mocker:
+            wildberries = _wildberries(mocker)
+            mocker.post(f"{settings.wb_price_url}api/v2/upload/task", json={"data": {}})
+            wildberries._update_prices(items, "price")
+
+    return run
+
+
+def bench_get_price(size: int) -> Callable:
+    page_size = settings.WB_ITEMS_REFRESH_LIMIT
+    pages = [
+        goods_page(page_size)[: max(min(size - page * page_size, page_size), 0)]
+        for page in range(size // page_size + 1)
+    ]
+
+    def run():
+        with requests_mock.Mocker() as mocker:
+            wildberries = _wildberries(mocker)
+            wildberries._max_price_requests = len(pages)
+            mocker.get(
+                f"{settings.wb_price_url}api/v2/list/goods/filter",
+                json=lambda request, context: {
+                    "data": {
+                        "listGoods": (
+                            pages[int(request.qs["offset"][0]) // page_size]
+                            if int(request.qs["offset"][0]) // page_size < len(pages)
+                            else []
+                        )
+                    }
+                },
+            )
+            wildberries.get_price()
+
+    return run
+
+
+BENCHMARKS: Dict[str, Callable[[int], Callable]] = {
+    "validators": bench_validators,
+    "ms_item": bench_ms_item,
+    "mapped_item": bench_mapped_item,
+    "wb_update_item": bench_wb_update_item,
+    "collector_item": bench_collector_item,
+    "json_codec": bench_json_codec,
+    "get_chunks": bench_get_chunks,
+    "price_ladder": bench_price_ladder,
+    "parse_goods_page": bench_parse_goods_page,
+    "refresh_stocks": bench_refresh_stocks,
+    "update_prices": bench_update_prices,
+    "get_price": bench_get_price,
+}
+
+
+def measure(func: Callable, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU benchmarks for hot paths")
+    parser.add_argument("names", nargs="*", help=", ".join(BENCHMARKS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", action="store_true", help="store as baselines")
+    parser.add_argument(
+        "--check",
+        type=float,
+        metavar="RATIO",
+        help="exit with 1 if any result is slower than baseline * RATIO",
+    )
+    args = parser.parse_args()
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    logging.disable(logging.INFO)
+    settings.WB_PRICE_STEP_INTERVAL = 0
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f:
+            baselines = json.load(f)
+
+    results = {}
+    regressions = []
+    for name in args.names or BENCHMARKS:
+        for size in args.sizes:
+            key = f"{name}[{size}]"
+            results[key] = measure(BENCHMARKS[name](size), args.repeat)
+            baseline = baselines.get(key)
+            ratio = results[key] / baseline if baseline else None
+            print(
+                f"{key:<30} {results[key]:>10.3f} ms"
+                + (f"  baseline {baseline:>10.3f} ms  x{ratio:.2f}" if ratio else "")
+            )
+            if args.check and ratio and ratio > args.check:
+                regressions.append(key)
+
+    if args.save:
+        with open(BASELINES, "w") as f:
+            json.dump({**baselines, **results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+    if regressions:
+        print(f"Regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ("requests", "urllib3", "aiohttp", "pydantic")
+
+STATEMENTS = {
+    "package": "import marketpalce_handler",
+    "wildberries": "from marketpalce_handler import Wildberries",
+    "ozon": "from marketpalce_handler import Ozon",
+    "async_wildberries": "from marketpalce_handler import AsyncWildberries",
+    "async_ozon": "from marketpalce_handler import AsyncOzon",
+}
+
+PROBE = """
+import sys, time, json
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "modules": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def measure(statement: str, runs: int) -> dict:
+    samples = []
+    modules = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                PROBE.format(statement=statement, heavy=HEAVY_MODULES),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        probe = json.loads(output)
+        samples.append(probe["seconds"] * 1000)
+        modules = probe["modules"]
+    return {
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "max_ms": round(max(samples), 2),
+        "modules": modules,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import time of the package")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    results = {name: measure(stmt, args.runs) for name, stmt in STATEMENTS.items()}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, result in results.items():
+        print(
+            f"{name:<18} median {result['median_ms']:>8.2f} ms  "
+            f"min {result['min_ms']:>8.2f} ms  loads: {', '.join(result['modules']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadtest.fake_servers import (  # noqa: E402
+    FakeServer,
+    FakeServices,
+    FaultProfile,
+    Latency,
+)
+from marketpalce_handler import Ozon, Wildberries  # noqa: E402
+from marketpalce_handler.config import settings  # noqa: E402
+from marketpalce_handler.rate_limit import RateLimiter  # noqa: E402
+
+
+@contextmanager
+def pointed_at(url: str):
+    urls = {
+        "wb_api_url": f"{url}wb/",
+        "wb_price_url": f"{url}wb-prices/",
+        "ozon_api_url": f"{url}ozon/",
+    }
+    previous = {name: getattr(settings, name) for name in urls}
+    for name, value in urls.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def build_wildberries(url: str, concurrency: int, rate_limiter: RateLimiter):
+    return Wildberries(
+        token_id=1,
+        token_service_token="load",
+        token_service_url=f"{url}tokens",
+        mapping_url=f"{url}mapping",
+        session=requests.Session(),
+        concurrency_limit=concurrency,
+        rate_limiter=rate_limiter,
+    )
+
+
+def build_ozon(url: str, concurrency: int, rate_limiter: RateLimiter):
+    return Ozon(
+        client_id="load",
+        api_key="load",
+        collector_api_key="load",
+        collector_url=f"{url}collector",
+        session=requests.Session(),
+        concurrency_limit=concurrency,
+        rate_limiter=rate_limiter,
+    )
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "wb_stocks": lambda clients, ids, values: clients["wb"].refresh_stocks(ids, values),
+    "wb_prices": lambda clients, ids, values: clients["wb"].refresh_prices(
+        ids, [value + 1000 for value in values]
+    ),
+    "wb_statuses": lambda clients, ids, values: clients["wb"].refresh_statuses(
+        [int(ms_id) for ms_id in ids],
+        ["confirm" if value % 2 else "cancel" for value in values],
+    ),
+    "ozon_stocks": lambda clients, ids, values: clients["ozon"].refresh_stocks(
+        ids, values
+    ),
+    "ozon_prices": lambda clients, ids, values: clients["ozon"].refresh_prices(
+        ids, [value + 1000 for value in values]
+    ),
+}
+
+
+def run_scenario(
+    name: str, clients: dict, items: int, iterations: int, parallel: int
+) -> dict:
+    ids = [str(i) for i in range(items)]
+    latencies = []
+    failures = 0
+
+    def operation(iteration: int):
+        values = [(i + iteration) % 100 for i in range(items)]
+        started = time.perf_counter()
+        result = SCENARIOS[name](clients, ids, values)
+        elapsed = time.perf_counter() - started
+        if result is False or (hasattr(result, "ok") and not result.ok):
+            raise RuntimeError(f"{name} reported failed items")
+        return elapsed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        futures = [executor.submit(operation, i) for i in range(iterations)]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception:
+                failures += 1
+    wall = time.perf_counter() - started
+
+    return {
+        "operations": iterations,
+        "failures": failures,
+        "items_per_second": round(items * (iterations - failures) / wall, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "wall_seconds": round(wall, 3),
+    }
+
+
+def run(args) -> dict:
+    profile = FaultProfile(
+        latency=Latency(args.latency, args.latency_ms, args.latency_spread),
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        quota=(args.quota, args.quota_burst) if args.quota else None,
+    )
+    services = FakeServices(default=profile, catalog_size=args.catalog_size)
+    report = {"scenarios": {}}
+    with FakeServer(services) as server, pointed_at(server.url):
+        rate_limiter = RateLimiter(
+            {key: (args.client_rate, args.client_rate) for key in settings.RATE_LIMITS}
+            if args.client_rate
+            else None
+        )
+        clients = {
+            "wb": build_wildberries(server.url, args.concurrency, rate_limiter),
+            "ozon": build_ozon(server.url, args.concurrency, rate_limiter),
+        }
+        for name in args.scenarios:
+            report["scenarios"][name] = run_scenario(
+                name, clients, args.items, args.iterations, args.parallel
+            )
+        report["server"] = {
+            service: dict(counter) for service, counter in services.stats.items()
+        }
+        report["rate_limiter"] = rate_limiter.metrics()
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run bulk operations against local fake marketplaces"
+    )
+    parser.add_argument(
+        "scenarios", nargs="*", default=list(SCENARIOS), help=", ".join(SCENARIOS)
+    )
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--parallel", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=settings.CONCURRENCY_LIMIT)
+    parser.add_argument("--catalog-size", type=int, default=10_000)
+    parser.add_argument(
+        "--latency", choices=["constant", "uniform", "lognormal"], default="lognormal"
+    )
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--latency-spread", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--quota", type=float, help="server requests/s per service")
+    parser.add_argument("--quota-burst", type=float, default=10)
+    parser.add_argument("--client-rate", type=float, help="client requests/s limit")
+    parser.add_argument("--price-step-interval", type=float)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.disable(logging.INFO)
+    if args.price_step_interval is not None:
+        settings.WB_PRICE_STEP_INTERVAL = args.price_step_interval
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    for name, result in report["scenarios"].items():
+        print(
+            f"{name:<12} {result['items_per_second']:>10.1f} items/s  "
+            f"p50 {result['p50_ms']:>8.1f} ms  p95 {result['p95_ms']:>8.1f} ms  "
+            f"p99 {result['p99_ms']:>8.1f} ms  failures {result['failures']}"
+        )
+    for service, counter in report["server"].items():
+        print(f"{service:<12} {counter}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+import asyncio
+import random
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from aiohttp import web
+
+TOKENS = [{"warehouse_id": 1, "id": 1, "common_token": "load-token"}]
+
+
+def nm_id(ms_id: str) -> int:
+    return zlib.crc32(ms_id.encode())
+
+
+@dataclass
+class Latency:
+    distribution: str = "lognormal"
+    mean_ms: float = 20.0
+    spread: float = 0.5
+
+    def sample(self) -> float:
+        if self.mean_ms <= 0:
+            return 0.0
+        match self.distribution:
+            case "constant":
+                delay = self.mean_ms
+            case "uniform":
+                delay = random.uniform(
+                    self.mean_ms * (1 - self.spread), self.mean_ms * (1 + self.spread)
+                )
+            case "lognormal":
+                delay = random.lognormvariate(0, self.spread) * self.mean_ms
+            case _:
+                raise ValueError(f"{self.distribution} is not a latency distribution")
+        return max(delay, 0.0) / 1000
+
+
+@dataclass
+class FaultProfile:
+    latency: Latency = field(default_factory=Latency)
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    quota: Optional[Tuple[float, float]] = None
+
+
+class _Quota:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated_at = time.monotonic()
+
+    def take(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+class FakeServices:
+    def __init__(
+        self,
+        profiles: Dict[str, FaultProfile] = None,
+        default: FaultProfile = None,
+        catalog_size: int = 10_000,
+    ):
+        self.profiles = profiles or {}
+        self.default = default or FaultProfile()
+        self.stats: Dict[str, Counter] = defaultdict(Counter)
+        self.prices = {
+            nm_id(str(i)): {"price": 1000, "discount": 10} for i in range(catalog_size)
+        }
+        self._quotas = {
+            service: _Quota(*profile.quota)
+            for service, profile in self.profiles.items()
+            if profile.quota
+        }
+        self._default_quota = self.default.quota
+        self._supplies = 0
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._faults])
+        app.add_routes(
+            [
+                web.get("/tokens", self.tokens),
+                web.get("/mapping", self.mapping),
+                web.get("/collector/v1/products/additional/cmd", self.collector),
+                web.post("/wb/api/v3/stocks/{warehouse_id}", self.wb_get_stocks),
+                web.put("/wb/api/v3/stocks/{warehouse_id}", self.no_content),
+                web.post("/wb/api/v3/supplies", self.wb_create_supply),
+                web.patch(
+                    "/wb/api/v3/supplies/{supply_id}/orders/{order_id}",
+                    self.no_content,
+                ),
+                web.patch("/wb/api/v3/orders/{order_id}/cancel", self.no_content),
+                web.get("/wb-prices/api/v2/list/goods/filter", self.wb_goods_page),
+                web.post("/wb-prices/api/v2/list/goods/filter", self.wb_goods_by_nm),
+                web.post("/wb-prices/api/v2/upload/task", self.wb_upload_prices),
+                web.post("/ozon/v1/product/import/prices", self.ozon_import),
+                web.post("/ozon/v1/product/import/stocks", self.ozon_import),
+                web.post("/ozon/v2/products/stocks", self.ozon_import),
+                web.post("/ozon/v4/product/info/prices", self.ozon_info),
+            ]
+        )
+        return app
+
+    @staticmethod
+    def service(path: str) -> str:
+        return path.strip("/").split("/", 1)[0]
+
+    def profile(self, service: str) -> FaultProfile:
+        return self.profiles.get(service, self.default)
+
+    def _quota(self, service: str) -> Optional[_Quota]:
+        if service not in self._quotas and self._default_quota:
+            self._quotas[service] = _Quota(*self._default_quota)
+        return self._quotas.get(service)
+
+    @web.middleware
+    async def _faults(self, request: web.Request, handler):
+        service = self.service(request.path)
+        profile = self.profile(service)
+        stats = self.stats[service]
+        stats["requests"] += 1
+        await asyncio.sleep(profile.latency.sample())
+
+        quota = self._quota(service)
+        retry_after = quota.take() if quota else 0.0
+        if retry_after:
+            stats["429_quota"] += 1
+            return web.Response(
+                status=429, headers={"Retry-After": f"{retry_after:.3f}"}
+            )
+        if random.random() < profile.throttle_rate:
+            stats["429_injected"] += 1
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        if random.random() < profile.error_rate:
+            stats["5xx"] += 1
+            return web.Response(status=503)
+
+        response = await handler(request)
+        stats[str(response.status)] += 1
+        return response
+
+    async def tokens(self, request: web.Request):
+        return web.json_response(TOKENS)
+
+    async def mapping(self, request: web.Request):
+        return web.json_response(
+            [
+                {
+                    "ms_id": ms_id,
+                    "barcodes": f"bc{ms_id}",
+                    "nm_id": nm_id(ms_id),
+                    "name": ms_id,
+                }
+                for ms_id in request.query["ms_id"].split(",")
+            ]
+        )
+
+    async def collector(self, request: web.Request):
+        return web.json_response(
+            [
+                {
+                    "ms_id": ms_id,
+                    "ozon_product_id": ms_id,
+                    "code": f"offer-{ms_id}",
+                    "ozon_max_price": 100000,
+                    "attributes": {
+                        "79c718d6-8526-11ee-0a80-065e00096935": {"value": ms_id}
+                    },
+                }
+                for ms_id in request.query["ms_id"].split(",")
+            ]
+        )
+
+    async def no_content(self, request: web.Request):
+        await request.read()
+        return web.Response(status=204)
+
+    async def wb_get_stocks(self, request: web.Request):
+        skus = (await request.json())["skus"]
+        return web.json_response(
+            {"stocks": [{"sku": sku, "amount": 0} for sku in skus]}
+        )
+
+    async def wb_create_supply(self, request: web.Request):
+        self._supplies += 1
+        return web.json_response({"id": f"WB-GI-{self._supplies}"})
+
+    def _goods(self, nm_ids):
+        return web.json_response(
+            {
+                "data": {
+                    "listGoods": [
+                        {
+                            "nmID": nm,
+                            "sizes": [{"price": self.prices[nm]["price"]}],
+                            "discount": self.prices[nm]["discount"],
+                        }
+                        for nm in nm_ids
+                        if nm in self.prices
+                    ]
+                }
+            }
+        )
+
+    async def wb_goods_page(self, request: web.Request):
+        limit = int(request.query["limit"])
+        offset = int(request.query["offset"])
+        return self._goods(list(self.prices)[offset : offset + limit])
+
+    async def wb_goods_by_nm(self, request: web.Request):
+        return self._goods((await request.json())["nmList"])
+
+    async def wb_upload_prices(self, request: web.Request):
+        for row in (await request.json())["data"]:
+            prices = self.prices.setdefault(row["nmId"], {"price": 0, "discount": 0})
+            for key in ("price", "discount"):
+                if key in row:
+                    prices[key] = row[key]
+        return web.json_response({"data": {"id": 1}, "error": False})
+
+    async def ozon_import(self, request: web.Request):
+        body = await request.json()
+        rows = body.get("prices") or body.get("stocks") or []
+        return web.json_response(
+            {
+                "result": [
+                    {
+                        "offer_id": row["offer_id"],
+                        "warehouse_id": row.get("warehouse_id"),
+                        "updated": True,
+                        "errors": [],
+                    }
+                    for row in rows
+                ]
+            }
+        )
+
+    async def ozon_info(self, request: web.Request):
+        body = await request.json()
+        return web.json_response(
+            {
+                "result": {
+                    "items": [
+                        {"offer_id": offer_id, "price": {"price": "1000"}}
+                        for offer_id in body["filter"]["offer_id"]
+                    ]
+                }
+            }
+        )
+
+
+class FakeServer:
+    def __init__(self, services: FakeServices, host: str = "127.0.0.1", port: int = 0):
+        self.services = services
+        self.host = host
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _start(self):
+        self._runner = web.AppRunner(self.services.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
@@ -1,2 +1,29 @@
-from .wb import Wildberries
-from .ozon import Ozon
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .async_ozon import AsyncOzon
+    from .async_wb import AsyncWildberries
+    from .ozon import Ozon
+    from .wb import Wildberries
+
+_EXPORTS = {
+    "Wildberries": ".wb",
+    "AsyncWildberries": ".async_wb",
+    "Ozon": ".ozon",
+    "AsyncOzon": ".async_ozon",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
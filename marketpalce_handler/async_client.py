@@ -0,0 +1,99 @@
+import asyncio
+
+import aiohttp
+
+from .client import encode_body
+from .codec import loads
+from .config import settings
+from .instrumentation import Instrumentation, get_instrumentation
+from .rate_limit import RateLimiter
+from .tracing import span
+
+
+class AsyncClient:
+    def __init__(
+        self,
+        concurrency_limit: int = settings.CONCURRENCY_LIMIT,
+        session: aiohttp.ClientSession = None,
+        rate_limiter: RateLimiter = None,
+        instrumentation: Instrumentation = None,
+    ):
+        self._concurrency_limit = concurrency_limit
+        self._session = session
+        self._own_session = session is None
+        self._semaphore = asyncio.Semaphore(concurrency_limit)
+        self._headers = {}
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.instrumentation = instrumentation or get_instrumentation()
+
+    async def __aenter__(self):
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def initialize(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._concurrency_limit),
+                timeout=aiohttp.ClientTimeout(total=settings.REQUEST_TIMEOUT),
+            )
+
+    async def close(self):
+        if self._own_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _request(self, endpoint: str, method: str, url: str, **kwargs):
+        with span("http", endpoint=endpoint, method=method):
+            encode_body(kwargs, self.instrumentation)
+            async with self._semaphore:
+                for attempt in range(settings.REQUEST_RETRIES + 1):
+                    try:
+                        return await self._send(endpoint, method, url, **kwargs)
+                    except aiohttp.ClientConnectionError:
+                        if attempt == settings.REQUEST_RETRIES:
+                            raise
+                        await asyncio.sleep(
+                            settings.REQUEST_BACKOFF_FACTOR * 2**attempt
+                        )
+
+    async def _send(
+        self,
+        endpoint: str,
+        method: str,
+        url: str,
+        parser=None,
+        chunk_size: int = None,
+        **kwargs,
+    ):
+        headers = {**self._headers, **kwargs.pop("headers", {})}
+        data = kwargs.get("data")
+        request_bytes = len(data) if isinstance(data, bytes) else None
+        for attempt in range(settings.RATE_LIMIT_RETRIES + 1):
+            with span("rate_limit"):
+                await self.rate_limiter.acquire_async(endpoint)
+            with self.instrumentation.request(
+                endpoint, method, url, chunk_size
+            ) as call, span("http.wait"):
+                async with self._session.request(
+                    method, url, headers=headers, **kwargs
+                ) as resp:
+                    streamed = parser is not None and 200 <= resp.status < 300
+                    body = b"" if streamed else await resp.read()
+                    call.set_response(
+                        resp.status,
+                        request_bytes,
+                        resp.content_length if streamed else len(body),
+                    )
+                    self.rate_limiter.on_response(endpoint, resp.status, resp.headers)
+                    if resp.status == 429 and attempt < settings.RATE_LIMIT_RETRIES:
+                        continue
+                    resp.raise_for_status()
+                    if resp.status == 204 or not (streamed or body.strip()):
+                        return None
+                    with span("parse"):
+                        if streamed:
+                            return await parser(resp.content)
+                        return loads(body)
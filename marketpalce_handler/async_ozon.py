@@ -0,0 +1,263 @@
+from functools import partial
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Tuple, Union
+
+import aiohttp
+
+from .async_client import AsyncClient
+from .batch import AsyncBatchExecutor, ChunkResult
+from .cache import MappingCache
+from .collector import AsyncCollector
+from .config import settings
+from .instrumentation import Instrumentation
+from .logger import get_logger
+from .marketplace import Marketplace
+from .rate_limit import RateLimiter
+from .state import SyncStateStore, select_changed
+from .tracing import traced
+from .utils import aiter_windows, attach_ms_ids
+from .validators import (
+    validate_id_and_value,
+    validate_ids_and_values,
+    validate_warehouse_id,
+    validate_warehouse_ids,
+)
+
+
+class AsyncOzon(AsyncClient, Marketplace):
+    def __init__(
+        self,
+        client_id: str,
+        api_key: str,
+        collector_api_key: str,
+        collector_url: str,
+        concurrency_limit: int = settings.CONCURRENCY_LIMIT,
+        session: aiohttp.ClientSession = None,
+        mapping_cache: MappingCache = None,
+        rate_limiter: RateLimiter = None,
+        state_store: SyncStateStore = None,
+        instrumentation: Instrumentation = None,
+    ):
+        super().__init__(concurrency_limit, session, rate_limiter, instrumentation)
+        self._logger = get_logger()
+        self._collector_api_key = collector_api_key
+        self._collector_url = collector_url
+        self._collector_service = None
+        self._executor = AsyncBatchExecutor(concurrency_limit)
+        self._mapping_cache = mapping_cache
+        self._client_id = client_id
+        self._state_store = state_store
+        self._headers = {
+            "Client-Id": client_id,
+            "Api-Key": api_key,
+        }
+
+    async def initialize(self):
+        await super().initialize()
+        self._collector_service = AsyncCollector(
+            self._collector_api_key,
+            self._collector_url,
+            self._session,
+            cache=self._mapping_cache,
+            instrumentation=self.instrumentation,
+        )
+        self._logger.info("Ozon marketplace is initialised")
+
+    def _state_scope(self, kind: str) -> str:
+        return f"ozon:{self._client_id}:{kind}"
+
+    def _commit_confirmed(self, kind: str, rows: List[dict], state: list, result):
+        if self._state_store is None:
+            return
+        confirmed = {
+            (row.get("offer_id"), row.get("warehouse_id"))
+            for row in result.get("result", [])
+            if row.get("updated")
+        }
+        self._state_store.commit(
+            self._state_scope(kind),
+            (
+                item
+                for row, item in zip(rows, state)
+                if (row["offer_id"], row.get("warehouse_id")) in confirmed
+            ),
+        )
+
+    async def _import(
+        self, url: str, key: str, rows: List[dict], state: list = None, kind=None
+    ) -> dict:
+        result = await self._request("ozon_import", "POST", url, json={key: rows})
+        if state is not None:
+            self._commit_confirmed(kind, rows, state, result)
+        return result
+
+    async def _post_chunks(
+        self,
+        url: str,
+        key: str,
+        rows: List[dict],
+        limit: int,
+        state: list = None,
+        kind: str = None,
+    ):
+        sequences = (rows,) if state is None else (rows, state)
+        result = await self._executor.map(
+            partial(self._import, url, key, kind=kind), *sequences, limit=limit
+        )
+        result.raise_for_errors()
+        return {"result": [row for chunk in result.results for row in chunk["result"]]}
+
+    async def _get_ids_map(self, ms_ids: List[str]) -> dict:
+        mapped_data = await self._collector_service.get_mapped_data(ms_ids)
+        return {item.ms_id: item.offer_id for item in mapped_data}
+
+    async def get_prices(self, ms_ids: list[str]) -> dict:
+        ids_map = await self._get_ids_map(ms_ids)
+        return await self._request(
+            "ozon_info",
+            "POST",
+            f"{settings.ozon_api_url}v4/product/info/prices",
+            json={
+                "filter": {"offer_id": list(ids_map.values()), "visibility": "ALL"},
+                "limit": "1000",
+            },
+        )
+
+    @validate_id_and_value
+    async def refresh_price(self, ms_id: str, value: int):
+        return await self.refresh_prices([ms_id], [value])
+
+    @traced("ozon.refresh_prices")
+    @validate_ids_and_values
+    async def refresh_prices(self, ms_ids: List[str], values: List[int]):
+        ms_ids, values = select_changed(
+            self._state_store, self._state_scope("prices"), ms_ids, values
+        )
+        if not ms_ids:
+            return {"result": []}
+        ids_map = await self._get_ids_map(ms_ids)
+        state = [
+            (ms_id, value) for ms_id, value in zip(ms_ids, values) if ms_id in ids_map
+        ]
+        return attach_ms_ids(
+            await self._post_chunks(
+                f"{settings.ozon_api_url}v1/product/import/prices",
+                "prices",
+                [
+                    {"offer_id": ids_map[ms_id], "price": str(value)}
+                    for ms_id, value in state
+                ],
+                settings.OZONE_PRICE_LIMIT,
+                state,
+                "prices",
+            ),
+            ids_map,
+            ms_ids,
+        )
+
+    async def refresh_prices_stream(
+        self,
+        pairs: Union[Iterable[Tuple[str, int]], AsyncIterable[Tuple[str, int]]],
+        window: int = settings.OZONE_PRICE_LIMIT,
+    ) -> AsyncIterator[ChunkResult]:
+        async for chunk in self._executor.stream(
+            self.refresh_prices, aiter_windows(pairs, window)
+        ):
+            yield chunk
+
+    @validate_id_and_value
+    async def refresh_stock(self, ms_id: str, value: int):
+        return await self.refresh_stocks([ms_id], [value])
+
+    @validate_warehouse_id
+    async def refresh_stock_by_warehouse(
+        self, ms_id: str, value: int, warehouse_id: int
+    ):
+        return await self.refresh_stocks_by_warehouse([ms_id], [value], [warehouse_id])
+
+    @traced("ozon.refresh_stocks")
+    @validate_ids_and_values
+    async def refresh_stocks(self, ms_ids: List[str], values: List[int]):
+        ms_ids, values = select_changed(
+            self._state_store, self._state_scope("stocks"), ms_ids, values
+        )
+        if not ms_ids:
+            return {"result": []}
+        ids_map = await self._get_ids_map(ms_ids)
+        state = [
+            (ms_id, value) for ms_id, value in zip(ms_ids, values) if ms_id in ids_map
+        ]
+        return attach_ms_ids(
+            await self._post_chunks(
+                f"{settings.ozon_api_url}v1/product/import/stocks",
+                "stocks",
+                [
+                    {"offer_id": ids_map[ms_id], "stock": value}
+                    for ms_id, value in state
+                ],
+                settings.OZON_STOCK_LIMIT,
+                state,
+                "stocks",
+            ),
+            ids_map,
+            ms_ids,
+        )
+
+    async def refresh_stocks_stream(
+        self,
+        pairs: Union[Iterable[Tuple[str, int]], AsyncIterable[Tuple[str, int]]],
+        window: int = settings.OZON_STOCK_LIMIT,
+    ) -> AsyncIterator[ChunkResult]:
+        async for chunk in self._executor.stream(
+            self.refresh_stocks, aiter_windows(pairs, window)
+        ):
+            yield chunk
+
+    @traced("ozon.refresh_stocks_by_warehouse")
+    @validate_warehouse_ids
+    async def refresh_stocks_by_warehouse(
+        self, ms_ids: List[str], values: List[int], warehouse_ids: List[int]
+    ):
+        keys = [
+            f"{warehouse}:{ms_id}" for ms_id, warehouse in zip(ms_ids, warehouse_ids)
+        ]
+        keys, values, ms_ids, warehouse_ids = select_changed(
+            self._state_store,
+            self._state_scope("warehouse_stocks"),
+            keys,
+            values,
+            ms_ids,
+            warehouse_ids,
+        )
+        if not ms_ids:
+            return {"result": []}
+        ids_map = await self._get_ids_map(ms_ids)
+        stocks = []
+        state = []
+        for key, ms_id, value, warehouse in zip(keys, ms_ids, values, warehouse_ids):
+            if ms_id in ids_map:
+                stocks.append(
+                    {
+                        "offer_id": ids_map[ms_id],
+                        "stock": value,
+                        "warehouse_id": warehouse,
+                    }
+                )
+                state.append((key, value))
+        return attach_ms_ids(
+            await self._post_chunks(
+                f"{settings.ozon_api_url}v2/products/stocks",
+                "stocks",
+                stocks,
+                settings.OZON_STOCK_LIMIT,
+                state,
+                "warehouse_stocks",
+            ),
+            ids_map,
+            ms_ids,
+        )
+
+    async def refresh_status(self, wb_order_id, status):
+        raise NotImplementedError
+
+    async def refresh_statuses(self, wb_order_ids, statuses):
+        raise NotImplementedError
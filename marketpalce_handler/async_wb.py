@@ -0,0 +1,396 @@
+import asyncio
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Tuple,
+    Union,
+)
+
+import aiohttp
+
+from .async_client import AsyncClient
+from .batch import AsyncBatchExecutor, BatchResult, ChunkResult
+from .cache import MappingCache
+from .client import encode_body
+from .config import settings
+from .exceptions import InvalidStatusException
+from .goods import parse_goods_page_async
+from .instrumentation import Instrumentation
+from .logger import get_logger
+from .mapping import AsyncMapping
+from .marketplace import Marketplace
+from .rate_limit import RateLimiter
+from .price_ladder import plan_price_ladder
+from .schemas import ORDER_STATUSES, MappedItem
+from .state import SyncStateStore, select_changed
+from .tokens import TokenProvider, get_token_provider
+from .tracing import span, traced
+from .utils import aiter_windows
+from .validators import (
+    check_ids_and_values,
+    require,
+    validate_id_and_value,
+    validate_ids_and_values,
+    validate_statuses,
+)
+
+
+class AsyncWildberries(AsyncClient, Marketplace):
+    def __init__(
+        self,
+        token_id,
+        token_service_token,
+        token_service_url,
+        mapping_url,
+        max_price_requests: int = 5,
+        concurrency_limit: int = settings.CONCURRENCY_LIMIT,
+        session: aiohttp.ClientSession = None,
+        mapping_cache: MappingCache = None,
+        rate_limiter: RateLimiter = None,
+        state_store: SyncStateStore = None,
+        token_provider: TokenProvider = None,
+        instrumentation: Instrumentation = None,
+    ):
+        super().__init__(concurrency_limit, session, rate_limiter, instrumentation)
+        self._logger = get_logger()
+        self._token_id = token_id
+        self._token_provider = token_provider or get_token_provider(
+            token_service_url, token_service_token
+        )
+        self._mapping_url = mapping_url
+        self._max_price_requests = max_price_requests
+        self._mapping_service = None
+        self._executor = AsyncBatchExecutor(concurrency_limit)
+        self._mapping_cache = mapping_cache
+        self._state_store = state_store
+
+    async def initialize(self):
+        await super().initialize()
+        self._mapping_service = AsyncMapping(
+            self._mapping_url,
+            self._session,
+            self._concurrency_limit,
+            self._mapping_cache,
+            self.instrumentation,
+        )
+
+        await self._authorize()
+        self._logger.debug("Wildberries is initialized")
+
+    async def _authorize(self, force: bool = False):
+        token = await self._token_provider.get_async(
+            self._token_id, self._session, force
+        )
+        self.warehouse_id = token.warehouse_id
+        self._headers = {"Authorization": f"{token.common_token}"}
+
+    async def _request(self, endpoint: str, method: str, url: str, **kwargs):
+        encode_body(kwargs, self.instrumentation)
+        try:
+            return await super()._request(endpoint, method, url, **kwargs)
+        except aiohttp.ClientResponseError as e:
+            if e.status != 401:
+                raise
+        await self._authorize(force=True)
+        return await super()._request(endpoint, method, url, **kwargs)
+
+    async def get_stock(self, ms_id: str):
+        require(isinstance(ms_id, str), f"ms_id must be str, got {ms_id!r}")
+        return await self.get_stocks([ms_id])
+
+    async def _get_stocks_chunk(self, barcodes: List[str]) -> List[dict]:
+        response = await self._request(
+            "wb_stocks",
+            "POST",
+            f"{settings.wb_api_url}api/v3/stocks/{self.warehouse_id}",
+            json={"skus": barcodes},
+        )
+        return response.get("stocks", [])
+
+    async def get_stocks(self, ms_ids: List[str]):
+        try:
+            ms_items = await self._mapping_service.get_records(
+                ms_ids, [0] * len(ms_ids)
+            )
+            result = await self._executor.map(
+                self._get_stocks_chunk,
+                [item.barcodes for item in ms_items],
+                limit=settings.WB_ITEMS_REFRESH_LIMIT,
+            )
+            result.raise_for_errors()
+            return {"stocks": [stock for chunk in result.results for stock in chunk]}
+        except aiohttp.ClientResponseError as e:
+            self._logger.error(f"Wildberries: couldn't get stocks. Error: {e}")
+            raise e
+
+    @validate_id_and_value
+    async def refresh_stock(self, ms_id: str, value: int):
+        return await self.refresh_stocks([ms_id], [value])
+
+    def _state_scope(self, kind: str) -> str:
+        return f"wildberries:{self.warehouse_id}:{kind}"
+
+    def _commit_state(self, kind: str, items):
+        if self._state_store is not None:
+            self._state_store.commit(self._state_scope(kind), items)
+
+    async def _refresh_stocks_chunk(self, ms_ids: List[str], values: List[int]):
+        ms_items = await self._mapping_service.get_records(ms_ids, values)
+        await self._request(
+            "wb_stocks",
+            "PUT",
+            f"{settings.wb_api_url}api/v3/stocks/{self.warehouse_id}",
+            json={
+                "stocks": [
+                    {"sku": item.barcodes, "amount": item.value} for item in ms_items
+                ],
+            },
+        )
+        self._commit_state("stocks", [(item.ms_id, item.value) for item in ms_items])
+
+    @traced("wildberries.refresh_stocks")
+    @validate_ids_and_values
+    async def refresh_stocks(self, ms_ids: List[str], values: List[int]):
+        ms_ids, values = select_changed(
+            self._state_store, self._state_scope("stocks"), ms_ids, values
+        )
+        try:
+            result = await self._executor.map(
+                self._refresh_stocks_chunk,
+                ms_ids,
+                values,
+                limit=settings.WB_ITEMS_REFRESH_LIMIT,
+            )
+            result.raise_for_errors()
+            self._logger.info(f"Wildberries: {len(ms_ids)} stocks are refreshed")
+            return True
+        except aiohttp.ClientResponseError as e:
+            self._logger.error(
+                f"Wildberries: {ms_ids} stock is not refreshed. Error: {e}"
+            )
+            raise e
+
+    async def refresh_stocks_stream(
+        self,
+        pairs: Union[Iterable[Tuple[str, int]], AsyncIterable[Tuple[str, int]]],
+        window: int = settings.WB_ITEMS_REFRESH_LIMIT,
+    ) -> AsyncIterator[ChunkResult]:
+        async for chunk in self._executor.stream(
+            self.refresh_stocks, aiter_windows(pairs, window)
+        ):
+            yield chunk
+
+    async def _get_price_page(self, page: int) -> Tuple[Dict[int, dict], int]:
+        return await self._request(
+            "wb_goods_filter",
+            "GET",
+            f"{settings.wb_price_url}api/v2/list/goods/filter",
+            params={
+                "limit": settings.WB_ITEMS_REFRESH_LIMIT,
+                "offset": page * settings.WB_ITEMS_REFRESH_LIMIT,
+            },
+            parser=parse_goods_page_async,
+        )
+
+    @traced("wildberries.get_price")
+    async def get_price(self) -> Dict:
+        products = dict()
+        pages = self._max_price_requests + 1
+        try:
+            for start in range(0, pages, self._concurrency_limit):
+                window = range(start, min(start + self._concurrency_limit, pages))
+                last_page = False
+                for page_prices, count in await asyncio.gather(
+                    *(self._get_price_page(page) for page in window)
+                ):
+                    products.update(page_prices)
+                    if count < settings.WB_ITEMS_REFRESH_LIMIT:
+                        last_page = True
+                if last_page:
+                    break
+        except aiohttp.ClientResponseError as e:
+            self._logger.error(f"Wildberries: prices are not refreshed. Error: {e}")
+            raise e
+        return products
+
+    async def _reprice(
+        self,
+        ms_ids: List[str],
+        values: List[int],
+        update_value,
+        initial_prices: Dict = None,
+    ):
+        kind = f"{update_value}s"
+        ms_ids, values = select_changed(
+            self._state_store, self._state_scope(kind), ms_ids, values
+        )
+        if not ms_ids:
+            return True
+        if initial_prices is None:
+            initial_prices, ms_items = await asyncio.gather(
+                self.get_price(),
+                self._mapping_service.get_records(ms_ids, values),
+            )
+        else:
+            ms_items = await self._mapping_service.get_records(ms_ids, values)
+        with span("build_models"):
+            for item in ms_items:
+                item.current_value = initial_prices.get(item.nm_id)[update_value]
+        await self._update_prices(ms_items, update_value)
+        self._commit_state(kind, [(item.ms_id, item.value) for item in ms_items])
+        return True
+
+    async def _reprice_stream(self, pairs, window: int, update_value):
+        initial_prices = await self.get_price()
+
+        async def reprice(ms_ids: List[str], values: List[int]):
+            check_ids_and_values(ms_ids, values)
+            return await self._reprice(ms_ids, values, update_value, initial_prices)
+
+        async for chunk in self._executor.stream(reprice, aiter_windows(pairs, window)):
+            yield chunk
+
+    @validate_id_and_value
+    async def refresh_price(self, ms_id: str, value: int):
+        return await self.refresh_prices([ms_id], [value])
+
+    @traced("wildberries.refresh_prices")
+    @validate_ids_and_values
+    async def refresh_prices(self, ms_ids: List[str], values: List[int]):
+        try:
+            return await self._reprice(ms_ids, values, "price")
+        except aiohttp.ClientResponseError as e:
+            self._logger.error(
+                f"Wildberries: {ms_ids} price is not refreshed. Error: {e}"
+            )
+            raise e
+
+    def refresh_prices_stream(
+        self,
+        pairs: Union[Iterable[Tuple[str, int]], AsyncIterable[Tuple[str, int]]],
+        window: int = settings.WB_ITEMS_REFRESH_LIMIT,
+    ) -> AsyncIterator[ChunkResult]:
+        return self._reprice_stream(pairs, window, "price")
+
+    @validate_id_and_value
+    async def refresh_discount(self, ms_id: str, value: int):
+        return await self.refresh_discounts([ms_id], [value])
+
+    @traced("wildberries.refresh_discounts")
+    @validate_ids_and_values
+    async def refresh_discounts(self, ms_ids: List[str], values: List[int]):
+        try:
+            return await self._reprice(ms_ids, values, "discount")
+        except aiohttp.ClientResponseError as e:
+            self._logger.error(
+                f"Wildberries: {ms_ids} discount is not refreshed. Error: {e}"
+            )
+            raise e
+
+    def refresh_discounts_stream(
+        self,
+        pairs: Union[Iterable[Tuple[str, int]], AsyncIterable[Tuple[str, int]]],
+        window: int = settings.WB_ITEMS_REFRESH_LIMIT,
+    ) -> AsyncIterator[ChunkResult]:
+        return self._reprice_stream(pairs, window, "discount")
+
+    async def _upload_prices(self, json_data: List[dict]):
+        return await self._request(
+            "wb_prices_upload",
+            "POST",
+            f"{settings.wb_price_url}api/v2/upload/task",
+            json={"data": json_data},
+        )
+
+    async def _update_prices(self, items: List[MappedItem], update_value):
+        for step, chunks in enumerate(plan_price_ladder(items, update_value)):
+            if step:
+                await asyncio.sleep(settings.WB_PRICE_STEP_INTERVAL)
+            result = await self._executor.run(
+                self._upload_prices, [(chunk,) for chunk in chunks]
+            )
+            result.raise_for_errors()
+        return True
+
+    async def _create_supply(self, name: str) -> str:
+        new_supply = await self._request(
+            "wb_supplies",
+            "POST",
+            f"{settings.wb_api_url}api/v3/supplies",
+            json={"name": name},
+        )
+        return new_supply.get("id")
+
+    async def refresh_status(
+        self, wb_order_id: int, status_name: str, supply_id: str = None
+    ):
+        require(
+            isinstance(wb_order_id, int),
+            f"wb_order_id must be int, got {wb_order_id!r}",
+        )
+        require(
+            isinstance(status_name, str),
+            f"status_name must be str, got {status_name!r}",
+        )
+        try:
+            match status_name:
+                case "confirm":
+                    if supply_id is None:
+                        supply_id = await self._create_supply(
+                            f"supply_order{wb_order_id}"
+                        )
+                    await self._request(
+                        "wb_supplies",
+                        "PATCH",
+                        f"{settings.wb_api_url}api/v3/supplies/{supply_id}/orders/{wb_order_id}",
+                    )
+                case "cancel":
+                    await self._request(
+                        "wb_orders",
+                        "PATCH",
+                        f"{settings.wb_api_url}api/v3/orders/{wb_order_id}/cancel",
+                    )
+                case _:
+                    raise InvalidStatusException(
+                        f"{status_name} is not valid status name"
+                    )
+            return True
+        except aiohttp.ClientResponseError as e:
+            self._logger.error(
+                f"Wildberries: {wb_order_id} status is not refreshed. Error: {e}"
+            )
+            raise e
+
+    @traced("wildberries.refresh_statuses")
+    @validate_statuses
+    async def refresh_statuses(
+        self, wb_order_ids: List[int], statuses: List[str]
+    ) -> BatchResult:
+        for status in statuses:
+            if status not in ORDER_STATUSES:
+                raise InvalidStatusException(f"{status} is not valid status name")
+
+        supply_id = None
+        supply_error = None
+        if "confirm" in statuses:
+            try:
+                supply_id = await self._create_supply("supply_orders")
+            except aiohttp.ClientResponseError as e:
+                self._logger.error(f"Wildberries: can't create new supply. Error: {e}")
+                supply_error = e
+
+        async def refresh(wb_order_id: int, status: str):
+            if status == "confirm" and supply_error is not None:
+                raise supply_error
+            return await self.refresh_status(wb_order_id, status, supply_id)
+
+        result = await self._executor.run(refresh, list(zip(wb_order_ids, statuses)))
+        if not result:
+            self._logger.error(
+                f"Wildberries: {len(result.errors)} of {len(wb_order_ids)} "
+                f"statuses are not refreshed"
+            )
+        return result
@@ -0,0 +1,171 @@
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, List, Sequence
+
+from .config import settings
+from .tracing import in_context, tracing_enabled
+from .utils import chunked
+from .validators import input_trusted
+
+
+@dataclass
+class ChunkResult:
+    index: int
+    args: tuple
+    result: Any = None
+    error: Exception = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchResult:
+    chunks: List[ChunkResult] = field(default_factory=list)
+
+    def __bool__(self):
+        return self.ok
+
+    @property
+    def ok(self) -> bool:
+        return all(chunk.ok for chunk in self.chunks)
+
+    @property
+    def results(self) -> list:
+        return [chunk.result for chunk in self.chunks if chunk.ok]
+
+    @property
+    def errors(self) -> List[Exception]:
+        return [chunk.error for chunk in self.chunks if not chunk.ok]
+
+    def raise_for_errors(self):
+        for chunk in self.chunks:
+            if not chunk.ok:
+                raise chunk.error
+        return self
+
+
+def split_chunks(sequences: Sequence[Sequence], limit: int) -> List[tuple]:
+    return list(zip(*(chunked(sequence, limit) for sequence in sequences)))
+
+
+class BatchExecutor:
+    def __init__(self, max_workers: int = settings.CONCURRENCY_LIMIT):
+        self.max_workers = max_workers
+
+    def map(
+        self,
+        func: Callable,
+        *sequences: Sequence,
+        limit: int = settings.WB_ITEMS_REFRESH_LIMIT,
+    ) -> BatchResult:
+        return self.run(func, split_chunks(sequences, limit))
+
+    def run(self, func: Callable, chunks: List[tuple]) -> BatchResult:
+        results = [ChunkResult(index, args) for index, args in enumerate(chunks)]
+        if len(results) == 1 or self.max_workers == 1:
+            for chunk in results:
+                self._call(func, chunk)
+            return BatchResult(results)
+
+        call = self._worker_call()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(lambda chunk: call(func, chunk), results))
+        return BatchResult(results)
+
+    def stream(self, func: Callable, chunks: Iterable[tuple]) -> Iterator[ChunkResult]:
+        chunks = (ChunkResult(index, args) for index, args in enumerate(chunks))
+        call = self._worker_call()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = {
+                executor.submit(call, func, chunk)
+                for chunk in islice(chunks, self.max_workers)
+            }
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                in_flight.update(
+                    executor.submit(call, func, chunk)
+                    for chunk in islice(chunks, len(done))
+                )
+                for future in done:
+                    yield future.result()
+
+    def _worker_call(self) -> Callable:
+        if tracing_enabled() or input_trusted():
+            return in_context(self._call)
+        return self._call
+
+    @staticmethod
+    def _call(func: Callable, chunk: ChunkResult) -> ChunkResult:
+        try:
+            chunk.result = func(*chunk.args)
+        except Exception as e:
+            chunk.error = e
+        return chunk
+
+
+class AsyncBatchExecutor:
+    def __init__(self, concurrency_limit: int = settings.CONCURRENCY_LIMIT):
+        self.concurrency_limit = concurrency_limit
+        self._semaphore = asyncio.Semaphore(concurrency_limit)
+
+    async def map(
+        self,
+        func: Callable,
+        *sequences: Sequence,
+        limit: int = settings.WB_ITEMS_REFRESH_LIMIT,
+    ) -> BatchResult:
+        return await self.run(func, split_chunks(sequences, limit))
+
+    async def run(self, func: Callable, chunks: List[tuple]) -> BatchResult:
+        results = [ChunkResult(index, args) for index, args in enumerate(chunks)]
+        await asyncio.gather(*(self._call(func, chunk) for chunk in results))
+        return BatchResult(results)
+
+    async def stream(self, func: Callable, chunks) -> AsyncIterator[ChunkResult]:
+        in_flight = set()
+        try:
+            index = 0
+            async for args in _aiter(chunks):
+                chunk = ChunkResult(index, args)
+                index += 1
+                in_flight.add(asyncio.ensure_future(self._call_unbounded(func, chunk)))
+                if len(in_flight) >= self.concurrency_limit:
+                    done, in_flight = await asyncio.wait(
+                        in_flight, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        yield task.result()
+            while in_flight:
+                done, in_flight = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    async def _call(self, func: Callable, chunk: ChunkResult) -> ChunkResult:
+        async with self._semaphore:
+            return await self._call_unbounded(func, chunk)
+
+    @staticmethod
+    async def _call_unbounded(func: Callable, chunk: ChunkResult) -> ChunkResult:
+        try:
+            chunk.result = await func(*chunk.args)
+        except Exception as e:
+            chunk.error = e
+        return chunk
+
+
+async def _aiter(items):
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
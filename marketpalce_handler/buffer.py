@@ -0,0 +1,291 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import AsyncIterator, Dict, Iterator, List, Tuple
+
+from .batch import ChunkResult
+from .config import settings
+from .exceptions import ItemNotUpdatedException, MappingNotFoundException
+from .validators import check_ids_and_values, trusted_input
+
+BULK_METHODS = {
+    "stocks": "refresh_stocks",
+    "prices": "refresh_prices",
+    "discounts": "refresh_discounts",
+}
+
+
+def item_outcomes(chunk: ChunkResult) -> Dict[str, Tuple[object, Exception]]:
+    ms_ids = chunk.args[0]
+    if not chunk.ok:
+        return {ms_id: (None, chunk.error) for ms_id in ms_ids}
+    result = chunk.result
+    if not (isinstance(result, dict) and "result" in result):
+        return {ms_id: (result, None) for ms_id in ms_ids}
+
+    outcomes = {ms_id: (None, None) for ms_id in ms_ids}
+    for ms_id in result.get("not_found", ()):
+        outcomes[ms_id] = (
+            None,
+            MappingNotFoundException(f"{ms_id} is not found in collector"),
+        )
+    for row in result["result"]:
+        ms_id = row.get("ms_id")
+        if ms_id not in outcomes:
+            continue
+        if row.get("updated"):
+            outcomes[ms_id] = (row, None)
+        else:
+            outcomes[ms_id] = (
+                None,
+                ItemNotUpdatedException(f"{ms_id} is not updated: {row.get('errors')}"),
+            )
+    return outcomes
+
+
+class _CoalescingBuffer:
+    def __init__(self, marketplace, max_items: int, max_latency: float):
+        self.marketplace = marketplace
+        self.max_items = max_items
+        self.max_latency = max_latency
+        self._pending: Dict[str, Dict[str, Tuple[int, list]]] = {
+            kind: {} for kind in BULK_METHODS
+        }
+        self._deadline = None
+        self._closed = False
+
+    def __len__(self):
+        return sum(len(pending) for pending in self._pending.values())
+
+    def _add(self, kind: str, ms_id: str, value: int, future):
+        if self._closed:
+            raise RuntimeError("Write buffer is closed")
+        if not hasattr(self.marketplace, BULK_METHODS[kind]):
+            raise NotImplementedError(
+                f"{type(self.marketplace).__name__} has no {BULK_METHODS[kind]}"
+            )
+        check_ids_and_values([ms_id], [value])
+
+        pending = self._pending[kind]
+        _, futures = pending.pop(ms_id, (None, []))
+        futures.append(future)
+        pending[ms_id] = (value, futures)
+        if self._deadline is None:
+            self._deadline = time.monotonic() + self.max_latency
+
+    def _take(self) -> Dict[str, Dict[str, Tuple[int, list]]]:
+        batches = self._pending
+        self._pending = {kind: {} for kind in BULK_METHODS}
+        self._deadline = None
+        return batches
+
+    def _ready(self) -> bool:
+        return bool(len(self)) and (
+            self._closed
+            or len(self) >= self.max_items
+            or time.monotonic() >= self._deadline
+        )
+
+    def _timeout(self) -> float:
+        if self._deadline is None:
+            return None
+        return max(self._deadline - time.monotonic(), 0)
+
+    @staticmethod
+    def _resolve(pending: Dict[str, Tuple[int, list]], chunk: ChunkResult):
+        for ms_id, (result, error) in item_outcomes(chunk).items():
+            for future in pending[ms_id][1] if ms_id in pending else ():
+                if future.done():
+                    continue
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+    @staticmethod
+    def _fail(pending: Dict[str, Tuple[int, list]], error: Exception):
+        for _, futures in pending.values():
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+
+    def _stream(self, kind: str):
+        return getattr(self.marketplace, f"{BULK_METHODS[kind]}_stream", None)
+
+    @staticmethod
+    def _split(pending: Dict[str, Tuple[int, list]]) -> Tuple[List[str], List[int]]:
+        return list(pending), [value for value, _ in pending.values()]
+
+
+class WriteBuffer(_CoalescingBuffer):
+    def __init__(
+        self,
+        marketplace,
+        max_items: int = settings.WRITE_BUFFER_SIZE,
+        max_latency: float = settings.WRITE_BUFFER_LATENCY,
+    ):
+        super().__init__(marketplace, max_items, max_latency)
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def refresh_stock(self, ms_id: str, value: int) -> Future:
+        return self._submit("stocks", ms_id, value)
+
+    def refresh_price(self, ms_id: str, value: int) -> Future:
+        return self._submit("prices", ms_id, value)
+
+    def refresh_discount(self, ms_id: str, value: int) -> Future:
+        return self._submit("discounts", ms_id, value)
+
+    def flush(self):
+        with self._condition:
+            batches = self._take()
+        self._flush(batches)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _submit(self, kind: str, ms_id: str, value: int) -> Future:
+        future = Future()
+        with self._condition:
+            self._add(kind, ms_id, value, future)
+            self._condition.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._ready():
+                    if self._closed:
+                        return
+                    self._condition.wait(self._timeout())
+                batches = self._take()
+            self._flush(batches)
+
+    def _flush(self, batches):
+        for kind, pending in batches.items():
+            if not pending:
+                continue
+            try:
+                with trusted_input():
+                    for chunk in self._chunks(kind, *self._split(pending)):
+                        self._resolve(pending, chunk)
+                self._fail(
+                    pending, RuntimeError(f"{BULK_METHODS[kind]} returned no result")
+                )
+            except Exception as e:
+                self._fail(pending, e)
+
+    def _chunks(self, kind: str, ms_ids, values) -> Iterator[ChunkResult]:
+        stream = self._stream(kind)
+        if stream is not None:
+            yield from stream(zip(ms_ids, values))
+            return
+        chunk = ChunkResult(0, (ms_ids, values))
+        try:
+            chunk.result = getattr(self.marketplace, BULK_METHODS[kind])(ms_ids, values)
+        except Exception as e:
+            chunk.error = e
+        yield chunk
+
+
+class AsyncWriteBuffer(_CoalescingBuffer):
+    def __init__(
+        self,
+        marketplace,
+        max_items: int = settings.WRITE_BUFFER_SIZE,
+        max_latency: float = settings.WRITE_BUFFER_LATENCY,
+    ):
+        super().__init__(marketplace, max_items, max_latency)
+        self._wake = asyncio.Event()
+        self._task = None
+        self._flushes = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def refresh_stock(self, ms_id: str, value: int) -> asyncio.Future:
+        return self._submit("stocks", ms_id, value)
+
+    def refresh_price(self, ms_id: str, value: int) -> asyncio.Future:
+        return self._submit("prices", ms_id, value)
+
+    def refresh_discount(self, ms_id: str, value: int) -> asyncio.Future:
+        return self._submit("discounts", ms_id, value)
+
+    async def flush(self):
+        await self._flush(self._take())
+
+    async def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._task is not None:
+            await self._task
+        await self.flush()
+        await asyncio.gather(*self._flushes)
+
+    def _submit(self, kind: str, ms_id: str, value: int) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._add(kind, ms_id, value, future)
+        if len(self) >= self.max_items:
+            flush = asyncio.create_task(self._flush(self._take()))
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+        elif self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        self._wake.set()
+        return future
+
+    async def _run(self):
+        while len(self):
+            if not self._ready():
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self._timeout())
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+            await self._flush(self._take())
+
+    async def _flush(self, batches):
+        for kind, pending in batches.items():
+            if not pending:
+                continue
+            try:
+                with trusted_input():
+                    async for chunk in self._chunks(kind, *self._split(pending)):
+                        self._resolve(pending, chunk)
+                self._fail(
+                    pending, RuntimeError(f"{BULK_METHODS[kind]} returned no result")
+                )
+            except Exception as e:
+                self._fail(pending, e)
+
+    async def _chunks(self, kind: str, ms_ids, values) -> AsyncIterator[ChunkResult]:
+        stream = self._stream(kind)
+        if stream is not None:
+            async for chunk in stream(zip(ms_ids, values)):
+                yield chunk
+            return
+        chunk = ChunkResult(0, (ms_ids, values))
+        try:
+            chunk.result = await getattr(self.marketplace, BULK_METHODS[kind])(
+                ms_ids, values
+            )
+        except Exception as e:
+            chunk.error = e
+        yield chunk
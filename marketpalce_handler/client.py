@@ -0,0 +1,74 @@
+import requests
+from urllib3 import Retry
+
+from .codec import dumps, get_codec
+from .config import settings
+from .instrumentation import Instrumentation, get_instrumentation, payload_size
+from .rate_limit import RateLimiter
+from .tracing import span
+
+
+def adapter_retry() -> Retry:
+    return Retry(
+        total=settings.REQUEST_RETRIES,
+        backoff_factor=settings.REQUEST_BACKOFF_FACTOR,
+        respect_retry_after_header=False,
+    )
+
+
+def encode_body(kwargs: dict, instrumentation: Instrumentation) -> dict:
+    if "chunk_size" not in kwargs:
+        kwargs["chunk_size"] = payload_size(kwargs) if instrumentation.enabled else None
+    if kwargs.get("json") is not None:
+        with span("serialize"):
+            kwargs["data"] = dumps(kwargs.pop("json"))
+        kwargs["headers"] = {
+            **kwargs.get("headers", {}),
+            "Content-Type": get_codec().content_type,
+        }
+    return kwargs
+
+
+class Client:
+    def __init__(
+        self,
+        session: requests.Session,
+        rate_limiter: RateLimiter = None,
+        instrumentation: Instrumentation = None,
+    ):
+        self._session = session
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.instrumentation = instrumentation or get_instrumentation()
+
+    def _request(
+        self, endpoint: str, method: str, url: str, **kwargs
+    ) -> requests.Response:
+        kwargs.setdefault("timeout", settings.REQUEST_TIMEOUT)
+        with span("http", endpoint=endpoint, method=method):
+            chunk_size = encode_body(kwargs, self.instrumentation).pop("chunk_size")
+            for attempt in range(settings.RATE_LIMIT_RETRIES + 1):
+                with span("rate_limit"):
+                    self.rate_limiter.acquire(endpoint)
+                with self.instrumentation.request(
+                    endpoint, method, url, chunk_size
+                ) as call, span("http.wait"):
+                    response = self._session.request(method, url, **kwargs)
+                    call.set_response(
+                        response.status_code,
+                        len(response.request.body or b""),
+                        (
+                            int(response.headers.get("Content-Length", 0))
+                            if kwargs.get("stream")
+                            else len(response.content)
+                        ),
+                    )
+                self.rate_limiter.on_response(
+                    endpoint, response.status_code, response.headers
+                )
+                if (
+                    response.status_code != 429
+                    or attempt == settings.RATE_LIMIT_RETRIES
+                ):
+                    break
+                response.close()
+        return response
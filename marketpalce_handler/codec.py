@@ -0,0 +1,78 @@
+import json
+from typing import Union
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec:
+    name = "json"
+    content_type = "application/json"
+
+    def dumps(self, obj) -> bytes:
+        return json.dumps(
+            obj, separators=(",", ":"), ensure_ascii=False, allow_nan=False
+        ).encode()
+
+    def loads(self, data: Union[bytes, str]):
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson is not installed")
+
+    def dumps(self, obj) -> bytes:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, data: Union[bytes, str]):
+        return orjson.loads(data)
+
+
+CODECS = {"json": JsonCodec, "orjson": OrjsonCodec}
+
+
+def _default_codec() -> JsonCodec:
+    name = settings.JSON_CODEC or ("json" if orjson is None else "orjson")
+    return CODECS[name]()
+
+
+_codec = _default_codec()
+
+
+def get_codec() -> JsonCodec:
+    return _codec
+
+
+def set_codec(codec: Union[str, JsonCodec, None] = None):
+    global _codec
+    if codec is None:
+        _codec = _default_codec()
+    elif isinstance(codec, str):
+        if codec not in CODECS:
+            raise ValueError(f"{codec} is not a JSON codec: {', '.join(CODECS)}")
+        _codec = CODECS[codec]()
+    else:
+        _codec = codec
+
+
+def dumps(obj) -> bytes:
+    return _codec.dumps(obj)
+
+
+def loads(data: Union[bytes, str]):
+    return _codec.loads(data)
+
+
+def decode(response):
+    return _codec.loads(response.content)
@@ -1,39 +1,212 @@
 import asyncio
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, List
+
+from .cache import MappingCache
+from .codec import loads
+from .config import settings
+from .exceptions import MappingNotFoundException
+from .instrumentation import Instrumentation, get_instrumentation
+from .logger import get_logger
 from .schemas import CollectorItem
-import aiohttp
+from .tracing import span
+from .utils import chunked
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+@dataclass
+class LookupResult:
+    items: List[dict] = field(default_factory=list)
+    failed: Dict[str, Exception] = field(default_factory=dict)
+    models: List[CollectorItem] = field(default_factory=list)
 
 
 class Collector:
-    def __init__(self, collector_api_key: str, collector_url: str):
+    def __init__(
+        self,
+        collector_api_key: str,
+        collector_url: str,
+        concurrency_limit: int = settings.COLLECTOR_CONCURRENCY_LIMIT,
+        batch_size: int = settings.COLLECTOR_BATCH_SIZE,
+        retries: int = settings.REQUEST_RETRIES,
+        cache: MappingCache = None,
+        instrumentation: Instrumentation = None,
+    ):
         self.collector_api_key = collector_api_key
         self.collector_url = collector_url
+        self.concurrency_limit = concurrency_limit
+        self.batch_size = batch_size
+        self.retries = retries
+        self.cache = cache
+        self.instrumentation = instrumentation or get_instrumentation()
+        self._logger = get_logger()
 
     def get_mapped_data(self, ms_ids):
-        mapped_data = asyncio.run(self.fetch_mapped_data(ms_ids))
-        return [
-            CollectorItem(
-                ms_id=item.get("ms_id"),
-                product_id=item.get("ozon_product_id"),
-                offer_id=item.get("code"),
-                price=round(item.get("ozon_max_price") / 100, 2),
-                sku=item["attributes"]["79c718d6-8526-11ee-0a80-065e00096935"]["value"],
+        with span("collector", items=len(ms_ids)):
+            cached, missing = self._get_cached(ms_ids)
+            mapped_data = (
+                asyncio.run(self.fetch_mapped_data(missing)) if missing else []
             )
-            for item in mapped_data
-        ]
+            return self._build_items(ms_ids, cached, mapped_data)
+
+    def _get_cached(self, ms_ids):
+        if self.cache is None:
+            return {}, ms_ids
+        return self.cache.get_many(ms_ids)
+
+    def _build_items(self, ms_ids, cached: dict, fetched: List[CollectorItem]):
+        if self.cache is not None and fetched:
+            self.cache.set_many({item.ms_id: item for item in fetched})
+        if not cached:
+            return fetched
+        items = {**cached, **{item.ms_id: item for item in fetched}}
+        return [items[ms_id] for ms_id in dict.fromkeys(ms_ids) if ms_id in items]
 
     async def fetch_mapped_data(self, ms_ids):
-        tasks = []
+        import aiohttp
+
         async with aiohttp.ClientSession() as session:
-            for i in ms_ids:
-                url = f"{self.collector_url}/v1/products/additional/cmd?ms_id={i}"
-                headers = {"Authorization": self.collector_api_key}
-                task = asyncio.create_task(self.fetch_item(session, url, headers))
-                tasks.append(task)
+            result = await self.lookup(session, ms_ids)
+        return self._log_failed(result)
+
+    async def lookup(self, session, ms_ids) -> LookupResult:
+        ms_ids = list(dict.fromkeys(ms_ids))
+        queue = asyncio.Queue()
+        for batch in chunked(ms_ids, self.batch_size):
+            queue.put_nowait(batch)
+
+        found = {}
+        failed = {}
+        workers = min(self.concurrency_limit, queue.qsize())
+        await asyncio.gather(
+            *(self._worker(session, queue, found, failed) for _ in range(workers))
+        )
+        found = [found[ms_id] for ms_id in ms_ids if ms_id in found]
+        return LookupResult(
+            items=[item for item, _ in found],
+            failed=failed,
+            models=[model for _, model in found],
+        )
+
+    async def _worker(self, session, queue: asyncio.Queue, found: dict, failed: dict):
+        import aiohttp
+
+        while not queue.empty():
+            batch = queue.get_nowait()
+            try:
+                items = await self._fetch_batch(session, batch)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if len(batch) == 1:
+                    failed[batch[0]] = e
+                else:
+                    for ms_id in batch:
+                        queue.put_nowait([ms_id])
+                continue
+            except ValueError as e:
+                for ms_id in batch:
+                    failed[ms_id] = e
+                continue
+
+            with span("build_models"):
+                for item in items:
+                    if item.get("ms_id") not in batch:
+                        continue
+                    try:
+                        found[item["ms_id"]] = (item, self.to_collector_item(item))
+                    except (ValueError, KeyError, TypeError) as e:
+                        failed[item["ms_id"]] = e
+            for ms_id in batch:
+                if ms_id not in found and ms_id not in failed:
+                    failed[ms_id] = MappingNotFoundException(
+                        f"{ms_id} is not found in collector"
+                    )
 
-            responses = await asyncio.gather(*tasks)
-            return responses
+    async def _fetch_batch(self, session, batch: List[str]) -> List[dict]:
+        import aiohttp
+
+        url = f"{self.collector_url}/v1/products/additional/cmd?ms_id={','.join(batch)}"
+        headers = {"Authorization": self.collector_api_key}
+        for attempt in range(self.retries + 1):
+            try:
+                items = await self._fetch_item(session, url, headers, len(batch))
+                return [items] if isinstance(items, dict) else items
+            except aiohttp.ClientResponseError as e:
+                if (e.status != 429 and e.status < 500) or attempt == self.retries:
+                    raise
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(settings.REQUEST_BACKOFF_FACTOR * 2**attempt)
+
+    async def _fetch_item(self, session, url: str, headers: dict, size: int):
+        import aiohttp
+
+        with span("http", endpoint="collector", method="GET"):
+            with self.instrumentation.request(
+                "collector", "GET", self.collector_url, size
+            ) as call:
+                try:
+                    items = await self.fetch_item(session, url, headers)
+                except aiohttp.ClientResponseError as e:
+                    call.set_response(e.status)
+                    raise
+                call.set_response(200)
+        return items
+
+    def _log_failed(self, result: LookupResult) -> List[CollectorItem]:
+        if result.failed:
+            self._logger.error(
+                f"Collector: {list(result.failed)} are not mapped. "
+                f"Errors: {set(map(repr, result.failed.values()))}"
+            )
+        return result.models
 
     @staticmethod
     async def fetch_item(session, url, headers):
-        async with session.get(url, headers=headers) as response:
-            return await response.json()
+        async with session.get(url, headers=headers, raise_for_status=True) as response:
+            return loads(await response.read())
+
+    @staticmethod
+    def to_collector_item(item: dict) -> CollectorItem:
+        return CollectorItem(
+            ms_id=item.get("ms_id"),
+            product_id=item.get("ozon_product_id"),
+            offer_id=item.get("code"),
+            price=round(item.get("ozon_max_price") / 100, 2),
+            sku=item["attributes"]["79c718d6-8526-11ee-0a80-065e00096935"]["value"],
+        )
+
+
+class AsyncCollector(Collector):
+    def __init__(
+        self,
+        collector_api_key: str,
+        collector_url: str,
+        session: "aiohttp.ClientSession",
+        concurrency_limit: int = settings.COLLECTOR_CONCURRENCY_LIMIT,
+        batch_size: int = settings.COLLECTOR_BATCH_SIZE,
+        retries: int = settings.REQUEST_RETRIES,
+        cache: MappingCache = None,
+        instrumentation: Instrumentation = None,
+    ):
+        super().__init__(
+            collector_api_key,
+            collector_url,
+            concurrency_limit,
+            batch_size,
+            retries,
+            cache,
+            instrumentation,
+        )
+        self.session = session
+
+    async def get_mapped_data(self, ms_ids):
+        with span("collector", items=len(ms_ids)):
+            cached, missing = self._get_cached(ms_ids)
+            mapped_data = await self.fetch_mapped_data(missing) if missing else []
+            return self._build_items(ms_ids, cached, mapped_data)
+
+    async def fetch_mapped_data(self, ms_ids):
+        return self._log_failed(await self.lookup(self.session, ms_ids))
@@ -6,6 +6,50 @@ class Settings:
     MAPPING_LIMIT: int = 100
     OZON_STOCK_LIMIT: int = 100
     OZONE_PRICE_LIMIT: int = 1000
+    CONCURRENCY_LIMIT: int = 10
+    COLLECTOR_CONCURRENCY_LIMIT: int = 20
+    COLLECTOR_BATCH_SIZE: int = 1
+    MAPPING_CACHE_SIZE: int = 100_000
+    MAPPING_CACHE_TTL: float = 3600
+    WB_PRICE_SNAPSHOT_TTL: float = 300
+    WB_PRICE_LOOKUP_RATIO: float = 0.1
+    WB_PRICE_STEP_INTERVAL: float = 0.6
+    WB_GOODS_STREAMING: bool = False
+    REQUEST_TIMEOUT: int = 5
+    REQUEST_RETRIES: int = 3
+    REQUEST_BACKOFF_FACTOR: float = 0.5
+    RATE_LIMIT_RETRIES: int = 3
+    STATE_QUERY_LIMIT: int = 500
+    WB_TOKEN_TTL: float = 3600
+    WB_TOKEN_REFRESH_RATIO: float = 0.8
+    WB_TOKEN_CACHE_PATH: str = None
+    WRITE_BUFFER_SIZE: int = 1000
+    WRITE_BUFFER_LATENCY: float = 0.5
+    INSTRUMENTATION_ENABLED: bool = False
+    JSON_CODEC: str = None
+    INSTRUMENTATION_BUCKETS: tuple = (
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+    )
+    RATE_LIMITS: dict = {
+        "default": (10, 10),
+        "wb_stocks": (5, 10),
+        "wb_goods_filter": (10 / 6, 10),
+        "wb_prices_upload": (10 / 6, 10),
+        "wb_supplies": (5, 10),
+        "wb_orders": (5, 10),
+        "ozon_import": (10, 10),
+        "ozon_info": (10, 10),
+    }
 
 
 settings = Settings()
@@ -4,3 +4,15 @@ class InvalidStatusException(Exception):
 
 class InitialisationException(Exception):
     pass
+
+
+class MappingNotFoundException(Exception):
+    pass
+
+
+class ItemNotUpdatedException(Exception):
+    pass
+
+
+class InvalidArgumentsException(AssertionError):
+    pass
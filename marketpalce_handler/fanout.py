@@ -0,0 +1,151 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple, Union
+
+import requests
+
+from .batch import BatchExecutor, BatchResult
+from .cache import MappingCache
+from .config import settings
+from .instrumentation import Instrumentation
+from .logger import get_logger
+from .rate_limit import RateLimiter
+from .schemas import MappedItem
+from .state import SyncStateStore
+from .tokens import TokenProvider, get_token_provider
+from .tracing import traced
+from .validators import check_ids_and_values, require
+from .wb import Wildberries
+
+Target = Union[int, Tuple[int, int]]
+
+
+@dataclass
+class FanoutResult:
+    warehouses: Dict[int, BatchResult] = field(default_factory=dict)
+
+    def __bool__(self):
+        return self.ok
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.warehouses.values())
+
+    @property
+    def failed(self) -> List[int]:
+        return [
+            warehouse_id
+            for warehouse_id, result in self.warehouses.items()
+            if not result.ok
+        ]
+
+    def raise_for_errors(self):
+        for result in self.warehouses.values():
+            result.raise_for_errors()
+        return self
+
+
+class WildberriesFanout:
+    def __init__(
+        self,
+        targets: Iterable[Target],
+        token_service_token,
+        token_service_url,
+        mapping_url,
+        session: requests.Session = None,
+        mapping_cache: MappingCache = None,
+        concurrency_limit: int = settings.CONCURRENCY_LIMIT,
+        rate_limiter: RateLimiter = None,
+        state_store: SyncStateStore = None,
+        token_provider: TokenProvider = None,
+        instrumentation: Instrumentation = None,
+    ):
+        self._logger = get_logger()
+        self._session = session or requests.Session()
+        self._token_provider = token_provider or get_token_provider(
+            token_service_url, token_service_token
+        )
+        self._executor = BatchExecutor(concurrency_limit)
+        rate_limiters = {}
+        self.clients: List[Wildberries] = []
+        for target in targets:
+            token_id, warehouse_id = (
+                target if isinstance(target, tuple) else (target, None)
+            )
+            if rate_limiter is None and token_id not in rate_limiters:
+                rate_limiters[token_id] = RateLimiter()
+            client = Wildberries(
+                token_id,
+                token_service_token,
+                token_service_url,
+                mapping_url,
+                session=self._session,
+                mapping_cache=mapping_cache,
+                concurrency_limit=concurrency_limit,
+                rate_limiter=rate_limiter or rate_limiters[token_id],
+                state_store=state_store,
+                token_provider=self._token_provider,
+                instrumentation=instrumentation,
+            )
+            if warehouse_id is not None:
+                client.warehouse_id = warehouse_id
+            self.clients.append(client)
+        self._warehouses = None
+
+    @property
+    def warehouses(self) -> Dict[int, Wildberries]:
+        if self._warehouses is None:
+            warehouses = {}
+            duplicates = set()
+            for client in self.clients:
+                if client.warehouse_id in warehouses:
+                    duplicates.add(client.warehouse_id)
+                warehouses[client.warehouse_id] = client
+            require(not duplicates, f"Duplicate warehouses: {sorted(duplicates)}")
+            self._warehouses = warehouses
+        return self._warehouses
+
+    def _refresh_warehouse_stocks(
+        self,
+        warehouse_id: int,
+        ms_ids: List[str],
+        values: List[int],
+        records: Dict[str, List[MappedItem]],
+    ) -> BatchResult:
+        result = self.warehouses[warehouse_id].push_stock_records(
+            ms_ids, values, records
+        )
+        if not result.ok:
+            self._logger.error(
+                f"Wildberries: stocks are not refreshed in warehouse {warehouse_id}. "
+                f"Errors: {result.errors}"
+            )
+        return result
+
+    @traced("wildberries_fanout.refresh_stocks")
+    def refresh_stocks(
+        self, stocks: Dict[int, Tuple[List[str], List[int]]]
+    ) -> FanoutResult:
+        unknown = set(stocks) - set(self.warehouses)
+        require(not unknown, f"Unknown warehouses: {sorted(unknown)}")
+        for ms_ids, values in stocks.values():
+            check_ids_and_values(ms_ids, values)
+        records = self.clients[0].get_stock_records(
+            list(
+                dict.fromkeys(
+                    ms_id for ms_ids, _ in stocks.values() for ms_id in ms_ids
+                )
+            )
+        )
+        result = self._executor.run(
+            self._refresh_warehouse_stocks,
+            [
+                (warehouse_id, ms_ids, values, records)
+                for warehouse_id, (ms_ids, values) in stocks.items()
+            ],
+        )
+        return FanoutResult(
+            {
+                warehouse_id: (chunk.result if chunk.ok else BatchResult([chunk]))
+                for warehouse_id, chunk in zip(stocks, result.chunks)
+            }
+        )
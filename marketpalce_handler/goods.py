@@ -0,0 +1,45 @@
+from typing import Dict, Iterable, Tuple
+
+from .codec import loads
+from .config import settings
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+GOODS_PREFIX = "data.listGoods.item"
+
+
+def streaming_enabled() -> bool:
+    return ijson is not None and bool(settings.WB_GOODS_STREAMING)
+
+
+def _price(product: dict) -> dict:
+    return {"price": product["sizes"][0]["price"], "discount": product["discount"]}
+
+
+def collect_goods_prices(goods: Iterable[dict]) -> Tuple[Dict[int, dict], int]:
+    prices = {}
+    count = 0
+    for count, product in enumerate(goods, 1):
+        prices[product["nmID"]] = _price(product)
+    return prices, count
+
+
+def parse_goods_page(source) -> Tuple[Dict[int, dict], int]:
+    if streaming_enabled():
+        return collect_goods_prices(ijson.items(source, GOODS_PREFIX, use_float=True))
+    data = source if isinstance(source, (bytes, str)) else source.read()
+    return collect_goods_prices(loads(data)["data"]["listGoods"])
+
+
+async def parse_goods_page_async(stream) -> Tuple[Dict[int, dict], int]:
+    if not streaming_enabled():
+        return collect_goods_prices(loads(await stream.read())["data"]["listGoods"])
+    prices = {}
+    count = 0
+    async for product in ijson.items_async(stream, GOODS_PREFIX, use_float=True):
+        prices[product["nmID"]] = _price(product)
+        count += 1
+    return prices, count
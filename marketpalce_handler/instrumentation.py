@@ -0,0 +1,267 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from .config import settings
+
+Hook = Callable[["RequestCall"], None]
+
+
+def payload_size(kwargs: dict) -> int:
+    payload = kwargs.get("json")
+    if isinstance(payload, list):
+        return len(payload)
+    if isinstance(payload, dict):
+        for value in payload.values():
+            if isinstance(value, list):
+                return len(value)
+            if isinstance(value, dict):
+                return payload_size({"json": value})
+    params = kwargs.get("params")
+    if isinstance(params, dict) and params.get("ms_id"):
+        return str(params["ms_id"]).count(",") + 1
+    return None
+
+
+class RequestCall:
+    __slots__ = (
+        "instrumentation",
+        "endpoint",
+        "method",
+        "url",
+        "chunk_size",
+        "request_bytes",
+        "response_bytes",
+        "status",
+        "duration",
+        "error",
+        "_started",
+    )
+
+    def __init__(
+        self,
+        instrumentation: "Instrumentation",
+        endpoint: str,
+        method: str,
+        url: str,
+        chunk_size: int = None,
+    ):
+        self.instrumentation = instrumentation
+        self.endpoint = endpoint
+        self.method = method
+        self.url = url
+        self.chunk_size = chunk_size
+        self.request_bytes = None
+        self.response_bytes = None
+        self.status = None
+        self.duration = None
+        self.error = None
+        self._started = None
+
+    def __enter__(self):
+        for hook in self.instrumentation.pre_hooks:
+            hook(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._started
+        self.error = exc
+        self.instrumentation.record(self)
+        return False
+
+    def set_response(
+        self, status: int, request_bytes: int = None, response_bytes: int = None
+    ):
+        self.status = status
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+
+
+class _NoopCall:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_response(self, status, request_bytes=None, response_bytes=None):
+        pass
+
+
+_NOOP_CALL = _NoopCall()
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+        total = 0
+        result = []
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class Instrumentation:
+    def __init__(
+        self,
+        enabled: bool = None,
+        buckets: Sequence[float] = None,
+    ):
+        self.enabled = settings.INSTRUMENTATION_ENABLED if enabled is None else enabled
+        self.buckets = tuple(buckets or settings.INSTRUMENTATION_BUCKETS)
+        self.pre_hooks: List[Hook] = []
+        self.post_hooks: List[Hook] = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def add_hooks(self, pre: Hook = None, post: Hook = None):
+        if pre is not None:
+            self.pre_hooks.append(pre)
+        if post is not None:
+            self.post_hooks.append(post)
+
+    def remove_hooks(self, pre: Hook = None, post: Hook = None):
+        if pre in self.pre_hooks:
+            self.pre_hooks.remove(pre)
+        if post in self.post_hooks:
+            self.post_hooks.remove(post)
+
+    def reset(self):
+        with self._lock:
+            self.requests: Dict[Tuple[str, str], int] = defaultdict(int)
+            self.errors: Dict[str, int] = defaultdict(int)
+            self.items: Dict[str, int] = defaultdict(int)
+            self.bytes: Dict[Tuple[str, str], int] = defaultdict(int)
+            self.durations: Dict[str, Histogram] = {}
+
+    def request(
+        self,
+        endpoint: str,
+        method: str,
+        url: str,
+        chunk_size: int = None,
+        payload: dict = None,
+    ):
+        if not self.enabled:
+            return _NOOP_CALL
+        if chunk_size is None and payload is not None:
+            chunk_size = payload_size(payload)
+        return RequestCall(self, endpoint, method, url, chunk_size)
+
+    def record(self, call: RequestCall):
+        endpoint = call.endpoint
+        status = "error" if call.status is None else str(call.status)
+        with self._lock:
+            self.requests[(endpoint, status)] += 1
+            if call.error is not None or call.status is None or call.status >= 400:
+                self.errors[endpoint] += 1
+            if call.chunk_size:
+                self.items[endpoint] += call.chunk_size
+            if call.request_bytes:
+                self.bytes[(endpoint, "sent")] += call.request_bytes
+            if call.response_bytes:
+                self.bytes[(endpoint, "received")] += call.response_bytes
+            histogram = self.durations.get(endpoint)
+            if histogram is None:
+                histogram = self.durations[endpoint] = Histogram(self.buckets)
+            histogram.observe(call.duration)
+        for hook in self.post_hooks:
+            hook(call)
+
+    def export_prometheus(self, prefix: str = "marketplace") -> str:
+        with self._lock:
+            lines = [
+                f"# HELP {prefix}_requests_total Outbound HTTP requests.",
+                f"# TYPE {prefix}_requests_total counter",
+            ]
+            for (endpoint, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f"{prefix}_requests_total"
+                    f"{_labels(endpoint=endpoint, status=status)} {count}"
+                )
+            lines += [
+                f"# HELP {prefix}_request_errors_total "
+                "Outbound HTTP requests failed with an error or a 4xx/5xx status.",
+                f"# TYPE {prefix}_request_errors_total counter",
+            ]
+            for endpoint, count in sorted(self.errors.items()):
+                lines.append(
+                    f"{prefix}_request_errors_total{_labels(endpoint=endpoint)} {count}"
+                )
+            lines += [
+                f"# HELP {prefix}_request_items_total Items sent in request chunks.",
+                f"# TYPE {prefix}_request_items_total counter",
+            ]
+            for endpoint, count in sorted(self.items.items()):
+                lines.append(
+                    f"{prefix}_request_items_total{_labels(endpoint=endpoint)} {count}"
+                )
+            lines += [
+                f"# HELP {prefix}_request_bytes_total HTTP body bytes.",
+                f"# TYPE {prefix}_request_bytes_total counter",
+            ]
+            for (endpoint, direction), count in sorted(self.bytes.items()):
+                lines.append(
+                    f"{prefix}_request_bytes_total"
+                    f"{_labels(endpoint=endpoint, direction=direction)} {count}"
+                )
+            lines += [
+                f"# HELP {prefix}_request_duration_seconds Outbound HTTP latency.",
+                f"# TYPE {prefix}_request_duration_seconds histogram",
+            ]
+            for endpoint, histogram in sorted(self.durations.items()):
+                for bound, count in histogram.cumulative():
+                    lines.append(
+                        f"{prefix}_request_duration_seconds_bucket"
+                        f"{_labels(endpoint=endpoint, le=bound)} {count}"
+                    )
+                labels = _labels(endpoint=endpoint)
+                lines.append(
+                    f"{prefix}_request_duration_seconds_sum{labels} {histogram.sum}"
+                )
+                lines.append(
+                    f"{prefix}_request_duration_seconds_count{labels} {histogram.count}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return (
+        "{"
+        + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+        + "}"
+    )
+
+
+_instrumentation = Instrumentation()
+
+
+def get_instrumentation() -> Instrumentation:
+    return _instrumentation
@@ -14,6 +14,7 @@ def get_stream_handler():
 
 def get_logger():
     logger = logging.getLogger(__name__)
-    logger.addHandler(get_stream_handler())
+    if not logger.handlers:
+        logger.addHandler(get_stream_handler())
     logger.setLevel(logging.DEBUG)
     return logger
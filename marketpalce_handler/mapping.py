@@ -1,39 +1,144 @@
+import asyncio
 from typing import List
 
 from requests import Session
 
+from marketpalce_handler.cache import MappingCache
+from marketpalce_handler.codec import decode, loads
 from marketpalce_handler.config import settings
-from marketpalce_handler.schemas import MsItem
+from marketpalce_handler.instrumentation import Instrumentation, get_instrumentation
+from marketpalce_handler.schemas import MappedItem, MsItem
+from marketpalce_handler.tracing import span
 from marketpalce_handler.validators import validate_ids_and_values
 
 
 class Mapping:
 
-    def __init__(self, mapping_url: str, session: Session):
+    def __init__(
+        self,
+        mapping_url: str,
+        session: Session,
+        cache: MappingCache = None,
+        instrumentation: Instrumentation = None,
+    ):
         self.session = session
         self.mapping_url = mapping_url
+        self.cache = cache
+        self.instrumentation = instrumentation or get_instrumentation()
 
     @validate_ids_and_values
     def get_mapped_data(self, ms_ids: List[str], values: List[int]) -> List[MsItem]:
+        return [item.to_ms_item() for item in self.get_records(ms_ids, values)]
+
+    def get_records(self, ms_ids: List[str], values: List[int]) -> List[MappedItem]:
+        with span("mapping", items=len(ms_ids)):
+            cached, missing = self._get_cached(ms_ids)
+            fetched = self._fetch(missing) if missing else []
+            return self._build_items(ms_ids, values, cached, fetched)
+
+    def _fetch(self, ms_ids: List[str]) -> List[dict]:
         if len(ms_ids) == 1:
-            ms_items = self.session.get(
-                f"{self.mapping_url}", params={"ms_id": ms_ids[0]}
-            )
-            return [MsItem(**ms_items.json()[0], value=values[0])]
+            return self._get(ms_ids)[:1]
 
         mapped_data = []
         for i in range(0, len(ms_ids), settings.MAPPING_LIMIT):
             ms_ids_chunk = ms_ids[i : i + settings.MAPPING_LIMIT]
-            values_chunk = values[i : i + settings.MAPPING_LIMIT]
-            ms_items = self.session.get(
-                f"{self.mapping_url}", params={"ms_id": ",".join(ms_ids_chunk)}
-            )
+            mapped_data.extend(self._get(ms_ids_chunk))
+
+        return mapped_data
 
-            id_value_map = dict(zip(ms_ids_chunk, values_chunk))
+    def _get(self, ms_ids: List[str]) -> List[dict]:
+        with span("http", endpoint="mapping", method="GET"):
+            with self.instrumentation.request(
+                "mapping", "GET", self.mapping_url, len(ms_ids)
+            ) as call, span("http.wait"):
+                ms_items = self.session.get(
+                    f"{self.mapping_url}", params={"ms_id": ",".join(ms_ids)}
+                )
+                call.set_response(ms_items.status_code, None, len(ms_items.content))
+            with span("parse"):
+                return decode(ms_items)
 
-            for item in ms_items.json():
-                value = id_value_map.get(item["ms_id"])
-                item["value"] = value
-                mapped_data.append(MsItem(**item))
+    def _get_cached(self, ms_ids: List[str]):
+        if self.cache is None:
+            return [], ms_ids
+        found, missing = self.cache.get_many(ms_ids)
+        return list(found.values()), missing
 
-        return mapped_data
+    def _build_items(
+        self,
+        ms_ids: List[str],
+        values: List[int],
+        cached: List[dict],
+        fetched: List[dict],
+    ) -> List[MappedItem]:
+        if self.cache is not None and fetched:
+            self.cache.set_many({item["ms_id"]: item for item in fetched})
+
+        with span("build_models"):
+            if len(ms_ids) == 1:
+                return [
+                    MappedItem.from_mapping(item, values[0])
+                    for item in cached + fetched
+                ]
+
+            id_value_map = dict(zip(ms_ids, values))
+            return [
+                MappedItem.from_mapping(item, id_value_map.get(item["ms_id"]))
+                for item in cached + fetched
+            ]
+
+
+class AsyncMapping(Mapping):
+
+    def __init__(
+        self,
+        mapping_url: str,
+        session,
+        concurrency_limit: int = settings.CONCURRENCY_LIMIT,
+        cache: MappingCache = None,
+        instrumentation: Instrumentation = None,
+    ):
+        super().__init__(mapping_url, session, cache, instrumentation)
+        self._semaphore = asyncio.Semaphore(concurrency_limit)
+
+    async def _fetch_chunk(self, ms_ids: List[str]) -> List[dict]:
+        async with self._semaphore:
+            with span("http", endpoint="mapping", method="GET"):
+                with self.instrumentation.request(
+                    "mapping", "GET", self.mapping_url, len(ms_ids)
+                ) as call, span("http.wait"):
+                    async with self.session.get(
+                        f"{self.mapping_url}", params={"ms_id": ",".join(ms_ids)}
+                    ) as ms_items:
+                        body = await ms_items.read()
+                        call.set_response(ms_items.status, None, len(body))
+                        ms_items.raise_for_status()
+                with span("parse"):
+                    return loads(body)
+
+    async def _fetch(self, ms_ids: List[str]) -> List[dict]:
+        if len(ms_ids) == 1:
+            return (await self._fetch_chunk(ms_ids))[:1]
+
+        responses = await asyncio.gather(
+            *(
+                self._fetch_chunk(ms_ids[i : i + settings.MAPPING_LIMIT])
+                for i in range(0, len(ms_ids), settings.MAPPING_LIMIT)
+            )
+        )
+        return [item for ms_items in responses for item in ms_items]
+
+    @validate_ids_and_values
+    async def get_mapped_data(
+        self, ms_ids: List[str], values: List[int]
+    ) -> List[MsItem]:
+        return [item.to_ms_item() for item in await self.get_records(ms_ids, values)]
+
+    async def get_records(
+        self, ms_ids: List[str], values: List[int]
+    ) -> List[MappedItem]:
+        with span("mapping", items=len(ms_ids)):
+            cached, missing = self._get_cached(ms_ids)
+            fetched = await self._fetch(missing) if missing else []
+            return self._build_items(ms_ids, values, cached, fetched)
@@ -1,14 +1,24 @@
-from typing import List
+from functools import partial
+from typing import Iterable, Iterator, List, Tuple
 
 import requests
 from requests import Session
-from requests.adapters import HTTPAdapter, Retry
+from requests.adapters import HTTPAdapter
 
+from .batch import BatchExecutor, ChunkResult
+from .cache import MappingCache
+from .client import Client, adapter_retry
+from .codec import decode
 from .collector import Collector
+from .exceptions import MappingNotFoundException
+from .instrumentation import Instrumentation
 from .marketplace import Marketplace
+from .rate_limit import RateLimiter
 from .logger import get_logger
 from .config import settings
-from .utils import get_chunks
+from .state import SyncStateStore, select_changed
+from .tracing import span, traced
+from .utils import attach_ms_ids, iter_windows
 from .validators import (
     validate_id_and_value,
     validate_ids_and_values,
@@ -17,7 +27,7 @@ from .validators import (
 )
 
 
-class Ozon(Marketplace):
+class Ozon(Client, Marketplace):
     def __init__(
         self,
         client_id: str,
@@ -25,15 +35,27 @@ class Ozon(Marketplace):
         collector_api_key: str,
         collector_url: str,
         session: Session = requests.Session(),
+        mapping_cache: MappingCache = None,
+        concurrency_limit: int = settings.CONCURRENCY_LIMIT,
+        rate_limiter: RateLimiter = None,
+        state_store: SyncStateStore = None,
+        instrumentation: Instrumentation = None,
     ):
-        self._collector_service = Collector(collector_api_key, collector_url)
         self._logger = get_logger()
-        self._session = session
-        retries = Retry(
-            total=3,
-            backoff_factor=0.5,
+        super().__init__(session, rate_limiter, instrumentation)
+        self._collector_service = Collector(
+            collector_api_key,
+            collector_url,
+            cache=mapping_cache,
+            instrumentation=self.instrumentation,
+        )
+        self._executor = BatchExecutor(concurrency_limit)
+        self._client_id = client_id
+        self._state_store = state_store
+        self._session.mount(
+            "https://",
+            HTTPAdapter(max_retries=adapter_retry(), pool_maxsize=concurrency_limit),
         )
-        self._session.mount("https://", HTTPAdapter(max_retries=retries))
         self._session.headers.update(
             {
                 "Client-Id": client_id,
@@ -42,61 +64,149 @@ class Ozon(Marketplace):
         )
         self._logger.info("Ozon marketplace is initialised")
 
+    def _get_offer_id(self, ms_id: str) -> str:
+        mapped_data = self._collector_service.get_mapped_data([ms_id])
+        if not mapped_data:
+            raise MappingNotFoundException(f"{ms_id} is not found in collector")
+        return mapped_data[0].offer_id
+
+    def _state_scope(self, kind: str) -> str:
+        return f"ozon:{self._client_id}:{kind}"
+
+    def _commit_confirmed(self, kind: str, rows: List[dict], state: list, result):
+        if self._state_store is None:
+            return
+        confirmed = {
+            (row.get("offer_id"), row.get("warehouse_id"))
+            for row in result.get("result", [])
+            if row.get("updated")
+        }
+        self._state_store.commit(
+            self._state_scope(kind),
+            (
+                item
+                for row, item in zip(rows, state)
+                if (row["offer_id"], row.get("warehouse_id")) in confirmed
+            ),
+        )
+
+    def _import(
+        self, url: str, key: str, rows: List[dict], state: list = None, kind=None
+    ) -> dict:
+        resp = self._request("ozon_import", "POST", url, json={key: rows})
+        resp.raise_for_status()
+        with span("parse"):
+            result = decode(resp)
+        if state is not None:
+            self._commit_confirmed(kind, rows, state, result)
+        return result
+
+    def _import_chunks(
+        self,
+        url: str,
+        key: str,
+        rows: List[dict],
+        limit: int,
+        state: list = None,
+        kind: str = None,
+    ) -> dict:
+        sequences = (rows,) if state is None else (rows, state)
+        result = self._executor.map(
+            partial(self._import, url, key, kind=kind), *sequences, limit=limit
+        ).raise_for_errors()
+        return {"result": [row for chunk in result.results for row in chunk["result"]]}
+
+    @traced("ozon.get_prices")
     def get_prices(self, ms_ids: list[str]) -> dict:
         mapped_data = self._collector_service.get_mapped_data(ms_ids)
         ozon_ids = [item.offer_id for item in mapped_data]
-        resp = self._session.post(
+        resp = self._request(
+            "ozon_info",
+            "POST",
             f"{settings.ozon_api_url}v4/product/info/prices",
             json={
                 "filter": {"offer_id": ozon_ids, "visibility": "ALL"},
                 "limit": "1000",
             },
         )
-        return resp.json()
+        return decode(resp)
 
     @validate_id_and_value
     def refresh_price(self, ms_id: str, value: int):
-        mapped_data = self._collector_service.get_mapped_data([ms_id])
-        offer_id = mapped_data[0].offer_id
-        resp = self._session.post(
+        offer_id = self._get_offer_id(ms_id)
+        resp = self._request(
+            "ozon_import",
+            "POST",
             f"{settings.ozon_api_url}v1/product/import/prices",
             json={"prices": [{"offer_id": offer_id, "price": str(value)}]},
         )
-        return resp.json()
+        resp.raise_for_status()
+        result = decode(resp)
+        self._commit_confirmed(
+            "prices", [{"offer_id": offer_id}], [(ms_id, value)], result
+        )
+        return result
 
+    @traced("ozon.refresh_prices")
     @validate_ids_and_values
     def refresh_prices(self, ms_ids: List[str], values: List[int]):
+        ms_ids, values = select_changed(
+            self._state_store, self._state_scope("prices"), ms_ids, values
+        )
+        if not ms_ids:
+            return {"result": []}
         mapped_data = self._collector_service.get_mapped_data(ms_ids)
         ids_map = {item.ms_id: item.offer_id for item in mapped_data}
-        if len(ms_ids) > settings.OZONE_PRICE_LIMIT:
-            chunks_ids, chunks_values = get_chunks(
-                ms_ids, values, settings.OZONE_PRICE_LIMIT
-            )
-            for chunk_ids, chunk_values in zip(chunks_ids, chunks_values):
-                self.refresh_prices(chunk_ids, chunk_values)
 
         prices = []
-        for ms_id, value in zip(ms_ids, values):
-            prices.append({"offer_id": ids_map[ms_id], "price": str(value)})
-        return self._session.post(
-            f"{settings.ozon_api_url}v1/product/import/prices", json={"prices": prices}
-        ).json()
+        state = []
+        with span("build_payload"):
+            for ms_id, value in zip(ms_ids, values):
+                if ms_id in ids_map:
+                    prices.append({"offer_id": ids_map[ms_id], "price": str(value)})
+                    state.append((ms_id, value))
+        return attach_ms_ids(
+            self._import_chunks(
+                f"{settings.ozon_api_url}v1/product/import/prices",
+                "prices",
+                prices,
+                settings.OZONE_PRICE_LIMIT,
+                state,
+                "prices",
+            ),
+            ids_map,
+            ms_ids,
+        )
+
+    def refresh_prices_stream(
+        self,
+        pairs: Iterable[Tuple[str, int]],
+        window: int = settings.OZONE_PRICE_LIMIT,
+    ) -> Iterator[ChunkResult]:
+        return self._executor.stream(self.refresh_prices, iter_windows(pairs, window))
 
     @validate_id_and_value
     def refresh_stock(self, ms_id: str, value: int):
-        mapped_data = self._collector_service.get_mapped_data([ms_id])
-        offer_id = mapped_data[0].offer_id
-        resp = self._session.post(
+        offer_id = self._get_offer_id(ms_id)
+        resp = self._request(
+            "ozon_import",
+            "POST",
             f"{settings.ozon_api_url}v1/product/import/stocks",
             json={"stocks": [{"offer_id": offer_id, "stock": value}]},
         )
-        return resp.json()
+        resp.raise_for_status()
+        result = decode(resp)
+        self._commit_confirmed(
+            "stocks", [{"offer_id": offer_id}], [(ms_id, value)], result
+        )
+        return result
 
     @validate_warehouse_id
     def refresh_stock_by_warehouse(self, ms_id: str, value: int, warehouse_id: int):
-        mapped_data = self._collector_service.get_mapped_data([ms_id])
-        offer_id = mapped_data[0].offer_id
-        resp = self._session.post(
+        offer_id = self._get_offer_id(ms_id)
+        resp = self._request(
+            "ozon_import",
+            "POST",
             f"{settings.ozon_api_url}v2/products/stocks",
             json={
                 "stocks": [
@@ -104,40 +214,101 @@ class Ozon(Marketplace):
                 ]
             },
         )
-        return resp.json()
+        resp.raise_for_status()
+        result = decode(resp)
+        self._commit_confirmed(
+            "warehouse_stocks",
+            [{"offer_id": offer_id, "warehouse_id": warehouse_id}],
+            [(f"{warehouse_id}:{ms_id}", value)],
+            result,
+        )
+        return result
 
+    @traced("ozon.refresh_stocks")
     @validate_ids_and_values
     def refresh_stocks(self, ms_ids: List[str], values: List[int]):
+        ms_ids, values = select_changed(
+            self._state_store, self._state_scope("stocks"), ms_ids, values
+        )
+        if not ms_ids:
+            return {"result": []}
         mapped_data = self._collector_service.get_mapped_data(ms_ids)
         ids_map = {item.ms_id: item.offer_id for item in mapped_data}
-        if len(ms_ids) > settings.OZON_STOCK_LIMIT:
-            chunks_ids, chunks_values = get_chunks(
-                ms_ids, values, settings.OZON_STOCK_LIMIT
-            )
-            for chunk_ids, chunk_values in zip(chunks_ids, chunks_values):
-                self.refresh_stocks(chunk_ids, chunk_values)
 
         stocks = []
-        for ms_id, value in zip(ms_ids, values):
-            stocks.append({"offer_id": ids_map[ms_id], "stock": value})
-        return self._session.post(
-            f"{settings.ozon_api_url}v1/product/import/stocks", json={"stocks": stocks}
-        ).json()
+        state = []
+        with span("build_payload"):
+            for ms_id, value in zip(ms_ids, values):
+                if ms_id in ids_map:
+                    stocks.append({"offer_id": ids_map[ms_id], "stock": value})
+                    state.append((ms_id, value))
+        return attach_ms_ids(
+            self._import_chunks(
+                f"{settings.ozon_api_url}v1/product/import/stocks",
+                "stocks",
+                stocks,
+                settings.OZON_STOCK_LIMIT,
+                state,
+                "stocks",
+            ),
+            ids_map,
+            ms_ids,
+        )
+
+    def refresh_stocks_stream(
+        self,
+        pairs: Iterable[Tuple[str, int]],
+        window: int = settings.OZON_STOCK_LIMIT,
+    ) -> Iterator[ChunkResult]:
+        return self._executor.stream(self.refresh_stocks, iter_windows(pairs, window))
 
+    @traced("ozon.refresh_stocks_by_warehouse")
     @validate_warehouse_ids
     def refresh_stocks_by_warehouse(
         self, ms_ids: List[str], values: List[int], warehouse_ids: List[int]
     ):
+        keys = [
+            f"{warehouse}:{ms_id}" for ms_id, warehouse in zip(ms_ids, warehouse_ids)
+        ]
+        keys, values, ms_ids, warehouse_ids = select_changed(
+            self._state_store,
+            self._state_scope("warehouse_stocks"),
+            keys,
+            values,
+            ms_ids,
+            warehouse_ids,
+        )
+        if not ms_ids:
+            return {"result": []}
         mapped_data = self._collector_service.get_mapped_data(ms_ids)
         ids_map = {item.ms_id: item.offer_id for item in mapped_data}
         stocks = []
-        for ms_id, value, warehouse in zip(ms_ids, values, warehouse_ids):
-            stocks.append(
-                {"offer_id": ids_map[ms_id], "stock": value, "warehouse_id": warehouse}
-            )
-        return self._session.post(
-            f"{settings.ozon_api_url}v2/products/stocks", json={"stocks": stocks}
-        ).json()
+        state = []
+        with span("build_payload"):
+            for key, ms_id, value, warehouse in zip(
+                keys, ms_ids, values, warehouse_ids
+            ):
+                if ms_id in ids_map:
+                    stocks.append(
+                        {
+                            "offer_id": ids_map[ms_id],
+                            "stock": value,
+                            "warehouse_id": warehouse,
+                        }
+                    )
+                    state.append((key, value))
+        return attach_ms_ids(
+            self._import_chunks(
+                f"{settings.ozon_api_url}v2/products/stocks",
+                "stocks",
+                stocks,
+                settings.OZON_STOCK_LIMIT,
+                state,
+                "warehouse_stocks",
+            ),
+            ids_map,
+            ms_ids,
+        )
 
     def refresh_status(self, wb_order_id, status):
         raise NotImplementedError
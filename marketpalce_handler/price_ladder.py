@@ -0,0 +1,32 @@
+from typing import List
+
+from .config import settings
+from .schemas import MappedItem
+from .utils import chunked
+
+
+def price_steps(current_value: int, value: int) -> List[int]:
+    steps = []
+    while 0 < current_value and current_value * 2 < value:
+        current_value *= 2
+        steps.append(current_value)
+    steps.append(value)
+    return steps
+
+
+def plan_price_ladder(
+    items: List[MappedItem],
+    update_value: str,
+    limit: int = settings.WB_ITEMS_REFRESH_LIMIT,
+) -> List[List[List[dict]]]:
+    rounds: List[List[dict]] = []
+    for item in items:
+        if update_value == "price":
+            steps = price_steps(item.current_value, item.value)
+        else:
+            steps = [item.value]
+        for step, step_value in enumerate(steps):
+            if step == len(rounds):
+                rounds.append([])
+            rounds[step].append({"nmId": item.nm_id, update_value: step_value})
+    return [chunked(rows, limit) for rows in rounds]
@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable
+
+from .config import settings
+from .logger import get_logger
+
+
+class PriceSnapshot:
+    def __init__(
+        self,
+        loader: Callable[[], Dict],
+        ttl: float = settings.WB_PRICE_SNAPSHOT_TTL,
+    ):
+        self.ttl = ttl
+        self._loader = loader
+        self._prices: Dict[int, dict] = {}
+        self._loaded_at = None
+        self._reload_on_miss = True
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._refresh_thread = None
+        self._logger = get_logger()
+
+    def __len__(self):
+        return len(self._prices)
+
+    @property
+    def is_fresh(self) -> bool:
+        return (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    def refresh(self):
+        prices = self._loader()
+        with self._lock:
+            self._prices = prices
+            self._loaded_at = time.monotonic()
+            self._reload_on_miss = True
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def prices(self) -> Dict[int, dict]:
+        with self._lock:
+            if not self.is_fresh:
+                self.refresh()
+            return self._prices
+
+    def get_many(self, nm_ids: Iterable[int]) -> Dict[int, dict]:
+        nm_ids = list(nm_ids)
+        with self._lock:
+            if not self.is_fresh:
+                self.refresh()
+            elif self._reload_on_miss and any(
+                nm_id not in self._prices for nm_id in nm_ids
+            ):
+                self.refresh()
+                self._reload_on_miss = False
+            return {
+                nm_id: dict(self._prices[nm_id])
+                for nm_id in nm_ids
+                if nm_id in self._prices
+            }
+
+    def get(self, nm_id: int) -> dict:
+        return self.get_many([nm_id]).get(nm_id)
+
+    def update(self, nm_id: int, field: str, value: int):
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self._prices.setdefault(nm_id, {})[field] = value
+
+    def start_background_refresh(self, interval: float = None):
+        if self._refresh_thread is not None:
+            return
+        self._stop.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop, args=(interval or self.ttl,), daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self):
+        self._stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join()
+            self._refresh_thread = None
+
+    def _refresh_loop(self, interval: float):
+        wait = 0 if self._loaded_at is None else interval
+        while not self._stop.wait(wait):
+            wait = interval
+            try:
+                self.refresh()
+            except Exception as e:
+                self._logger.error(f"Wildberries: price snapshot is not refreshed. {e}")
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Tuple
+
+from .config import settings
+
+
+def parse_retry_after(headers: Mapping) -> float:
+    value = headers.get("Retry-After") or headers.get("X-Ratelimit-Retry")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float, min_rate: float = None):
+        self.max_rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.rate = rate
+        self.capacity = capacity
+        self.throttled = 0
+        self.queued = 0
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def _refill(self, now: float):
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(delay, self._blocked_until - now)
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            self._enqueue(1)
+            try:
+                time.sleep(delay)
+            finally:
+                self._enqueue(-1)
+
+    async def acquire_async(self):
+        delay = self.reserve()
+        if delay > 0:
+            self._enqueue(1)
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self._enqueue(-1)
+
+    def _enqueue(self, count: int):
+        with self._lock:
+            self.queued += count
+
+    def on_response(self, status: int, retry_after: float = None):
+        with self._lock:
+            if status == 429:
+                self.throttled += 1
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._tokens = min(self._tokens, 0)
+                if retry_after is not None:
+                    self._blocked_until = max(
+                        self._blocked_until, time.monotonic() + retry_after
+                    )
+            elif status < 400:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def metrics(self) -> Dict[str, float]:
+        return {
+            "rate": self.rate,
+            "tokens": self.tokens,
+            "queued": self.queued,
+            "throttled": self.throttled,
+        }
+
+
+class RateLimiter:
+    def __init__(self, limits: Dict[str, Tuple[float, float]] = None):
+        self.limits = dict(settings.RATE_LIMITS if limits is None else limits)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(endpoint)
+                if bucket is None:
+                    rate, capacity = self.limits.get(
+                        endpoint, self.limits.get("default", (10, 10))
+                    )
+                    bucket = self._buckets[endpoint] = TokenBucket(rate, capacity)
+        return bucket
+
+    def acquire(self, endpoint: str):
+        self.bucket(endpoint).acquire()
+
+    async def acquire_async(self, endpoint: str):
+        await self.bucket(endpoint).acquire_async()
+
+    def on_response(self, endpoint: str, status: int, headers: Mapping = None):
+        retry_after = parse_retry_after(headers or {}) if status == 429 else None
+        self.bucket(endpoint).on_response(status, retry_after)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        return {
+            endpoint: bucket.metrics() for endpoint, bucket in self._buckets.items()
+        }
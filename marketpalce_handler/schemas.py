@@ -2,6 +2,8 @@ from typing import List
 
 from pydantic import BaseModel, constr
 
+ORDER_STATUSES = ("confirm", "cancel")
+
 
 class MsItem(BaseModel):
     ms_id: str
@@ -15,6 +17,69 @@ class WbUpdateItem(MsItem):
     current_value: int
 
 
+class MappedItem:
+    __slots__ = ("ms_id", "barcodes", "nm_id", "name", "value", "current_value")
+
+    def __init__(
+        self,
+        ms_id: str,
+        barcodes: str,
+        nm_id: int,
+        name: str,
+        value: int,
+        current_value: int = None,
+    ):
+        self.ms_id = ms_id
+        self.barcodes = barcodes
+        self.nm_id = nm_id
+        self.name = name
+        self.value = value
+        self.current_value = current_value
+
+    @classmethod
+    def from_mapping(cls, item: dict, value: int) -> "MappedItem":
+        ms_id = item.get("ms_id")
+        barcodes = item.get("barcodes")
+        nm_id = item.get("nm_id")
+        name = item.get("name")
+        if (
+            type(ms_id) is str
+            and type(barcodes) is str
+            and type(nm_id) is int
+            and type(name) is str
+            and type(value) is int
+        ):
+            return cls(ms_id, barcodes, nm_id, name, value)
+        validated = MsItem(**item, value=value)
+        return cls(
+            validated.ms_id,
+            validated.barcodes,
+            validated.nm_id,
+            validated.name,
+            validated.value,
+        )
+
+    def to_ms_item(self) -> MsItem:
+        return MsItem(
+            ms_id=self.ms_id,
+            barcodes=self.barcodes,
+            nm_id=self.nm_id,
+            name=self.name,
+            value=self.value,
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, MappedItem):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"MappedItem({fields})"
+
+
 class IdsValuesSchema(BaseModel):
     ms_ids: List[constr(strip_whitespace=True, min_length=1)]
     values: List[int]
@@ -0,0 +1,82 @@
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from .config import settings
+from .utils import chunked
+
+
+class SyncStateStore:
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                "scope TEXT NOT NULL, key TEXT NOT NULL, value, "
+                "PRIMARY KEY (scope, key)) WITHOUT ROWID"
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM sync_state"
+            ).fetchone()[0]
+
+    def get_many(self, scope: str, keys: Sequence[str]) -> Dict[str, Any]:
+        found = {}
+        with self._lock:
+            for keys_chunk in chunked(
+                list(dict.fromkeys(keys)), settings.STATE_QUERY_LIMIT
+            ):
+                found.update(
+                    self._connection.execute(
+                        "SELECT key, value FROM sync_state WHERE scope = ? "
+                        f"AND key IN ({','.join('?' * len(keys_chunk))})",
+                        (scope, *keys_chunk),
+                    ).fetchall()
+                )
+        return found
+
+    def changed(self, scope: str, keys: Sequence[str], values: Sequence) -> List[int]:
+        acknowledged = self.get_many(scope, keys)
+        return [
+            index
+            for index, (key, value) in enumerate(zip(keys, values))
+            if key not in acknowledged or acknowledged[key] != value
+        ]
+
+    def commit(self, scope: str, items: Iterable[Tuple[str, Any]]):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO sync_state (scope, key, value) VALUES (?, ?, ?)",
+                ((scope, key, value) for key, value in items),
+            )
+
+    def invalidate(self, scope: str = None, keys: Sequence[str] = None):
+        with self._lock, self._connection:
+            if scope is None:
+                self._connection.execute("DELETE FROM sync_state")
+            elif keys is None:
+                self._connection.execute(
+                    "DELETE FROM sync_state WHERE scope = ?", (scope,)
+                )
+            else:
+                self._connection.executemany(
+                    "DELETE FROM sync_state WHERE scope = ? AND key = ?",
+                    ((scope, key) for key in keys),
+                )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def select_changed(
+    store: SyncStateStore, scope: str, keys: Sequence[str], *columns: Sequence
+) -> Tuple[list, ...]:
+    if store is None:
+        return (keys, *columns)
+    changed = store.changed(scope, keys, columns[0])
+    return tuple([sequence[i] for i in changed] for sequence in (keys, *columns))
@@ -0,0 +1,259 @@
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Tuple
+
+import requests
+from requests import HTTPError
+from requests.adapters import HTTPAdapter
+
+from .client import adapter_retry
+from .codec import decode, loads
+from .config import settings
+from .exceptions import InitialisationException
+from .instrumentation import Instrumentation, get_instrumentation
+from .logger import get_logger
+from .validators import require
+
+
+@dataclass
+class WbToken:
+    token_id: int
+    warehouse_id: int
+    common_token: str
+    fetched_at: float
+
+
+class TokenProvider:
+    def __init__(
+        self,
+        token_service_url: str,
+        token_service_token: str,
+        ttl: float = settings.WB_TOKEN_TTL,
+        cache_path: str = settings.WB_TOKEN_CACHE_PATH,
+        session: requests.Session = None,
+        instrumentation: Instrumentation = None,
+    ):
+        self.token_service_url = token_service_url
+        self.ttl = ttl
+        self.cache_path = cache_path
+        self.lookups = 0
+        self._token_service_token = token_service_token
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(max_retries=adapter_retry()))
+        self._session = session
+        self.instrumentation = instrumentation or get_instrumentation()
+        self._tokens: Dict[str, WbToken] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresh_thread = None
+        self._logger = get_logger()
+        self._load_cache()
+
+    def get(self, token_id, force: bool = False) -> WbToken:
+        with self._lock:
+            token = None if force else self._fresh(token_id)
+            if token is None:
+                self._store(self._fetch())
+                token = self._find(token_id)
+            return token
+
+    async def get_async(self, token_id, session, force: bool = False) -> WbToken:
+        token = None if force else self._fresh(token_id)
+        if token is None:
+            tokens = await self._fetch_async(session)
+            with self._lock:
+                self._store(tokens)
+                token = self._find(token_id)
+        return token
+
+    def invalidate(self, token_id=None):
+        with self._lock:
+            if token_id is None:
+                self._tokens.clear()
+            else:
+                self._tokens.pop(str(token_id), None)
+
+    def refresh(self):
+        with self._lock:
+            self._store(self._fetch())
+
+    def _fresh(self, token_id) -> WbToken:
+        token = self._tokens.get(str(token_id))
+        if token is not None and time.time() - token.fetched_at < self.ttl:
+            return token
+        return None
+
+    def _find(self, token_id) -> WbToken:
+        token = self._tokens.get(str(token_id))
+        if token is None:
+            self._logger.error("Warehouse id is not found")
+            raise InitialisationException("Warehouse id is not found")
+        return token
+
+    def _fetch(self) -> List[dict]:
+        self.lookups += 1
+        try:
+            with self.instrumentation.request(
+                "wb_tokens", "GET", self.token_service_url
+            ) as call:
+                tokens = self._session.get(
+                    self.token_service_url,
+                    headers=self._auth_headers(),
+                    timeout=settings.REQUEST_TIMEOUT,
+                )
+                call.set_response(tokens.status_code, None, len(tokens.content))
+            tokens.raise_for_status()
+            return decode(tokens)
+        except HTTPError:
+            self._logger.error("Can't connect to token service")
+            raise InitialisationException(
+                f"Can't connect to token service {tokens.status_code}"
+            )
+
+    async def _fetch_async(self, session) -> List[dict]:
+        self.lookups += 1
+        with self.instrumentation.request(
+            "wb_tokens", "GET", self.token_service_url
+        ) as call:
+            async with session.get(
+                self.token_service_url, headers=self._auth_headers()
+            ) as tokens:
+                call.set_response(tokens.status)
+                if tokens.status >= 400:
+                    self._logger.error("Can't connect to token service")
+                    raise InitialisationException(
+                        f"Can't connect to token service {tokens.status}"
+                    )
+                return loads(await tokens.read())
+
+    def _auth_headers(self) -> dict:
+        return {"Authorization": f"Token {self._token_service_token}"}
+
+    def _store(self, tokens: List[dict]):
+        fetched_at = time.time()
+        self._tokens = {
+            str(token["id"]): WbToken(
+                token_id=token["id"],
+                warehouse_id=token["warehouse_id"],
+                common_token=token["common_token"],
+                fetched_at=fetched_at,
+            )
+            for token in tokens
+            if token.get("warehouse_id")
+        }
+        self._save_cache()
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path) as cache:
+                cached = json.load(cache)
+            self._tokens = {
+                token_id: WbToken(**token)
+                for token_id, token in cached.get(self.token_service_url, {}).items()
+            }
+        except (OSError, ValueError, TypeError) as e:
+            self._logger.error(f"Wildberries: token cache is not loaded. {e}")
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        cached = {}
+        if os.path.exists(self.cache_path):
+            try:
+                with open(self.cache_path) as cache:
+                    cached = json.load(cache)
+            except (OSError, ValueError):
+                cached = {}
+        cached[self.token_service_url] = {
+            token_id: asdict(token) for token_id, token in self._tokens.items()
+        }
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as cache:
+                json.dump(cached, cache)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            self._logger.warning(f"Wildberries: token cache is not saved. {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def start_background_refresh(self, interval: float = None):
+        if self._refresh_thread is not None:
+            return
+        self._stop.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop,
+            args=(interval or self.ttl * settings.WB_TOKEN_REFRESH_RATIO,),
+            daemon=True,
+        )
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self):
+        self._stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join()
+            self._refresh_thread = None
+
+    def _refresh_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self._logger.error(f"Wildberries: tokens are not refreshed. {e}")
+
+
+_PROVIDER_ATTRIBUTES = {
+    "ttl": "ttl",
+    "cache_path": "cache_path",
+    "session": "_session",
+    "instrumentation": "instrumentation",
+}
+
+
+def _conflicting_kwargs(provider: TokenProvider, kwargs: dict) -> List[str]:
+    conflicts = []
+    for name, value in kwargs.items():
+        current = getattr(provider, _PROVIDER_ATTRIBUTES[name])
+        if value is not current and value != current:
+            conflicts.append(name)
+    return conflicts
+
+
+_providers: Dict[Tuple[str, str], TokenProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_token_provider(
+    token_service_url: str, token_service_token: str, **kwargs
+) -> TokenProvider:
+    key = (token_service_url, token_service_token)
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = _providers[key] = TokenProvider(
+                token_service_url, token_service_token, **kwargs
+            )
+            return provider
+        conflicts = _conflicting_kwargs(provider, kwargs)
+        require(
+            not conflicts,
+            f"Token provider for {token_service_url} is already configured "
+            f"with different {', '.join(conflicts)}",
+        )
+        return provider
+
+
+def clear_token_providers():
+    with _providers_lock:
+        for provider in _providers.values():
+            provider.stop_background_refresh()
+        _providers.clear()
@@ -0,0 +1,224 @@
+import asyncio
+import contextvars
+import inspect
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "marketplace_span", default=None
+)
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "attributes",
+        "parent",
+        "children",
+        "events",
+        "error",
+        "start_time",
+        "end_time",
+        "_tracer",
+        "_token",
+    )
+
+    def __init__(self, tracer: "RecordingTracer", name: str, attributes: dict = None):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.parent = _current_span.get()
+        self.children: List[Span] = []
+        self.events: List[tuple] = []
+        self.error = None
+        self.start_time = time.perf_counter()
+        self.end_time = None
+        self._tracer = tracer
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.record_exception(exc)
+        _current_span.reset(self._token)
+        self.end()
+        return False
+
+    @property
+    def duration(self) -> float:
+        return (self.end_time or time.perf_counter()) - self.start_time
+
+    def is_recording(self) -> bool:
+        return self.end_time is None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: dict):
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, attributes: dict = None):
+        self.events.append((name, time.perf_counter(), attributes or {}))
+
+    def record_exception(self, exception: BaseException):
+        self.error = exception
+
+    def end(self):
+        if self.end_time is not None:
+            return
+        self.end_time = time.perf_counter()
+        self._tracer._finish(self)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def is_recording(self) -> bool:
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def add_event(self, name, attributes=None):
+        pass
+
+    def record_exception(self, exception):
+        pass
+
+    def end(self):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class NoopTracer:
+    def start_as_current_span(self, name: str, attributes: dict = None):
+        return _NOOP_SPAN
+
+    def start_span(self, name: str, attributes: dict = None):
+        return _NOOP_SPAN
+
+
+class RecordingTracer:
+    def __init__(self):
+        self.roots: List[Span] = []
+        self._lock = threading.Lock()
+
+    def start_as_current_span(self, name: str, attributes: dict = None) -> Span:
+        return Span(self, name, attributes)
+
+    def start_span(self, name: str, attributes: dict = None) -> Span:
+        return Span(self, name, attributes)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            if span.parent is None:
+                self.roots.append(span)
+            else:
+                span.parent.children.append(span)
+
+    def clear(self):
+        with self._lock:
+            self.roots = []
+
+    def stages(self) -> Dict[str, float]:
+        totals = defaultdict(float)
+        for stack, self_time in self._walk():
+            totals[stack[-1]] += self_time
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def folded(self) -> str:
+        totals = defaultdict(float)
+        for stack, self_time in self._walk():
+            totals[";".join(stack)] += self_time
+        return "".join(
+            f"{stack} {round(self_time * 1_000_000)}\n"
+            for stack, self_time in totals.items()
+        )
+
+    def dump_folded(self, path: str):
+        with open(path, "w") as f:
+            f.write(self.folded())
+
+    def _walk(self):
+        with self._lock:
+            pending = [((span.name,), span) for span in self.roots]
+        while pending:
+            stack, span = pending.pop()
+            children = list(span.children)
+            self_time = span.duration - sum(child.duration for child in children)
+            yield stack, max(self_time, 0.0)
+            pending.extend(((*stack, child.name), child) for child in children)
+
+
+_tracer = NoopTracer()
+
+
+def get_tracer():
+    return _tracer
+
+
+def set_tracer(tracer):
+    global _tracer
+    _tracer = tracer or NoopTracer()
+
+
+def tracing_enabled() -> bool:
+    return not isinstance(_tracer, NoopTracer)
+
+
+def span(name: str, **attributes):
+    return _tracer.start_as_current_span(name, attributes=attributes or None)
+
+
+def traced(name: str):
+    def decorator(func):
+        if asyncio.iscoroutinefunction(inspect.unwrap(func)):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def in_context(func):
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(func, *args, **kwargs)
+
+
+@contextmanager
+def trace():
+    previous = _tracer
+    tracer = RecordingTracer()
+    set_tracer(tracer)
+    try:
+        yield tracer
+    finally:
+        set_tracer(previous)
@@ -1,3 +1,5 @@
+from itertools import islice
+
 from .config import settings
 
 
@@ -5,3 +7,39 @@ def get_chunks(ids, values, limit=settings.WB_ITEMS_REFRESH_LIMIT):
     chunks_ids = [ids[i : i + limit] for i in range(0, len(ids), limit)]
     chunks_values = [values[i : i + limit] for i in range(0, len(values), limit)]
     return chunks_ids, chunks_values
+
+
+def chunked(items, limit=settings.WB_ITEMS_REFRESH_LIMIT):
+    return [items[i : i + limit] for i in range(0, len(items), limit)]
+
+
+def attach_ms_ids(result: dict, ids_map: dict, ms_ids) -> dict:
+    owners = {offer_id: ms_id for ms_id, offer_id in ids_map.items()}
+    for row in result["result"]:
+        row["ms_id"] = owners.get(row.get("offer_id"))
+    result["not_found"] = [
+        ms_id for ms_id in dict.fromkeys(ms_ids) if ms_id not in ids_map
+    ]
+    return result
+
+
+def iter_windows(pairs, size=settings.WB_ITEMS_REFRESH_LIMIT):
+    iterator = iter(pairs)
+    while window := list(islice(iterator, size)):
+        yield tuple(map(list, zip(*window)))
+
+
+async def aiter_windows(pairs, size=settings.WB_ITEMS_REFRESH_LIMIT):
+    if not hasattr(pairs, "__aiter__"):
+        for window in iter_windows(pairs, size):
+            yield window
+        return
+
+    window = []
+    async for pair in pairs:
+        window.append(pair)
+        if len(window) == size:
+            yield tuple(map(list, zip(*window)))
+            window = []
+    if window:
+        yield tuple(map(list, zip(*window)))
@@ -1,13 +1,75 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import wraps
-from typing import List
+from typing import List, Sequence
+
+from .exceptions import InvalidArgumentsException
 from .schemas import IdsValuesSchema, StatusesSchema, WarehouseIdsSchema
+from .tracing import span
+
+_STR = {str}
+_INT = {int}
+_trusted = ContextVar("trusted_input", default=False)
+
+
+@contextmanager
+def trusted_input():
+    token = _trusted.set(True)
+    try:
+        yield
+    finally:
+        _trusted.reset(token)
+
+
+def input_trusted() -> bool:
+    return _trusted.get()
+
+
+def require(condition: bool, message: str):
+    if not condition:
+        raise InvalidArgumentsException(message)
+
+
+def _require_lengths(**sequences: Sequence):
+    lengths = {name: len(sequence) for name, sequence in sequences.items()}
+    require(
+        len(set(lengths.values())) == 1,
+        f"Lengths differ: {', '.join(f'{k}={v}' for k, v in lengths.items())}",
+    )
+
+
+def _valid_ids(ms_ids: Sequence) -> bool:
+    return set(map(type, ms_ids)) <= _STR and "" not in map(str.strip, ms_ids)
+
+
+def _valid_ints(values: Sequence) -> bool:
+    return set(map(type, values)) <= _INT
+
+
+def check_ids_and_values(ms_ids: List[str], values: List[int]):
+    _require_lengths(ms_ids=ms_ids, values=values)
+    if not (_valid_ids(ms_ids) and _valid_ints(values)):
+        IdsValuesSchema(ms_ids=ms_ids, values=values)
+
+
+def check_statuses(wb_order_ids: List[int], statuses: List[str]):
+    _require_lengths(wb_order_ids=wb_order_ids, statuses=statuses)
+    if not (_valid_ints(wb_order_ids) and _valid_ids(statuses)):
+        StatusesSchema(wb_order_ids=wb_order_ids, statuses=statuses)
+
+
+def check_warehouse_ids(ms_ids: List[str], values: List[int], warehouse_ids: List[int]):
+    _require_lengths(ms_ids=ms_ids, values=values, warehouse_ids=warehouse_ids)
+    if not (_valid_ids(ms_ids) and _valid_ints(values) and _valid_ints(warehouse_ids)):
+        WarehouseIdsSchema(ms_ids=ms_ids, values=values, warehouse_ids=warehouse_ids)
 
 
 def validate_ids_and_values(func):
     @wraps(func)
     def wrapper(self, ms_ids: List[str], values: List[int]):
-        assert len(ms_ids) == len(values)
-        IdsValuesSchema(ms_ids=ms_ids, values=values)
+        if not _trusted.get():
+            with span("validate"):
+                check_ids_and_values(ms_ids, values)
 
         return func(self, ms_ids, values)
 
@@ -17,8 +79,9 @@ def validate_ids_and_values(func):
 def validate_id_and_value(func):
     @wraps(func)
     def wrapper(self, ms_id: str, value: int):
-        assert isinstance(ms_id, str)
-        assert isinstance(value, int)
+        with span("validate"):
+            require(isinstance(ms_id, str), f"ms_id must be str, got {ms_id!r}")
+            require(isinstance(value, int), f"value must be int, got {value!r}")
 
         return func(self, ms_id, value)
 
@@ -28,8 +91,9 @@ def validate_id_and_value(func):
 def validate_statuses(func):
     @wraps(func)
     def wrapper(self, wb_order_ids: List[int], statuses: List[str]):
-        assert len(wb_order_ids) == len(statuses)
-        StatusesSchema(wb_order_ids=wb_order_ids, statuses=statuses)
+        if not _trusted.get():
+            with span("validate"):
+                check_statuses(wb_order_ids, statuses)
 
         return func(self, wb_order_ids, statuses)
 
@@ -39,9 +103,13 @@ def validate_statuses(func):
 def validate_warehouse_id(func):
     @wraps(func)
     def wrapper(self, ms_id: str, value: int, warehouse_id: int):
-        assert isinstance(ms_id, str)
-        assert isinstance(value, int)
-        assert isinstance(warehouse_id, int)
+        with span("validate"):
+            require(isinstance(ms_id, str), f"ms_id must be str, got {ms_id!r}")
+            require(isinstance(value, int), f"value must be int, got {value!r}")
+            require(
+                isinstance(warehouse_id, int),
+                f"warehouse_id must be int, got {warehouse_id!r}",
+            )
         return func(self, ms_id, value, warehouse_id)
 
     return wrapper
@@ -50,8 +118,9 @@ def validate_warehouse_id(func):
 def validate_warehouse_ids(func):
     @wraps(func)
     def wrapper(self, ms_ids: List[str], values: List[int], warehouse_ids: List[int]):
-        assert len(ms_ids) == len(values) == len(warehouse_ids)
-        WarehouseIdsSchema(ms_ids=ms_ids, values=values, warehouse_ids=warehouse_ids)
+        if not _trusted.get():
+            with span("validate"):
+                check_warehouse_ids(ms_ids, values, warehouse_ids)
         return func(self, ms_ids, values, warehouse_ids)
 
     return wrapper
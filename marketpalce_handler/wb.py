@@ -1,80 +1,115 @@
-from typing import List, Dict
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple
 
 from requests import HTTPError
 
 import requests
 from requests.adapters import HTTPAdapter
-from urllib3 import Retry
 
-from .exceptions import InitialisationException, InvalidStatusException
+from .batch import BatchExecutor, BatchResult, ChunkResult
+from .cache import MappingCache
+from .client import Client, adapter_retry, encode_body
+from .exceptions import InvalidStatusException
+from .goods import parse_goods_page, streaming_enabled
+from .instrumentation import Instrumentation
 from .logger import get_logger
+from .codec import decode
 from .config import settings
 from .mapping import Mapping
 from .marketplace import Marketplace
-from .schemas import WbUpdateItem
-from .utils import get_chunks
+from .rate_limit import RateLimiter
+from .price_ladder import plan_price_ladder
+from .price_snapshot import PriceSnapshot
+from .schemas import ORDER_STATUSES, MappedItem
+from .state import SyncStateStore, select_changed
+from .tokens import TokenProvider, WbToken, get_token_provider
+from .tracing import in_context, span, traced, tracing_enabled
+from .utils import chunked, iter_windows
 from .validators import (
+    require,
     validate_ids_and_values,
     validate_id_and_value,
     validate_statuses,
 )
 
 
-class Wildberries(Marketplace):
+class Wildberries(Client, Marketplace):
     def __init__(
-            self,
-            token_id,
-            token_service_token,
-            token_service_url,
-            mapping_url,
-            max_price_requests: int = 5,
-            session: requests.Session = requests.Session(),
+        self,
+        token_id,
+        token_service_token,
+        token_service_url,
+        mapping_url,
+        max_price_requests: int = 5,
+        session: requests.Session = requests.Session(),
+        mapping_cache: MappingCache = None,
+        price_snapshot_ttl: float = settings.WB_PRICE_SNAPSHOT_TTL,
+        concurrency_limit: int = settings.CONCURRENCY_LIMIT,
+        rate_limiter: RateLimiter = None,
+        state_store: SyncStateStore = None,
+        token_provider: TokenProvider = None,
+        instrumentation: Instrumentation = None,
     ):
         self._logger = get_logger()
-        self._session = session
-        self._mapping_service = Mapping(mapping_url, self._session)
+        super().__init__(session, rate_limiter, instrumentation)
+        self._state_store = state_store
+        self._mapping_service = Mapping(
+            mapping_url, self._session, mapping_cache, self.instrumentation
+        )
         self._max_price_requests = max_price_requests
-        retries = Retry(
-            total=3,
-            backoff_factor=0.5,
+        self._concurrency_limit = concurrency_limit
+        self._executor = BatchExecutor(concurrency_limit)
+        self.price_snapshot = PriceSnapshot(self.get_price, price_snapshot_ttl)
+        self._session.mount(
+            "https://",
+            HTTPAdapter(max_retries=adapter_retry(), pool_maxsize=concurrency_limit),
         )
-        self._session.mount("https://", HTTPAdapter(max_retries=retries))
 
-        try:
-            tokens = self._session.get(
-                token_service_url,
-                headers={
-                    "Authorization": f"Token {token_service_token}",
-                },
-                timeout=5,
-            )
-            tokens.raise_for_status()
-            for token in tokens.json():
-                warehouse_id = token.get("warehouse_id")
-                if warehouse_id and token.get("id") == token_id:
-                    self.warehouse_id = warehouse_id
-                    self._session.headers.update(
-                        {
-                            "Authorization": f"{token['common_token']}",
-                        }
-                    )
-                    self._logger.debug("Wildberries is initialized")
-                    break
-        except HTTPError:
-            self._logger.error("Can't connect to token service")
-            raise InitialisationException(
-                f"Can't connect to token service {tokens.status_code}"
-            )
+        self._token_id = token_id
+        self._warehouse_id = None
+        self._token_provider = token_provider or get_token_provider(
+            token_service_url, token_service_token
+        )
+
+    @property
+    def token(self) -> WbToken:
+        return self._token_provider.get(self._token_id)
+
+    @property
+    def warehouse_id(self) -> int:
+        return self._warehouse_id or self.token.warehouse_id
+
+    @warehouse_id.setter
+    def warehouse_id(self, warehouse_id: int):
+        self._warehouse_id = warehouse_id
 
-        if not hasattr(self, "warehouse_id"):
-            self._logger.error("Warehouse id is not found")
-            raise InitialisationException("Warehouse id is not found")
+    def _request(
+        self, endpoint: str, method: str, url: str, **kwargs
+    ) -> requests.Response:
+        encode_body(kwargs, self.instrumentation)
+        headers = {
+            **kwargs.pop("headers", {}),
+            "Authorization": self.token.common_token,
+        }
+        response = super()._request(endpoint, method, url, headers=headers, **kwargs)
+        if response.status_code == 401:
+            token = self._token_provider.get(self._token_id, force=True)
+            headers["Authorization"] = token.common_token
+            response = super()._request(
+                endpoint, method, url, headers=headers, **kwargs
+            )
+        return response
 
     def get_stock(self, ms_id: str):
         try:
-            assert isinstance(ms_id, str)
-            ms_items = self._mapping_service.get_mapped_data([ms_id], [0])[0]
-            stocks = self._session.post(
+            require(isinstance(ms_id, str), f"ms_id must be str, got {ms_id!r}")
+            ms_items = self._mapping_service.get_records([ms_id], [0])[0]
+            stocks = self._request(
+                "wb_stocks",
+                "POST",
                 f"{settings.wb_api_url}api/v3/stocks/{self.warehouse_id}",
                 json={
                     "skus": [ms_items.barcodes],
@@ -82,43 +117,44 @@ class Wildberries(Marketplace):
                 timeout=5,
             )
             stocks.raise_for_status()
-            return stocks.json()
+            return decode(stocks)
         except HTTPError as e:
             self._logger.error(
                 f"Wildberries: {ms_id} stock is not refreshed. Error: {e}"
             )
             raise e
 
+    def _get_stocks_chunk(self, ms_ids: List[str]) -> List[dict]:
+        json_data = []
+        for item in self._mapping_service.get_records(ms_ids, [0] * len(ms_ids)):
+            json_data.append(item.barcodes)
+        stocks = self._request(
+            "wb_stocks",
+            "POST",
+            f"{settings.wb_api_url}api/v3/stocks/{self.warehouse_id}",
+            json={"skus": json_data},
+            timeout=5,
+        )
+        stocks.raise_for_status()
+        return decode(stocks).get("stocks", [])
+
     def get_stocks(self, ms_ids: List[str]):
         try:
-            json_data = []
-            if len(ms_ids) > settings.WB_ITEMS_REFRESH_LIMIT:
-                chunks_ids, chunks_values = get_chunks(ms_ids, [0] * len(ms_ids))
-                for chunk_ids, chunk_values in zip(chunks_ids, chunks_values):
-                    json_data.extend(
-                        self.get_stocks(chunk_ids)
-                    )
-            else:
-                for item in self._mapping_service.get_mapped_data(ms_ids, [0] * len(ms_ids)):
-                    json_data.append(item.barcodes)
-            stocks = self._session.post(
-                f"{settings.wb_api_url}api/v3/stocks/{self.warehouse_id}",
-                json={"skus": json_data},
-                timeout=5,
-            )
-            stocks.raise_for_status()
-            return stocks.json()
+            result = self._executor.map(
+                self._get_stocks_chunk, ms_ids, limit=settings.WB_ITEMS_REFRESH_LIMIT
+            ).raise_for_errors()
+            return {"stocks": [stock for chunk in result.results for stock in chunk]}
         except HTTPError as e:
-            self._logger.error(
-                f"Wildberries: couldn't get stocks. Error: {e}"
-            )
+            self._logger.error(f"Wildberries: couldn't get stocks. Error: {e}")
             raise e
 
     @validate_id_and_value
     def refresh_stock(self, ms_id: str, value: int):
         try:
-            ms_items = self._mapping_service.get_mapped_data([ms_id], [value])[0]
-            refresh_stock_resp = self._session.put(
+            ms_items = self._mapping_service.get_records([ms_id], [value])[0]
+            refresh_stock_resp = self._request(
+                "wb_stocks",
+                "PUT",
                 f"{settings.wb_api_url}api/v3/stocks/{self.warehouse_id}",
                 json={
                     "stocks": [
@@ -131,6 +167,7 @@ class Wildberries(Marketplace):
                 timeout=5,
             )
             refresh_stock_resp.raise_for_status()
+            self._commit_state("stocks", [(ms_id, value)])
             self._logger.info(f"Wildberries: {ms_id} stock is refreshed")
             return True
         except HTTPError as e:
@@ -139,30 +176,54 @@ class Wildberries(Marketplace):
             )
             raise e
 
-    @validate_ids_and_values
-    def refresh_stocks(self, ms_ids: List[str], values: List[int]):
-        try:
-            json_data = []
-            if len(ms_ids) > settings.WB_ITEMS_REFRESH_LIMIT:
-                chunks_ids, chunks_values = get_chunks(ms_ids, values)
-                for chunk_ids, chunk_values in zip(chunks_ids, chunks_values):
-                    self.refresh_stocks(chunk_ids, chunk_values)
+    def _state_scope(self, kind: str) -> str:
+        return f"wildberries:{self.warehouse_id}:{kind}"
+
+    def _commit_state(self, kind: str, items):
+        if self._state_store is not None:
+            self._state_store.commit(self._state_scope(kind), items)
 
-            for item in self._mapping_service.get_mapped_data(ms_ids, values):
+    def _refresh_stocks_chunk(self, ms_ids: List[str], values: List[int]):
+        return self._put_stocks(self._mapping_service.get_records(ms_ids, values))
+
+    def _put_stocks(self, ms_items: List[MappedItem]):
+        json_data = []
+        json_state = []
+        with span("build_payload"):
+            for item in ms_items:
+                json_state.append((item.ms_id, item.value))
                 json_data.append(
                     {
                         "sku": item.barcodes,
                         "amount": item.value,
                     }
                 )
-            refresh_stocks_resp = self._session.put(
-                f"{settings.wb_api_url}api/v3/stocks/{self.warehouse_id}",
-                json={
-                    "stocks": json_data,
-                },
-                timeout=5,
-            )
-            refresh_stocks_resp.raise_for_status()
+        refresh_stocks_resp = self._request(
+            "wb_stocks",
+            "PUT",
+            f"{settings.wb_api_url}api/v3/stocks/{self.warehouse_id}",
+            json={
+                "stocks": json_data,
+            },
+            timeout=5,
+        )
+        refresh_stocks_resp.raise_for_status()
+        self._commit_state("stocks", json_state)
+        return True
+
+    @traced("wildberries.refresh_stocks")
+    @validate_ids_and_values
+    def refresh_stocks(self, ms_ids: List[str], values: List[int]):
+        ms_ids, values = select_changed(
+            self._state_store, self._state_scope("stocks"), ms_ids, values
+        )
+        try:
+            self._executor.map(
+                self._refresh_stocks_chunk,
+                ms_ids,
+                values,
+                limit=settings.WB_ITEMS_REFRESH_LIMIT,
+            ).raise_for_errors()
             return True
         except HTTPError as e:
             self._logger.error(
@@ -170,54 +231,154 @@ class Wildberries(Marketplace):
             )
             raise e
 
+    def refresh_stocks_stream(
+        self,
+        pairs: Iterable[Tuple[str, int]],
+        window: int = settings.WB_ITEMS_REFRESH_LIMIT,
+    ) -> Iterator[ChunkResult]:
+        return self._executor.stream(self.refresh_stocks, iter_windows(pairs, window))
+
+    def _get_mapped_data(
+        self, ms_ids: List[str], values: List[int]
+    ) -> List[MappedItem]:
+        result = self._executor.map(
+            self._mapping_service.get_records,
+            ms_ids,
+            values,
+            limit=settings.WB_ITEMS_REFRESH_LIMIT,
+        ).raise_for_errors()
+        return [item for chunk in result.results for item in chunk]
+
+    def get_stock_records(self, ms_ids: List[str]) -> Dict[str, List[MappedItem]]:
+        records = defaultdict(list)
+        if ms_ids:
+            for item in self._get_mapped_data(list(ms_ids), [0] * len(ms_ids)):
+                records[item.ms_id].append(item)
+        return records
+
+    def push_stock_records(
+        self,
+        ms_ids: List[str],
+        values: List[int],
+        records: Dict[str, List[MappedItem]],
+    ) -> BatchResult:
+        ms_ids, values = select_changed(
+            self._state_store, self._state_scope("stocks"), ms_ids, values
+        )
+        items = [
+            MappedItem(record.ms_id, record.barcodes, record.nm_id, record.name, value)
+            for ms_id, value in dict(zip(ms_ids, values)).items()
+            for record in records.get(ms_id, ())
+        ]
+        return self._executor.map(
+            self._put_stocks, items, limit=settings.WB_ITEMS_REFRESH_LIMIT
+        )
+
+    @staticmethod
+    def _parse_goods(prices: requests.Response) -> Tuple[Dict[int, dict], int]:
+        with prices:
+            prices.raise_for_status()
+            with span("parse"):
+                if streaming_enabled():
+                    prices.raw.decode_content = True
+                    return parse_goods_page(prices.raw)
+                return parse_goods_page(prices.content)
+
+    def _get_price_page(self, page: int) -> Tuple[Dict[int, dict], int]:
+        prices = self._request(
+            "wb_goods_filter",
+            "GET",
+            f"{settings.wb_price_url}api/v2/list/goods/filter",
+            timeout=5,
+            params={
+                "limit": settings.WB_ITEMS_REFRESH_LIMIT,
+                "offset": page * settings.WB_ITEMS_REFRESH_LIMIT,
+            },
+            stream=streaming_enabled(),
+        )
+        return self._parse_goods(prices)
+
+    @traced("wildberries.get_price")
     def get_price(self) -> Dict:
         products = dict()
-        for i in range(0, self._max_price_requests + 1):
+        pages = iter(range(self._max_price_requests + 1))
+        get_page = (
+            in_context(self._get_price_page)
+            if tracing_enabled()
+            else self._get_price_page
+        )
+        with ThreadPoolExecutor(max_workers=self._concurrency_limit) as executor:
+            in_flight = {executor.submit(get_page, next(pages))}
+            last_page_seen = False
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        page_prices, count = future.result()
+                    except HTTPError as e:
+                        self._logger.error(
+                            f"Wildberries: prices are not refreshed. Error: {e}"
+                        )
+                        raise e
+                    products.update(page_prices)
+                    if count < settings.WB_ITEMS_REFRESH_LIMIT:
+                        last_page_seen = True
+                if not last_page_seen:
+                    in_flight.update(
+                        executor.submit(get_page, page)
+                        for page in islice(
+                            pages, self._concurrency_limit - len(in_flight)
+                        )
+                    )
+        return products
+
+    def get_price_by_nm_ids(self, nm_ids: List[int]) -> Dict:
+        products = dict()
+        for nm_ids_chunk in chunked(list(dict.fromkeys(nm_ids))):
             try:
-                prices = self._session.get(
+                prices = self._request(
+                    "wb_goods_filter",
+                    "POST",
                     f"{settings.wb_price_url}api/v2/list/goods/filter",
+                    json={"nmList": nm_ids_chunk},
                     timeout=5,
-                    params={
-                        "limit": settings.WB_ITEMS_REFRESH_LIMIT,
-                        "offset": i * settings.WB_ITEMS_REFRESH_LIMIT,
-                    },
+                    stream=streaming_enabled(),
                 )
-                if prices:
-                    products.update(
-                        {
-                            product["nmID"]: {
-                                "price": product["sizes"][0]["price"],
-                                "discount": product["discount"],
-                            }
-                            for product in prices.json()["data"]["listGoods"]
-                        }
-                    )
-                if (
-                        len(prices.json()["data"]["listGoods"])
-                        < settings.WB_ITEMS_REFRESH_LIMIT
-                ):
-                    break
+                products.update(self._parse_goods(prices)[0])
             except HTTPError as e:
-                self._logger.error(f"Wildberries: prices are not refreshed. Error: {e}")
+                self._logger.error(f"Wildberries: prices are not received. Error: {e}")
                 raise e
         return products
 
+    def _get_current_prices(self, nm_ids: List[int]) -> Dict:
+        catalog_size = len(self.price_snapshot) or settings.WB_ITEMS_REFRESH_LIMIT * (
+            self._max_price_requests + 1
+        )
+        if (
+            self.price_snapshot.is_fresh
+            or len(nm_ids) > catalog_size * settings.WB_PRICE_LOOKUP_RATIO
+        ):
+            return self.price_snapshot.get_many(nm_ids)
+        try:
+            prices = self.get_price_by_nm_ids(nm_ids)
+        except HTTPError:
+            return self.price_snapshot.get_many(nm_ids)
+        missing = [nm_id for nm_id in nm_ids if nm_id not in prices]
+        if missing:
+            prices.update(self.price_snapshot.get_many(missing))
+        return prices
+
     @validate_id_and_value
     def refresh_price(self, ms_id: str, value: int):
         try:
-            ms_items = self._mapping_service.get_mapped_data([ms_id], [value])[0]
+            ms_items = self._mapping_service.get_records([ms_id], [value])[0]
 
-            initial_price = self.get_price().get(ms_items.nm_id)["price"]
+            ms_items.current_value = self._get_current_prices([ms_items.nm_id])[
+                ms_items.nm_id
+            ]["price"]
 
-            self._update_prices(
-                [
-                    WbUpdateItem(
-                        **ms_items.dict(),
-                        current_value=initial_price,
-                    )
-                ],
-                "price",
-            )
+            self._update_prices([ms_items], "price")
+            self._commit_state("prices", [(ms_id, value)])
             return True
         except HTTPError as e:
             self._logger.error(
@@ -225,42 +386,43 @@ class Wildberries(Marketplace):
             )
             raise e
 
+    @traced("wildberries.refresh_prices")
     @validate_ids_and_values
     def refresh_prices(self, ms_ids: List[str], values: List[int]):
-        if len(ms_ids) > settings.WB_ITEMS_REFRESH_LIMIT:
-            chunks_ids, chunks_values = get_chunks(ms_ids, values)
-            for chunk_ids, chunk_values in zip(chunks_ids, chunks_values):
-                self.refresh_price(chunk_ids, chunk_values)
-
-        initial_prices = self.get_price()
-        items_to_reprice = []
-        for item in self._mapping_service.get_mapped_data(ms_ids, values):
-            items_to_reprice.append(
-                WbUpdateItem(
-                    **item.dict(),
-                    current_value=initial_prices.get(item.nm_id)["price"],
-                )
-            )
+        ms_ids, values = select_changed(
+            self._state_store, self._state_scope("prices"), ms_ids, values
+        )
+        if not ms_ids:
+            return True
+        ms_items = self._get_mapped_data(ms_ids, values)
+        with span("current_prices"):
+            initial_prices = self._get_current_prices([item.nm_id for item in ms_items])
+        with span("build_models"):
+            for item in ms_items:
+                item.current_value = initial_prices.get(item.nm_id)["price"]
 
-        self._update_prices(items_to_reprice, "price")
+        self._update_prices(ms_items, "price")
+        self._commit_state("prices", [(item.ms_id, item.value) for item in ms_items])
         return True
 
+    def refresh_prices_stream(
+        self,
+        pairs: Iterable[Tuple[str, int]],
+        window: int = settings.WB_ITEMS_REFRESH_LIMIT,
+    ) -> Iterator[ChunkResult]:
+        return self._executor.stream(self.refresh_prices, iter_windows(pairs, window))
+
     @validate_id_and_value
     def refresh_discount(self, ms_id: str, value: int):
         try:
-            ms_items = self._mapping_service.get_mapped_data([ms_id], [value])[0]
+            ms_items = self._mapping_service.get_records([ms_id], [value])[0]
 
-            initial_price = self.get_price().get(ms_items.nm_id)["discount"]
+            ms_items.current_value = self._get_current_prices([ms_items.nm_id])[
+                ms_items.nm_id
+            ]["discount"]
 
-            self._update_prices(
-                [
-                    WbUpdateItem(
-                        **ms_items.dict(),
-                        current_value=initial_price,
-                    )
-                ],
-                "discount",
-            )
+            self._update_prices([ms_items], "discount")
+            self._commit_state("discounts", [(ms_id, value)])
             return True
         except HTTPError as e:
             self._logger.error(
@@ -268,89 +430,102 @@ class Wildberries(Marketplace):
             )
             raise e
 
+    @traced("wildberries.refresh_discounts")
     @validate_ids_and_values
     def refresh_discounts(self, ms_ids: List[str], values: List[int]):
-        if len(ms_ids) > settings.WB_ITEMS_REFRESH_LIMIT:
-            chunks_ids, chunks_values = get_chunks(ms_ids, values)
-            for chunk_ids, chunk_values in zip(chunks_ids, chunks_values):
-                self.refresh_price(chunk_ids, chunk_values)
-
-        initial_prices = self.get_price()
-        items_to_reprice = []
-        for item in self._mapping_service.get_mapped_data(ms_ids, values):
-            items_to_reprice.append(
-                WbUpdateItem(
-                    **item.dict(),
-                    current_value=initial_prices.get(item.nm_id)["discount"],
-                )
-            )
+        ms_ids, values = select_changed(
+            self._state_store, self._state_scope("discounts"), ms_ids, values
+        )
+        if not ms_ids:
+            return True
+        ms_items = self._get_mapped_data(ms_ids, values)
+        with span("current_prices"):
+            initial_prices = self._get_current_prices([item.nm_id for item in ms_items])
+        with span("build_models"):
+            for item in ms_items:
+                item.current_value = initial_prices.get(item.nm_id)["discount"]
 
-        self._update_prices(items_to_reprice, "discount")
+        self._update_prices(ms_items, "discount")
+        self._commit_state("discounts", [(item.ms_id, item.value) for item in ms_items])
         return True
 
-    def _update_prices(self, items: List[WbUpdateItem], update_value):
-        items_to_reprice: List[WbUpdateItem] = []
-        json_data = []
-        for item in items:
-            if item.current_value * 2 < item.value and update_value == "price":
-                json_data.append(
-                    {
-                        "nmId": item.nm_id,
-                        update_value: item.current_value * 2,
-                    },
-                )
-                items_to_reprice.append(
-                    WbUpdateItem(
-                        ms_id=item.ms_id,
-                        barcodes=item.barcodes,
-                        nm_id=item.nm_id,
-                        name=item.name,
-                        value=item.value,
-                        current_value=item.current_value * 2,
-                    )
-                )
-            else:
-                json_data.append(
-                    {
-                        "nmId": item.nm_id,
-                        update_value: item.value,
-                    },
-                )
+    def refresh_discounts_stream(
+        self,
+        pairs: Iterable[Tuple[str, int]],
+        window: int = settings.WB_ITEMS_REFRESH_LIMIT,
+    ) -> Iterator[ChunkResult]:
+        return self._executor.stream(
+            self.refresh_discounts, iter_windows(pairs, window)
+        )
+
+    def _upload_prices(self, json_data: List[dict], update_value):
         try:
-            price_update_resp = self._session.post(
+            price_update_resp = self._request(
+                "wb_prices_upload",
+                "POST",
                 f"{settings.wb_price_url}api/v2/upload/task",
                 json={"data": json_data},
                 timeout=5,
             )
             price_update_resp.raise_for_status()
+            for row in json_data:
+                self.price_snapshot.update(row["nmId"], update_value, row[update_value])
             self._logger.info(
-                f"response: {price_update_resp.status_code} {price_update_resp.json()}"
+                f"response: {price_update_resp.status_code} {decode(price_update_resp)}"
             )
         except HTTPError as e:
             self._logger.error(f"Wildberries: prices are not refreshed. Error: {e}")
             raise e
-        if items_to_reprice:
-            self._update_prices(items_to_reprice, "price")
+
+    def _update_prices(self, items: List[MappedItem], update_value):
+        with span("build_payload"):
+            ladder = plan_price_ladder(items, update_value)
+        for step, chunks in enumerate(ladder):
+            if step:
+                with span("price_step_interval"):
+                    time.sleep(settings.WB_PRICE_STEP_INTERVAL)
+            self._executor.run(
+                self._upload_prices, [(chunk, update_value) for chunk in chunks]
+            ).raise_for_errors()
         return True
 
+    def _create_supply(self, name: str) -> str:
+        new_supply = self._request(
+            "wb_supplies",
+            "POST",
+            f"{settings.wb_api_url}api/v3/supplies",
+            json={"name": name},
+            timeout=5,
+        )
+        new_supply.raise_for_status()
+        return decode(new_supply).get("id")
+
     def refresh_status(self, wb_order_id: int, status_name: str, supply_id: str = None):
-        assert isinstance(wb_order_id, int)
-        assert isinstance(status_name, str)
+        require(
+            isinstance(wb_order_id, int),
+            f"wb_order_id must be int, got {wb_order_id!r}",
+        )
+        require(
+            isinstance(status_name, str),
+            f"status_name must be str, got {status_name!r}",
+        )
         try:
             match status_name:
                 case "confirm":
-                    supply_id = supply_id or self._session.post(
-                        f"{settings.wb_api_url}api/v3/supplies",
-                        json={"name": f"supply_order{wb_order_id}"},
-                        timeout=5,
-                    ).json().get("id")
-                    add_order_to_supply_resp = requests.patch(
+                    supply_id = supply_id or self._create_supply(
+                        f"supply_order{wb_order_id}"
+                    )
+                    add_order_to_supply_resp = self._request(
+                        "wb_supplies",
+                        "PATCH",
                         f"{settings.wb_api_url}api/v3/supplies/{supply_id}/orders/{wb_order_id}",
                     )
                     add_order_to_supply_resp.raise_for_status()
                 case "cancel":
-                    cancel_order_resp = requests.patch(
-                        f"{settings.wb_api_url}api/v3/orders/{wb_order_id}/cancel"
+                    cancel_order_resp = self._request(
+                        "wb_orders",
+                        "PATCH",
+                        f"{settings.wb_api_url}api/v3/orders/{wb_order_id}/cancel",
                     )
                     cancel_order_resp.raise_for_status()
                 case _:
@@ -364,22 +539,33 @@ class Wildberries(Marketplace):
             )
             raise e
 
+    @traced("wildberries.refresh_statuses")
     @validate_statuses
-    def refresh_statuses(self, wb_order_ids: List[int], statuses: List[str]):
-        try:
-            new_supply = self._session.post(
-                f"{settings.wb_api_url}api/v3/supplies",
-                json={"name": "supply_orders"},
-                timeout=5,
-            ).json()
+    def refresh_statuses(
+        self, wb_order_ids: List[int], statuses: List[str]
+    ) -> BatchResult:
+        for status in statuses:
+            if status not in ORDER_STATUSES:
+                raise InvalidStatusException(f"{status} is not valid status name")
 
-            for wb_order_id, status in zip(wb_order_ids, statuses):
-                self.refresh_status(
-                    wb_order_id=wb_order_id,
-                    status_name=status,
-                    supply_id=new_supply.get("id"),
-                )
-            return True
-        except HTTPError as e:
-            self._logger.error(f"Wildberries: can't create new supply. Error: {e}")
-            raise e
+        supply_id = None
+        supply_error = None
+        if "confirm" in statuses:
+            try:
+                supply_id = self._create_supply("supply_orders")
+            except HTTPError as e:
+                self._logger.error(f"Wildberries: can't create new supply. Error: {e}")
+                supply_error = e
+
+        def refresh(wb_order_id: int, status: str):
+            if status == "confirm" and supply_error is not None:
+                raise supply_error
+            return self.refresh_status(wb_order_id, status, supply_id)
+
+        result = self._executor.run(refresh, list(zip(wb_order_ids, statuses)))
+        if not result:
+            self._logger.error(
+                f"Wildberries: {len(result.errors)} of {len(wb_order_ids)} "
+                f"statuses are not refreshed"
+            )
+        return result
@@ -15,9 +15,14 @@ setup(
     long_description=readme(),
     long_description_content_type="text/markdown",
     url="https://github.com/derijablya/marketplace-interface",
-    packages=find_packages(),
+    packages=find_packages(include=["marketpalce_handler", "marketpalce_handler.*"]),
     install_requires=[
         "pydantic>=2.6.1",
         "requests>=2.31.0",
     ],
+    extras_require={
+        "orjson": ["orjson>=3.9"],
+        "ijson": ["ijson>=3.2"],
+        "fast": ["orjson>=3.9", "ijson>=3.2"],
+    },
 )
@@ -3,8 +3,11 @@ import pytest
 import requests_mock
 from aioresponses import aioresponses
 
-from marketpalce_handler import Wildberries, Ozon
+from marketpalce_handler import AsyncOzon, AsyncWildberries, Wildberries, Ozon
 from marketpalce_handler.config import settings
+from marketpalce_handler.tokens import clear_token_providers
+
+import helpers
 
 
 @pytest.fixture
@@ -34,47 +37,51 @@ def mapping(mock_api):
     )
 
 
+@pytest.fixture
+def echo_mapping(mock_api):
+    return mock_api.get("https://mapping_url", json=helpers.echo_mapping)
+
+
 @pytest.fixture
 def wb_prices(mock_api):
-    mock_api.get(
-        f"{settings.wb_price_url}api/v2/list/goods/filter",
-        json={
-            "data": {
-                "listGoods": [
-                    {
-                        "nmID": 1231312,
-                        "vendorCode": "07326060",
-                        "sizes": [
-                            {
-                                "sizeID": 3123515574,
-                                "price": 10,
-                                "discountedPrice": 9,
-                                "techSizeName": 42,
-                            }
-                        ],
-                        "currencyIsoCode4217": "RUB",
-                        "discount": 10,
-                        "editableSizePrice": True,
-                    },
-                    {
-                        "nmID": 1323312,
-                        "vendorCode": "0767656",
-                        "sizes": [
-                            {
-                                "sizeID": 3123515574,
-                                "price": 20,
-                                "discountedPrice": 18,
-                                "techSizeName": 42,
-                            }
-                        ],
-                        "currencyIsoCode4217": "RUB",
-                        "discount": 10,
-                        "editableSizePrice": True,
-                    },
-                ]
-            }
-        },
-    )
+    goods = {
+        "data": {
+            "listGoods": [
+                {
+                    "nmID": 1231312,
+                    "vendorCode": "07326060",
+                    "sizes": [
+                        {
+                            "sizeID": 3123515574,
+                            "price": 10,
+                            "discountedPrice": 9,
+                            "techSizeName": 42,
+                        }
+                    ],
+                    "currencyIsoCode4217": "RUB",
+                    "discount": 10,
+                    "editableSizePrice": True,
+                },
+                {
+                    "nmID": 1323312,
+                    "vendorCode": "0767656",
+                    "sizes": [
+                        {
+                            "sizeID": 3123515574,
+                            "price": 20,
+                            "discountedPrice": 18,
+                            "techSizeName": 42,
+                        }
+                    ],
+                    "currencyIsoCode4217": "RUB",
+                    "discount": 10,
+                    "editableSizePrice": True,
+                },
+            ]
+        }
+    }
+    mock_api.get(f"{settings.wb_price_url}api/v2/list/goods/filter", json=goods)
+    mock_api.post(f"{settings.wb_price_url}api/v2/list/goods/filter", json=goods)
     mock_api.post(
         f"{settings.wb_price_url}api/v2/upload/task",
         status_code=200,
@@ -205,3 +212,75 @@ def ozon(collector):
         collector_api_key="collector_api_key",
         collector_url="https://collector_url",
     )
+
+
+@pytest.fixture
+def mock_aio():
+    with aioresponses() as m:
+        yield m
+
+
+@pytest.fixture
+def async_wildberries(mock_aio):
+    mock_aio.get(
+        "https://token_service_url",
+        payload=[{"warehouse_id": 123, "id": 1, "common_token": "token"}],
+    )
+    mock_aio.get(
+        re.compile(r"^https://mapping_url.*"),
+        payload=[
+            {
+                "ms_id": "1",
+                "barcodes": "12313",
+                "nm_id": 1231312,
+                "name": "some_name",
+            },
+            {
+                "ms_id": "2",
+                "barcodes": "22313",
+                "nm_id": 1323312,
+                "name": "another_name",
+            },
+        ],
+        repeat=True,
+    )
+    return AsyncWildberries(
+        token_id=1,
+        token_service_token="token",
+        token_service_url="https://token_service_url",
+        mapping_url="https://mapping_url",
+    )
+
+
+@pytest.fixture
+def async_ozon(mock_aio):
+    for ms_id, product_id, code in (("1", "125", "123"), ("2", "126", "124")):
+        mock_aio.get(
+            f"https://collector_url/v1/products/additional/cmd?ms_id={ms_id}",
+            payload={
+                "ms_id": ms_id,
+                "ozon_product_id": product_id,
+                "code": code,
+                "ozon_max_price": 1000,
+                "attributes": {"79c718d6-8526-11ee-0a80-065e00096935": {"value": code}},
+            },
+            repeat=True,
+        )
+    return AsyncOzon(
+        client_id="112751",
+        api_key="key",
+        collector_api_key="collector_api_key",
+        collector_url="https://collector_url",
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_price_step_interval(monkeypatch):
+    monkeypatch.setattr(settings, "WB_PRICE_STEP_INTERVAL", 0)
+
+
+@pytest.fixture(autouse=True)
+def fresh_token_providers():
+    clear_token_providers()
+    yield
+    clear_token_providers()
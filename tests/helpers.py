@@ -0,0 +1,5 @@
+def echo_mapping(request, context):
+    return [
+        {"ms_id": ms_id, "barcodes": ms_id, "nm_id": int(ms_id), "name": "name"}
+        for ms_id in request.qs["ms_id"][0].split(",")
+    ]
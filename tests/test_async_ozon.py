@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from marketpalce_handler.config import settings
+
+
+def run(ozon, method, *args):
+    async def call():
+        async with ozon:
+            return await getattr(ozon, method)(*args)
+
+    return asyncio.run(call())
+
+
+def result(*offer_ids):
+    return {
+        "result": [
+            {"offer_id": offer_id, "updated": True, "errors": []}
+            for offer_id in offer_ids
+        ]
+    }
+
+
+class TestAsyncOzon:
+    def test_collector_shares_session(self, async_ozon):
+        async def call():
+            async with async_ozon:
+                items = await async_ozon._collector_service.get_mapped_data(["1", "2"])
+                return (
+                    items,
+                    async_ozon._collector_service.session is async_ozon._session,
+                )
+
+        items, shared = asyncio.run(call())
+        assert [item.offer_id for item in items] == ["123", "124"]
+        assert shared
+
+    def test_refresh_price(self, mock_aio, async_ozon):
+        mock_aio.post(
+            f"{settings.ozon_api_url}v1/product/import/prices", payload=result("123")
+        )
+        assert run(async_ozon, "refresh_price", "1", 100) == {
+            "result": [
+                {"offer_id": "123", "updated": True, "errors": [], "ms_id": "1"}
+            ],
+            "not_found": [],
+        }
+
+    def test_refresh_prices(self, mock_aio, async_ozon):
+        mock_aio.post(
+            f"{settings.ozon_api_url}v1/product/import/prices",
+            payload=result("123", "124"),
+        )
+        assert run(async_ozon, "refresh_prices", ["1", "2"], [100, 200])
+
+    def test_refresh_stocks_merges_chunks(self, mock_aio, async_ozon):
+        mock_aio.post(
+            f"{settings.ozon_api_url}v1/product/import/stocks",
+            payload=result("123"),
+            repeat=True,
+        )
+        ms_ids = ["1", "2"] * settings.OZON_STOCK_LIMIT
+        response = run(async_ozon, "refresh_stocks", ms_ids, [1] * len(ms_ids))
+        assert len(response["result"]) == 2
+
+    def test_refresh_stocks_stream(self, mock_aio, async_ozon):
+        mock_aio.post(
+            f"{settings.ozon_api_url}v1/product/import/stocks",
+            payload=result("123"),
+            repeat=True,
+        )
+
+        async def pairs():
+            for i in range(settings.OZON_STOCK_LIMIT * 2 + 1):
+                yield str(i % 2 + 1), i
+
+        async def call():
+            async with async_ozon:
+                return [
+                    chunk async for chunk in async_ozon.refresh_stocks_stream(pairs())
+                ]
+
+        chunks = asyncio.run(call())
+        assert sorted(chunk.index for chunk in chunks) == [0, 1, 2]
+        assert all(
+            chunk.result["result"] == [{**result("123")["result"][0], "ms_id": "1"}]
+            for chunk in chunks
+        )
+
+    def test_refresh_stocks_by_warehouse(self, mock_aio, async_ozon):
+        mock_aio.post(
+            f"{settings.ozon_api_url}v2/products/stocks", payload=result("123", "124")
+        )
+        assert run(
+            async_ozon, "refresh_stocks_by_warehouse", ["1", "2"], [1, 3], [1, 2]
+        )
+
+    def test_get_prices(self, mock_aio, async_ozon):
+        mock_aio.post(
+            f"{settings.ozon_api_url}v4/product/info/prices",
+            payload={"result": {"items": []}},
+        )
+        assert run(async_ozon, "get_prices", ["1", "2"]) == {"result": {"items": []}}
+
+    @pytest.mark.parametrize(
+        "ms_ids, values",
+        [
+            (["1", 2], [2, 3]),
+            (["1", "2"], ["str", 3]),
+        ],
+    )
+    def test_refresh_stocks_with_invalid_parameters(self, async_ozon, ms_ids, values):
+        with pytest.raises(ValidationError):
+            run(async_ozon, "refresh_stocks", ms_ids, values)
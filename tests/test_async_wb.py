@@ -0,0 +1,143 @@
+import asyncio
+import re
+
+import pytest
+from aiohttp import ClientResponseError
+from pydantic import ValidationError
+
+from marketpalce_handler.config import settings
+from marketpalce_handler.exceptions import InvalidStatusException
+
+PRICES_URL = re.compile(rf"^{settings.wb_price_url}api/v2/list/goods/filter.*")
+
+
+def run(wildberries, method, *args):
+    async def call():
+        async with wildberries:
+            return await getattr(wildberries, method)(*args)
+
+    return asyncio.run(call())
+
+
+def goods(*nm_ids, price=10):
+    return {
+        "data": {
+            "listGoods": [
+                {"nmID": nm_id, "sizes": [{"price": price}], "discount": 10}
+                for nm_id in nm_ids
+            ]
+        }
+    }
+
+
+class TestAsyncWildberries:
+    def test_refresh_stock(self, mock_aio, async_wildberries):
+        mock_aio.put(f"{settings.wb_api_url}api/v3/stocks/123", status=204)
+        assert run(async_wildberries, "refresh_stock", "1", 0)
+
+    def test_refresh_stocks_sends_chunks(self, mock_aio, async_wildberries):
+        mock_aio.put(f"{settings.wb_api_url}api/v3/stocks/123", status=204, repeat=True)
+        ms_ids = ["1", "2"] * settings.WB_ITEMS_REFRESH_LIMIT
+        assert run(async_wildberries, "refresh_stocks", ms_ids, [1] * len(ms_ids))
+        puts = [key for key in mock_aio.requests if key[0] == "PUT"]
+        assert len(mock_aio.requests[puts[0]]) == 2
+
+    def test_refresh_stocks_with_invalid_warehouse_id(
+        self, mock_aio, async_wildberries
+    ):
+        mock_aio.put(f"{settings.wb_api_url}api/v3/stocks/123", status=404)
+        with pytest.raises(ClientResponseError):
+            run(async_wildberries, "refresh_stocks", ["1", "2"], [1, 2])
+
+    @pytest.mark.parametrize(
+        "ms_ids, values",
+        [
+            (["1", 2], [2, 3]),
+            (["1", "2"], ["str", 3]),
+        ],
+    )
+    def test_refresh_stocks_with_invalid_parameters(
+        self, async_wildberries, ms_ids, values
+    ):
+        with pytest.raises(ValidationError):
+            run(async_wildberries, "refresh_stocks", ms_ids, values)
+
+    def test_get_stocks(self, mock_aio, async_wildberries):
+        mock_aio.post(
+            f"{settings.wb_api_url}api/v3/stocks/123",
+            payload={"stocks": [{"sku": "12313", "amount": 1}]},
+        )
+        assert run(async_wildberries, "get_stocks", ["1", "2"]) == {
+            "stocks": [{"sku": "12313", "amount": 1}]
+        }
+
+    def test_get_price_stops_at_short_page(self, mock_aio, async_wildberries):
+        full_page = goods(*range(settings.WB_ITEMS_REFRESH_LIMIT))
+        mock_aio.get(PRICES_URL, payload=full_page)
+        mock_aio.get(PRICES_URL, payload=goods(1231312))
+        async_wildberries._concurrency_limit = 1
+        prices = run(async_wildberries, "get_price")
+        assert len(prices) == settings.WB_ITEMS_REFRESH_LIMIT + 1
+
+    def test_refresh_prices_doubles_price(self, mock_aio, async_wildberries):
+        mock_aio.get(PRICES_URL, payload=goods(1231312, 1323312), repeat=True)
+        mock_aio.post(
+            f"{settings.wb_price_url}api/v2/upload/task",
+            payload={"data": {"id": 1}},
+            repeat=True,
+        )
+        assert run(async_wildberries, "refresh_prices", ["1", "2"], [30, 15])
+        uploads = [key for key in mock_aio.requests if key[0] == "POST"]
+        assert len(mock_aio.requests[uploads[0]]) == 2
+
+    def test_refresh_discounts(self, mock_aio, async_wildberries):
+        mock_aio.get(PRICES_URL, payload=goods(1231312, 1323312), repeat=True)
+        mock_aio.post(
+            f"{settings.wb_price_url}api/v2/upload/task", payload={"data": {"id": 1}}
+        )
+        assert run(async_wildberries, "refresh_discounts", ["1", "2"], [5, 15])
+
+    def test_refresh_statuses(self, mock_aio, async_wildberries):
+        mock_aio.post(
+            f"{settings.wb_api_url}api/v3/supplies", payload={"id": "WB-GI-1234567"}
+        )
+        mock_aio.patch(
+            re.compile(rf"^{settings.wb_api_url}api/v3/.*"), status=204, repeat=True
+        )
+        assert run(
+            async_wildberries,
+            "refresh_statuses",
+            [1234567, 1234568],
+            ["confirm", "cancel"],
+        )
+
+    def test_refresh_statuses_reports_per_order(self, mock_aio, async_wildberries):
+        mock_aio.post(
+            f"{settings.wb_api_url}api/v3/supplies", payload={"id": "WB-GI-1"}
+        )
+        mock_aio.patch(
+            f"{settings.wb_api_url}api/v3/supplies/WB-GI-1/orders/1", status=204
+        )
+        mock_aio.patch(f"{settings.wb_api_url}api/v3/orders/2/cancel", status=409)
+
+        result = run(
+            async_wildberries, "refresh_statuses", [1, 2], ["confirm", "cancel"]
+        )
+
+        assert [chunk.ok for chunk in result.chunks] == [True, False]
+        assert isinstance(result.errors[0], ClientResponseError)
+
+    def test_refresh_statuses_with_invalid_status(self, mock_aio, async_wildberries):
+        mock_aio.post(
+            f"{settings.wb_api_url}api/v3/supplies", payload={"id": "WB-GI-1234567"}
+        )
+        mock_aio.patch(
+            re.compile(rf"^{settings.wb_api_url}api/v3/.*"), status=204, repeat=True
+        )
+        with pytest.raises(InvalidStatusException):
+            run(
+                async_wildberries,
+                "refresh_statuses",
+                [1234567, 1234568],
+                ["confirm", "killmeplease"],
+            )
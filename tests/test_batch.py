@@ -0,0 +1,170 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from pydantic import ValidationError
+
+from marketpalce_handler.batch import AsyncBatchExecutor, BatchExecutor
+from marketpalce_handler.config import settings
+from marketpalce_handler.schemas import CollectorItem
+from marketpalce_handler.utils import aiter_windows, iter_windows
+
+
+class TestBatchExecutor:
+    def test_map_sends_each_item_once(self):
+        seen = []
+        lock = threading.Lock()
+
+        def send(ids, values):
+            with lock:
+                seen.extend(zip(ids, values))
+            return len(ids)
+
+        result = BatchExecutor(4).map(send, list(range(25)), list(range(25)), limit=10)
+
+        assert result.ok
+        assert result.results == [10, 10, 5]
+        assert sorted(seen) == [(i, i) for i in range(25)]
+
+    def test_chunks_run_concurrently(self):
+        started = time.monotonic()
+        BatchExecutor(8).map(lambda ids: time.sleep(0.05), list(range(8)), limit=1)
+        assert time.monotonic() - started < 0.2
+
+    def test_errors_are_collected_per_chunk(self):
+        def send(ids):
+            if 3 in ids:
+                raise ValueError(ids)
+            return ids
+
+        result = BatchExecutor(2).map(send, list(range(6)), limit=2)
+
+        assert not result
+        assert result.results == [[0, 1], [4, 5]]
+        assert [chunk.index for chunk in result.chunks if not chunk.ok] == [1]
+        with pytest.raises(ValueError):
+            result.raise_for_errors()
+
+    def test_async_executor(self):
+        async def send(ids):
+            await asyncio.sleep(0)
+            return sum(ids)
+
+        result = asyncio.run(AsyncBatchExecutor(2).map(send, [1, 2, 3], limit=2))
+        assert result.results == [3, 3]
+
+    def test_stream_bounds_windows_in_flight(self):
+        pulled = []
+        active = []
+        lock = threading.Lock()
+
+        def pairs():
+            for i in range(20):
+                pulled.append(i)
+                yield str(i), i
+
+        def send(ids, values):
+            with lock:
+                active.append(len(pulled))
+            time.sleep(0.01)
+            return sum(values)
+
+        stream = BatchExecutor(2).stream(send, iter_windows(pairs(), 3))
+        first = next(stream)
+        assert first.ok
+        assert len(pulled) <= 12
+
+        chunks = [first, *stream]
+        assert sorted(chunk.index for chunk in chunks) == list(range(7))
+        assert sum(chunk.result for chunk in chunks) == sum(range(20))
+
+    def test_async_stream_accepts_async_iterable(self):
+        async def pairs():
+            for i in range(5):
+                yield str(i), i
+
+        async def send(ids, values):
+            if "4" in ids:
+                raise ValueError(ids)
+            return ids
+
+        async def collect():
+            executor = AsyncBatchExecutor(2)
+            return [
+                chunk
+                async for chunk in executor.stream(send, aiter_windows(pairs(), 2))
+            ]
+
+        chunks = sorted(asyncio.run(collect()), key=lambda chunk: chunk.index)
+        assert [chunk.result for chunk in chunks] == [["0", "1"], ["2", "3"], None]
+        assert isinstance(chunks[-1].error, ValueError)
+
+
+class TestWindows:
+    def test_iter_windows(self):
+        windows = list(iter_windows(((str(i), i) for i in range(5)), 2))
+        assert windows == [(["0", "1"], [0, 1]), (["2", "3"], [2, 3]), (["4"], [4])]
+
+    def test_iter_windows_empty(self):
+        assert list(iter_windows([], 2)) == []
+
+
+class TestBulkChunking:
+    def test_wildberries_refresh_stocks(self, mock_api, wildberries, echo_mapping):
+        mock_api.put(
+            f"{settings.wb_api_url}api/v3/stocks/{wildberries.warehouse_id}",
+            status_code=204,
+        )
+        ms_ids = [str(i) for i in range(2500)]
+
+        assert wildberries.refresh_stocks(ms_ids, [1] * len(ms_ids))
+
+        puts = [r.json() for r in mock_api.request_history if r.method == "PUT"]
+        skus = [stock["sku"] for put in puts for stock in put["stocks"]]
+        assert sorted(len(put["stocks"]) for put in puts) == [500, 1000, 1000]
+        assert sorted(skus) == sorted(ms_ids)
+
+    def test_wildberries_refresh_stocks_stream(
+        self, mock_api, wildberries, echo_mapping
+    ):
+        mock_api.put(
+            f"{settings.wb_api_url}api/v3/stocks/{wildberries.warehouse_id}",
+            status_code=204,
+        )
+        pairs = ((str(i), 1) for i in range(2500))
+
+        chunks = list(wildberries.refresh_stocks_stream(pairs))
+
+        assert all(chunk.ok for chunk in chunks)
+        puts = [r.json() for r in mock_api.request_history if r.method == "PUT"]
+        assert sorted(len(put["stocks"]) for put in puts) == [500, 1000, 1000]
+
+    def test_ozon_refresh_stocks_stream(self, mock_api, mocker, ozon, ozon_stocks):
+        mocker.patch.object(
+            ozon._collector_service,
+            "get_mapped_data",
+            return_value=[
+                CollectorItem(
+                    ms_id=ms_id, product_id="1", offer_id=ms_id, price=1, sku="1"
+                )
+                for ms_id in ("1", "2")
+            ],
+        )
+        pairs = iter([("1", 1), ("2", 1)] * settings.OZON_STOCK_LIMIT + [("1", "str")])
+
+        chunks = sorted(
+            ozon.refresh_stocks_stream(pairs), key=lambda chunk: chunk.index
+        )
+
+        assert len(chunks) == 3
+        assert all(len(chunk.result["result"]) == 2 for chunk in chunks[:2])
+        assert isinstance(chunks[2].error, ValidationError)
+
+    def test_ozon_refresh_stocks(self, mock_api, ozon, ozon_stocks):
+        ms_ids = ["1", "2"] * settings.OZON_STOCK_LIMIT
+        response = ozon.refresh_stocks(ms_ids, [1] * len(ms_ids))
+
+        posts = [r for r in mock_api.request_history if r.method == "POST"]
+        assert [len(r.json()["stocks"]) for r in posts] == [100, 100]
+        assert len(response["result"]) == 4
@@ -0,0 +1,26 @@
+import importlib.util
+import os
+
+import pytest
+
+from marketpalce_handler.config import settings
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks")
+
+
+def load(name):
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(BENCHMARKS_DIR, f"{name}.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+hot_paths = load("hot_paths")
+
+
+@pytest.mark.parametrize("name", list(hot_paths.BENCHMARKS))
+def test_hot_path_benchmarks_run(monkeypatch, name):
+    monkeypatch.setattr(settings, "WB_PRICE_STEP_INTERVAL", 0)
+    assert hot_paths.measure(hot_paths.BENCHMARKS[name](10), repeat=1) >= 0
@@ -0,0 +1,203 @@
+import asyncio
+import threading
+
+import pytest
+from pydantic import ValidationError
+from requests import HTTPError
+
+from marketpalce_handler.buffer import AsyncWriteBuffer, WriteBuffer
+from marketpalce_handler.config import settings
+from marketpalce_handler.exceptions import (
+    ItemNotUpdatedException,
+    MappingNotFoundException,
+)
+
+
+class FakeMarketplace:
+    def __init__(self, error: Exception = None):
+        self.calls = []
+        self.error = error
+        self._lock = threading.Lock()
+
+    def refresh_stocks(self, ms_ids, values):
+        with self._lock:
+            self.calls.append(("stocks", ms_ids, values))
+        if self.error:
+            raise self.error
+        return len(ms_ids)
+
+    def refresh_prices(self, ms_ids, values):
+        with self._lock:
+            self.calls.append(("prices", ms_ids, values))
+        return len(ms_ids)
+
+
+class AsyncFakeMarketplace(FakeMarketplace):
+    async def refresh_stocks(self, ms_ids, values):
+        await asyncio.sleep(0)
+        return super().refresh_stocks(ms_ids, values)
+
+
+class TestWriteBuffer:
+    def test_coalesces_newest_value_per_ms_id(self):
+        marketplace = FakeMarketplace()
+        with WriteBuffer(marketplace, max_latency=60) as buffer:
+            first = buffer.refresh_stock("1", 1)
+            second = buffer.refresh_stock("2", 2)
+            third = buffer.refresh_stock("1", 3)
+            price = buffer.refresh_price("1", 100)
+
+        assert sorted(marketplace.calls) == [
+            ("prices", ["1"], [100]),
+            ("stocks", ["2", "1"], [2, 3]),
+        ]
+        assert first.result() == second.result() == third.result() == 2
+        assert price.result() == 1
+
+    def test_flushes_on_size(self):
+        marketplace = FakeMarketplace()
+        with WriteBuffer(marketplace, max_items=2, max_latency=60) as buffer:
+            futures = [buffer.refresh_stock(str(i), i) for i in range(2)]
+            assert [future.result(timeout=1) for future in futures] == [2, 2]
+
+    def test_flushes_on_latency(self):
+        marketplace = FakeMarketplace()
+        with WriteBuffer(marketplace, max_latency=0.01) as buffer:
+            assert buffer.refresh_stock("1", 1).result(timeout=1) == 1
+
+    def test_errors_are_set_on_futures(self):
+        marketplace = FakeMarketplace(error=ValueError("boom"))
+        with WriteBuffer(marketplace, max_latency=60) as buffer:
+            future = buffer.refresh_stock("1", 1)
+        with pytest.raises(ValueError):
+            future.result()
+
+    def test_rejects_invalid_items(self):
+        with WriteBuffer(FakeMarketplace()) as buffer:
+            with pytest.raises(ValidationError):
+                buffer.refresh_stock("1", "str")
+            with pytest.raises(NotImplementedError):
+                buffer.refresh_discount("1", 1)
+
+    def test_closed_buffer(self):
+        buffer = WriteBuffer(FakeMarketplace())
+        buffer.close()
+        with pytest.raises(RuntimeError):
+            buffer.refresh_stock("1", 1)
+
+    def test_wildberries_single_request(self, mock_api, wildberries):
+        put = mock_api.put(
+            f"{settings.wb_api_url}api/v3/stocks/{wildberries.warehouse_id}",
+            status_code=204,
+        )
+        with WriteBuffer(wildberries, max_latency=60) as buffer:
+            futures = [buffer.refresh_stock("1", 1), buffer.refresh_stock("2", 3)]
+
+        assert all(future.result() for future in futures)
+        assert put.call_count == 1
+
+    def test_wildberries_futures_follow_their_chunk(
+        self, mock_api, wildberries, echo_mapping
+    ):
+        def stocks(request, context):
+            failed = request.json()["stocks"][0]["sku"] == "1000"
+            context.status_code = 500 if failed else 204
+            return ""
+
+        mock_api.put(
+            f"{settings.wb_api_url}api/v3/stocks/{wildberries.warehouse_id}",
+            text=stocks,
+        )
+        size = settings.WB_ITEMS_REFRESH_LIMIT + 500
+        with WriteBuffer(wildberries, max_items=size, max_latency=60) as buffer:
+            futures = [buffer.refresh_stock(str(i), i) for i in range(size)]
+
+        assert futures[0].result() is True
+        assert futures[settings.WB_ITEMS_REFRESH_LIMIT - 1].result() is True
+        with pytest.raises(HTTPError):
+            futures[settings.WB_ITEMS_REFRESH_LIMIT].result()
+
+    def test_ozon_futures_follow_their_row(self, monkeypatch, mock_api, ozon):
+        monkeypatch.setattr(settings, "REQUEST_BACKOFF_FACTOR", 0)
+        mock_api.post(
+            f"{settings.ozon_api_url}v1/product/import/stocks",
+            json={
+                "result": [
+                    {"offer_id": "123", "updated": True, "errors": []},
+                    {"offer_id": "124", "updated": False, "errors": ["invalid"]},
+                ]
+            },
+        )
+        with WriteBuffer(ozon, max_latency=60) as buffer:
+            mapped, rejected, unmapped = [
+                buffer.refresh_stock(ms_id, 1) for ms_id in ("1", "2", "3")
+            ]
+
+        assert mapped.result() == {
+            "offer_id": "123",
+            "updated": True,
+            "errors": [],
+            "ms_id": "1",
+        }
+        with pytest.raises(ItemNotUpdatedException):
+            rejected.result()
+        with pytest.raises(MappingNotFoundException):
+            unmapped.result()
+
+
+class TestAsyncWriteBuffer:
+    def test_coalesces_and_flushes_on_latency(self):
+        marketplace = AsyncFakeMarketplace()
+
+        async def call():
+            async with AsyncWriteBuffer(marketplace, max_latency=0.01) as buffer:
+                futures = [
+                    buffer.refresh_stock("1", 1),
+                    buffer.refresh_stock("1", 2),
+                    buffer.refresh_stock("2", 2),
+                ]
+                return await asyncio.gather(*futures)
+
+        assert asyncio.run(call()) == [2, 2, 2]
+        assert marketplace.calls == [("stocks", ["1", "2"], [2, 2])]
+
+    def test_flushes_on_size(self):
+        marketplace = AsyncFakeMarketplace()
+
+        async def call():
+            async with AsyncWriteBuffer(
+                marketplace, max_items=2, max_latency=60
+            ) as buffer:
+                futures = [buffer.refresh_stock(str(i), i) for i in range(3)]
+                return await asyncio.wait_for(asyncio.gather(*futures[:2]), 1)
+
+        assert asyncio.run(call()) == [2, 2]
+        assert marketplace.calls == [
+            ("stocks", ["0", "1"], [0, 1]),
+            ("stocks", ["2"], [2]),
+        ]
+
+    def test_errors_are_set_on_futures(self):
+        marketplace = AsyncFakeMarketplace(error=ValueError("boom"))
+
+        async def call():
+            async with AsyncWriteBuffer(marketplace, max_latency=60) as buffer:
+                future = buffer.refresh_stock("1", 1)
+            return await asyncio.gather(future, return_exceptions=True)
+
+        assert isinstance(asyncio.run(call())[0], ValueError)
+
+    def test_latency_flush_after_size_flush(self):
+        marketplace = AsyncFakeMarketplace()
+
+        async def call():
+            async with AsyncWriteBuffer(
+                marketplace, max_items=2, max_latency=0.01
+            ) as buffer:
+                buffer.refresh_stock("0", 0)
+                await asyncio.sleep(0)
+                buffer.refresh_stock("1", 1)
+                await asyncio.sleep(0)
+                return await asyncio.wait_for(buffer.refresh_stock("2", 2), 1)
+
+        assert asyncio.run(call()) == 1
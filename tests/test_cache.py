@@ -0,0 +1,56 @@
+import requests
+
+from marketpalce_handler.cache import MappingCache
+from marketpalce_handler.collector import Collector
+from marketpalce_handler.mapping import Mapping
+
+
+class TestMappingCache:
+    def test_lru_eviction(self):
+        cache = MappingCache(maxsize=2)
+        cache.set_many({"1": 1, "2": 2})
+        cache.get("1")
+        cache.set("3", 3)
+        assert cache.get_many(["1", "2", "3"]) == ({"1": 1, "3": 3}, ["2"])
+
+    def test_ttl_expiry(self, mocker):
+        monotonic = mocker.patch("marketpalce_handler.cache.time.monotonic")
+        monotonic.return_value = 100
+        cache = MappingCache(ttl=10)
+        cache.set("1", 1)
+        monotonic.return_value = 111
+        assert cache.get("1") is None
+        assert len(cache) == 0
+
+    def test_stats_and_invalidation(self):
+        cache = MappingCache()
+        cache.set_many({"1": 1, "2": 2})
+        cache.get_many(["1", "2", "3"])
+        cache.invalidate(["1"])
+        cache.get("1")
+        assert cache.stats() == {"hits": 2, "misses": 2, "size": 1}
+        cache.invalidate()
+        assert len(cache) == 0
+
+
+class TestCachedMapping:
+    def test_fetches_only_missing_ids(self, mock_api, mapping):
+        cache = MappingCache()
+        service = Mapping("https://mapping_url", requests.Session(), cache)
+
+        service.get_mapped_data(["1", "2"], [1, 2])
+        items = service.get_mapped_data(["1", "2"], [3, 4])
+
+        assert mock_api.call_count == 1
+        assert [(item.ms_id, item.value) for item in items] == [("1", 3), ("2", 4)]
+        assert cache.stats()["hits"] == 2
+
+    def test_collector_fetches_only_missing_ids(self, collector):
+        cache = MappingCache()
+        service = Collector("key", "https://collector_url", cache=cache)
+
+        service.get_mapped_data(["1"])
+        items = service.get_mapped_data(["2", "1"])
+
+        assert [item.ms_id for item in items] == ["2", "1"]
+        assert cache.stats() == {"hits": 1, "misses": 2, "size": 2}
@@ -0,0 +1,158 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from marketpalce_handler import codec
+from marketpalce_handler.codec import (
+    JsonCodec,
+    OrjsonCodec,
+    dumps,
+    get_codec,
+    loads,
+    set_codec,
+)
+from marketpalce_handler.config import settings
+
+
+class CountingCodec(JsonCodec):
+    def __init__(self):
+        self.encoded = 0
+        self.decoded = 0
+
+    def dumps(self, obj) -> bytes:
+        self.encoded += 1
+        return super().dumps(obj)
+
+    def loads(self, data):
+        self.decoded += 1
+        return super().loads(data)
+
+
+@pytest.fixture
+def counting_codec():
+    counting = CountingCodec()
+    set_codec(counting)
+    yield counting
+    set_codec()
+
+
+class TestCodec:
+    def test_default_prefers_orjson(self):
+        expected = "json" if codec.orjson is None else "orjson"
+        assert get_codec().name == expected
+
+    def test_compact_bytes(self):
+        payload = {"stocks": [{"sku": "штрихкод", "amount": 1}]}
+        assert JsonCodec().dumps(payload) == (
+            '{"stocks":[{"sku":"штрихкод","amount":1}]}'.encode()
+        )
+        assert loads(dumps(payload)) == payload
+
+    def test_orjson_falls_back_for_unsupported_values(self):
+        if codec.orjson is None:
+            pytest.skip("orjson is not installed")
+        assert (
+            OrjsonCodec().dumps({"value": 2**70}) == b'{"value":1180591620717411303424}'
+        )
+
+    def test_set_codec(self):
+        try:
+            set_codec("json")
+            assert type(get_codec()) is JsonCodec
+            with pytest.raises(ValueError):
+                set_codec("yaml")
+        finally:
+            set_codec()
+
+    def test_body_is_encoded_once_across_retries(
+        self, mock_api, wildberries, counting_codec
+    ):
+        put = mock_api.put(
+            f"{settings.wb_api_url}api/v3/stocks/{wildberries.warehouse_id}",
+            [
+                {"status_code": 429, "headers": {"Retry-After": "0"}},
+                {"status_code": 204},
+            ],
+        )
+        assert wildberries.refresh_stocks(["1", "2"], [1, 2])
+        assert put.call_count == 2
+        assert counting_codec.encoded == 1
+        first, second = put.request_history
+        assert first.body == second.body
+        assert first.headers["Content-Type"] == "application/json"
+        assert second.json() == {
+            "stocks": [{"sku": "12313", "amount": 1}, {"sku": "22313", "amount": 2}]
+        }
+
+    def test_body_is_encoded_once_across_reauthorization(
+        self, mock_api, wildberries, counting_codec
+    ):
+        tokens = mock_api.get(
+            "https://token_service_url",
+            json=[{"warehouse_id": 123, "id": 1, "common_token": "token"}],
+        )
+        put = mock_api.put(
+            f"{settings.wb_api_url}api/v3/stocks/{wildberries.warehouse_id}",
+            [{"status_code": 401}, {"status_code": 204}],
+        )
+        assert wildberries.refresh_stocks(["1", "2"], [1, 2])
+        assert put.call_count == 2
+        assert tokens.call_count == 2
+        assert counting_codec.encoded == 1
+        first, second = put.request_history
+        assert first.body == second.body
+
+    def test_async_body_is_encoded_once_across_retries(
+        self, mock_aio, async_wildberries, counting_codec, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "REQUEST_BACKOFF_FACTOR", 0)
+        url = f"{settings.wb_api_url}api/v3/stocks/123"
+        mock_aio.put(url, exception=aiohttp.ClientConnectionError())
+        mock_aio.put(url, status=401)
+        mock_aio.get(
+            "https://token_service_url",
+            payload=[{"warehouse_id": 123, "id": 1, "common_token": "token"}],
+        )
+        mock_aio.put(url, status=204)
+
+        async def call():
+            async with async_wildberries:
+                await async_wildberries.refresh_stocks(["1", "2"], [1, 2])
+
+        asyncio.run(call())
+        bodies = [
+            call.kwargs["data"]
+            for key, calls in mock_aio.requests.items()
+            if key[0] == "PUT"
+            for call in calls
+        ]
+        assert len(bodies) == 3
+        assert len(set(bodies)) == 1
+        assert counting_codec.encoded == 1
+
+    def test_responses_use_codec(
+        self, mock_api, wildberries, wb_prices, counting_codec
+    ):
+        assert wildberries.refresh_prices(["1", "2"], [0, 1])
+        assert counting_codec.decoded >= 2
+
+    def test_async_client_sends_bytes(self, mock_aio, async_wildberries):
+        mock_aio.put(f"{settings.wb_api_url}api/v3/stocks/123", status=204)
+
+        async def call():
+            async with async_wildberries:
+                await async_wildberries.refresh_stocks(["1", "2"], [1, 2])
+
+        asyncio.run(call())
+        (request,) = [
+            call
+            for key, calls in mock_aio.requests.items()
+            if key[0] == "PUT"
+            for call in calls
+        ]
+        assert isinstance(request.kwargs["data"], bytes)
+        assert loads(request.kwargs["data"])["stocks"][0] == {
+            "sku": "12313",
+            "amount": 1,
+        }
@@ -0,0 +1,124 @@
+import asyncio
+import re
+
+import aiohttp
+
+from aiohttp import ClientResponseError
+from aioresponses import CallbackResult
+
+from marketpalce_handler.collector import Collector
+from marketpalce_handler.exceptions import MappingNotFoundException
+
+URL = re.compile(r"^https://collector_url/v1/products/additional/cmd\?ms_id=.*")
+
+
+def payload(ms_id):
+    return {
+        "ms_id": ms_id,
+        "ozon_product_id": "1",
+        "code": f"code-{ms_id}",
+        "ozon_max_price": 1000,
+        "attributes": {"79c718d6-8526-11ee-0a80-065e00096935": {"value": "1"}},
+    }
+
+
+def ms_ids_of(url):
+    return url.query["ms_id"].split(",")
+
+
+class TestCollector:
+    def test_concurrency_is_bounded(self, mock_aio):
+        in_flight = []
+        peak = []
+
+        async def handler(url, **kwargs):
+            in_flight.append(url)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(url)
+            return CallbackResult(payload=payload(ms_ids_of(url)[0]))
+
+        mock_aio.get(URL, callback=handler, repeat=True)
+        collector = Collector("key", "https://collector_url", concurrency_limit=3)
+        ms_ids = [str(i) for i in range(20)]
+
+        result = collector.get_mapped_data(ms_ids)
+
+        assert [item.ms_id for item in result] == ms_ids
+        assert max(peak) == 3
+
+    def test_batch_requests(self, mock_aio):
+        def handler(url, **kwargs):
+            return CallbackResult(payload=[payload(i) for i in ms_ids_of(url)])
+
+        mock_aio.get(URL, callback=handler, repeat=True)
+        collector = Collector("key", "https://collector_url", batch_size=10)
+
+        result = collector.get_mapped_data([str(i) for i in range(25)])
+
+        assert len(result) == 25
+        assert sum(map(len, mock_aio.requests.values())) == 3
+
+    def test_retries_and_partial_results(self, mock_aio):
+        mock_aio.get(URL, status=503)
+        mock_aio.get(URL, payload=payload("1"))
+        mock_aio.get(URL, status=404)
+        collector = Collector("key", "https://collector_url", concurrency_limit=1)
+
+        async def lookup():
+            async with aiohttp.ClientSession() as session:
+                return await collector.lookup(session, ["1", "2"])
+
+        result = asyncio.run(lookup())
+
+        assert [item["ms_id"] for item in result.items] == ["1"]
+        assert isinstance(result.failed["2"], ClientResponseError)
+
+    def test_failed_batch_falls_back_to_single_items(self, mock_aio):
+        def handler(url, **kwargs):
+            ms_ids = ms_ids_of(url)
+            if len(ms_ids) > 1:
+                return CallbackResult(status=400, reason="Bad Request")
+            if ms_ids == ["3"]:
+                return CallbackResult(payload=[])
+            return CallbackResult(payload=payload(ms_ids[0]))
+
+        mock_aio.get(URL, callback=handler, repeat=True)
+        collector = Collector("key", "https://collector_url", batch_size=3)
+
+        async def lookup():
+            async with aiohttp.ClientSession() as session:
+                return await collector.lookup(session, ["1", "2", "3"])
+
+        result = asyncio.run(lookup())
+
+        assert [item["ms_id"] for item in result.items] == ["1", "2"]
+        assert isinstance(result.failed["3"], MappingNotFoundException)
+
+    def test_bad_batches_do_not_lose_fetched_ones(self, mock_aio):
+        def handler(url, **kwargs):
+            ms_ids = ms_ids_of(url)
+            if ms_ids == ["3", "4"]:
+                return CallbackResult(body="not json")
+            rows = [payload(ms_id) for ms_id in ms_ids]
+            if "2" in ms_ids:
+                rows[ms_ids.index("2")]["attributes"] = {}
+            return CallbackResult(payload=rows)
+
+        mock_aio.get(URL, callback=handler, repeat=True)
+        collector = Collector("key", "https://collector_url", batch_size=2)
+
+        async def lookup():
+            async with aiohttp.ClientSession() as session:
+                return await collector.lookup(session, ["1", "2", "3", "4", "5"])
+
+        result = asyncio.run(lookup())
+
+        assert [item["ms_id"] for item in result.items] == ["1", "5"]
+        assert [item.offer_id for item in result.models] == ["code-1", "code-5"]
+        assert isinstance(result.failed["2"], KeyError)
+        assert isinstance(result.failed["3"], ValueError)
+        assert isinstance(result.failed["4"], ValueError)
+        assert [
+            item.ms_id for item in collector.get_mapped_data(["1", "2", "3", "4"])
+        ] == ["1"]
@@ -0,0 +1,118 @@
+import pytest
+from requests import HTTPError
+
+from marketpalce_handler.config import settings
+from marketpalce_handler.exceptions import InvalidArgumentsException
+from marketpalce_handler.fanout import WildberriesFanout
+from marketpalce_handler.state import SyncStateStore
+
+TOKENS = [
+    {"warehouse_id": 10, "id": 1, "common_token": "seller-1"},
+    {"warehouse_id": 20, "id": 2, "common_token": "seller-2"},
+]
+
+
+@pytest.fixture
+def tokens(mock_api):
+    return mock_api.get("https://token_service_url", json=TOKENS)
+
+
+@pytest.fixture
+def stocks(mock_api):
+    return {
+        warehouse_id: mock_api.put(
+            f"{settings.wb_api_url}api/v3/stocks/{warehouse_id}", status_code=204
+        )
+        for warehouse_id in (10, 11, 20)
+    }
+
+
+def build(targets=(1, (1, 11), 2), **kwargs):
+    return WildberriesFanout(
+        targets,
+        token_service_token="token",
+        token_service_url="https://token_service_url",
+        mapping_url="https://mapping_url",
+        **kwargs,
+    )
+
+
+class TestWildberriesFanout:
+    def test_pushes_every_warehouse_with_one_lookup(
+        self, mock_api, mapping, tokens, stocks
+    ):
+        fanout = build()
+        result = fanout.refresh_stocks(
+            {
+                10: (["1", "2"], [1, 2]),
+                11: (["1"], [5]),
+                20: (["2", "3"], [7, 8]),
+            }
+        )
+
+        assert result.ok and not result.failed
+        assert sorted(result.warehouses) == [10, 11, 20]
+        assert tokens.call_count == 1
+        mapping_calls = [
+            request
+            for request in mock_api.request_history
+            if request.hostname == "mapping_url"
+        ]
+        assert len(mapping_calls) == 1
+        assert mapping_calls[0].qs["ms_id"] == ["1,2,3"]
+        assert stocks[10].last_request.json() == {
+            "stocks": [{"sku": "12313", "amount": 1}, {"sku": "22313", "amount": 2}]
+        }
+        assert stocks[11].last_request.json() == {
+            "stocks": [{"sku": "12313", "amount": 5}]
+        }
+        assert stocks[20].last_request.json() == {
+            "stocks": [{"sku": "22313", "amount": 7}]
+        }
+        assert stocks[10].last_request.headers["Authorization"] == "seller-1"
+        assert stocks[20].last_request.headers["Authorization"] == "seller-2"
+
+    def test_failed_warehouse_does_not_stop_others(
+        self, mock_api, mapping, tokens, stocks
+    ):
+        mock_api.put(f"{settings.wb_api_url}api/v3/stocks/20", status_code=500)
+        result = build().refresh_stocks({10: (["1"], [1]), 20: (["1"], [1])})
+
+        assert not result
+        assert result.failed == [20]
+        assert result.warehouses[10].ok
+        assert stocks[10].call_count == 1
+        with pytest.raises(HTTPError):
+            result.raise_for_errors()
+
+    def test_skips_unchanged_values_per_warehouse(
+        self, mock_api, mapping, tokens, stocks
+    ):
+        fanout = build(state_store=SyncStateStore())
+        fanout.refresh_stocks({10: (["1", "2"], [1, 2]), 20: (["1"], [1])})
+        fanout.refresh_stocks({10: (["1", "2"], [1, 3]), 20: (["1"], [1])})
+
+        assert stocks[10].call_count == 2
+        assert stocks[10].last_request.json() == {
+            "stocks": [{"sku": "22313", "amount": 3}]
+        }
+        assert stocks[20].call_count == 1
+
+    def test_accounts_have_separate_rate_limiters(self, mock_api, tokens):
+        fanout = build()
+        first, same_account, second = fanout.clients
+        assert first.rate_limiter is same_account.rate_limiter
+        assert first.rate_limiter is not second.rate_limiter
+
+    def test_unknown_warehouse(self, mock_api, tokens):
+        with pytest.raises(InvalidArgumentsException):
+            build().refresh_stocks({30: (["1"], [1])})
+
+    def test_validates_each_warehouse(self, mock_api, tokens):
+        with pytest.raises(InvalidArgumentsException):
+            build().refresh_stocks({10: (["1", "2"], [1])})
+
+    def test_duplicate_warehouses(self, mock_api, tokens):
+        fanout = build([1, (1, 10), 2])
+        with pytest.raises(InvalidArgumentsException, match=r"\[10\]"):
+            fanout.refresh_stocks({20: (["1"], [1])})
@@ -0,0 +1,114 @@
+import asyncio
+import io
+import json
+import re
+
+import pytest
+import requests
+from requests import HTTPError
+
+from marketpalce_handler import goods
+from marketpalce_handler.config import settings
+from marketpalce_handler.goods import (
+    parse_goods_page,
+    parse_goods_page_async,
+    streaming_enabled,
+)
+
+LISTING = {
+    "data": {
+        "listGoods": [
+            {
+                "nmID": 1,
+                "vendorCode": "v1",
+                "sizes": [
+                    {"sizeID": 11, "price": 100, "discountedPrice": 90.5},
+                    {"sizeID": 12, "price": 120, "discountedPrice": 108.0},
+                ],
+                "discount": 10,
+                "editableSizePrice": True,
+            },
+            {"nmID": 2, "sizes": [{"price": 99.5}], "discount": 0},
+            {"nmID": 1, "sizes": [{"price": 101}], "discount": 5},
+        ]
+    }
+}
+EXPECTED = (
+    {1: {"price": 101, "discount": 5}, 2: {"price": 99.5, "discount": 0}},
+    3,
+)
+
+
+class Stream:
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._data.read(size)
+
+
+@pytest.fixture(params=[False, True], ids=["decode", "stream"])
+def streaming(request, monkeypatch):
+    if request.param and goods.ijson is None:
+        pytest.skip("ijson is not installed")
+    monkeypatch.setattr(settings, "WB_GOODS_STREAMING", request.param)
+    return request.param
+
+
+class TestGoodsParser:
+    def test_streaming_is_opt_in(self):
+        assert not streaming_enabled()
+
+    def test_parse_page(self, streaming):
+        body = json.dumps(LISTING).encode()
+        assert streaming_enabled() is streaming
+        assert parse_goods_page(body) == EXPECTED
+        assert parse_goods_page(io.BytesIO(body)) == EXPECTED
+
+    def test_parse_page_async(self, streaming):
+        stream = Stream(json.dumps(LISTING).encode())
+        assert asyncio.run(parse_goods_page_async(stream)) == EXPECTED
+
+    def test_empty_page(self, streaming):
+        assert parse_goods_page(b'{"data":{"listGoods":[]}}') == ({}, 0)
+
+    def test_get_price(self, mock_api, wildberries, wb_prices, streaming):
+        expected = {
+            1231312: {"price": 10, "discount": 10},
+            1323312: {"price": 20, "discount": 10},
+        }
+        assert wildberries.get_price() == expected
+        assert wildberries.get_price_by_nm_ids([1231312, 1323312]) == expected
+
+    def test_async_get_price(self, mock_aio, async_wildberries, streaming):
+        mock_aio.get(
+            re.compile(rf"^{settings.wb_price_url}api/v2/list/goods/filter.*"),
+            body=json.dumps(LISTING),
+            repeat=True,
+        )
+
+        async def call():
+            async with async_wildberries:
+                return await async_wildberries.get_price()
+
+        assert asyncio.run(call()) == EXPECTED[0]
+
+    def test_error_page_releases_connection(
+        self, mock_api, wildberries, monkeypatch, streaming
+    ):
+        closed = []
+        close = requests.Response.close
+
+        def track(response):
+            closed.append(response.status_code)
+            close(response)
+
+        monkeypatch.setattr(requests.Response, "close", track)
+        url = f"{settings.wb_price_url}api/v2/list/goods/filter"
+        mock_api.get(url, status_code=500)
+        mock_api.post(url, status_code=500)
+        with pytest.raises(HTTPError):
+            wildberries.get_price()
+        with pytest.raises(HTTPError):
+            wildberries.get_price_by_nm_ids([1])
+        assert closed == [500, 500]
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+import pytest
+
+import marketpalce_handler
+
+
+def loaded_modules(statement: str) -> set:
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys\n{statement}\nprint(' '.join(sys.modules))",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return set(output.split())
+
+
+class TestLazyImports:
+    def test_package_import_is_light(self):
+        modules = loaded_modules("import marketpalce_handler")
+        assert not {"requests", "aiohttp", "pydantic"} & modules
+
+    @pytest.mark.parametrize("name", ["Wildberries", "Ozon"])
+    def test_sync_clients_do_not_load_aiohttp(self, name):
+        modules = loaded_modules(f"from marketpalce_handler import {name}")
+        assert "requests" in modules
+        assert "aiohttp" not in modules
+
+    def test_exports(self):
+        assert set(dir(marketpalce_handler)) >= set(marketpalce_handler.__all__)
+        with pytest.raises(AttributeError):
+            marketpalce_handler.Unknown
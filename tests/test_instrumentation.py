@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from requests import HTTPError
+
+from marketpalce_handler.config import settings
+from marketpalce_handler.instrumentation import (
+    Instrumentation,
+    get_instrumentation,
+)
+
+
+@pytest.fixture
+def instrumentation():
+    instrumentation = get_instrumentation()
+    instrumentation.reset()
+    instrumentation.enable()
+    yield instrumentation
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+class TestInstrumentation:
+    def test_disabled_by_default(self, mock_api, wildberries):
+        mock_api.put(f"{settings.wb_api_url}api/v3/stocks/123", status_code=204)
+        assert wildberries.refresh_stocks(["1", "2"], [1, 3])
+        assert not get_instrumentation().requests
+
+    def test_wildberries_requests(self, mock_api, wildberries, instrumentation):
+        calls = []
+
+        def hook(call):
+            calls.append((call.endpoint, call.status, call.chunk_size))
+
+        instrumentation.add_hooks(pre=hook, post=hook)
+        mock_api.put(
+            f"{settings.wb_api_url}api/v3/stocks/123",
+            [{"status_code": 500}, {"status_code": 204}],
+        )
+        with pytest.raises(HTTPError):
+            wildberries.refresh_stocks(["1", "2"], [1, 3])
+        assert wildberries.refresh_stocks(["1", "2"], [1, 3])
+        instrumentation.remove_hooks(pre=hook, post=hook)
+
+        assert instrumentation.requests == {
+            ("wb_tokens", "200"): 1,
+            ("mapping", "200"): 2,
+            ("wb_stocks", "500"): 1,
+            ("wb_stocks", "204"): 1,
+        }
+        assert instrumentation.errors == {"wb_stocks": 1}
+        assert instrumentation.items["wb_stocks"] == 4
+        assert instrumentation.bytes[("wb_stocks", "sent")] > 0
+        assert instrumentation.durations["wb_stocks"].count == 2
+        assert [call for call in calls if call[0] == "wb_stocks"] == [
+            ("wb_stocks", None, 2),
+            ("wb_stocks", 500, 2),
+            ("wb_stocks", None, 2),
+            ("wb_stocks", 204, 2),
+        ]
+
+    def test_async_ozon_requests(self, mock_aio, async_ozon, instrumentation):
+        mock_aio.post(
+            f"{settings.ozon_api_url}v1/product/import/prices",
+            payload={"result": [{"offer_id": "123", "updated": True, "errors": []}]},
+        )
+
+        async def call():
+            async with async_ozon:
+                return await async_ozon.refresh_prices(["1", "2"], [100, 200])
+
+        assert asyncio.run(call())
+        assert instrumentation.requests == {
+            ("collector", "200"): 2,
+            ("ozon_import", "200"): 1,
+        }
+        assert instrumentation.items == {"collector": 2, "ozon_import": 2}
+        assert instrumentation.bytes[("ozon_import", "sent")] > 0
+        assert instrumentation.bytes[("ozon_import", "received")] > 0
+
+    def test_prometheus_export(self):
+        instrumentation = Instrumentation(enabled=True, buckets=(0.1, 1))
+        for status in (200, 200, 503):
+            with instrumentation.request(
+                "wb_stocks", "PUT", "url", payload={"json": {"stocks": [1, 2]}}
+            ) as call:
+                call.set_response(status, 10, 5)
+        with pytest.raises(ConnectionError):
+            with instrumentation.request("mapping", "GET", "url"):
+                raise ConnectionError
+
+        exported = instrumentation.export_prometheus()
+        assert (
+            'marketplace_requests_total{endpoint="wb_stocks",status="200"} 2'
+            in exported
+        )
+        assert (
+            'marketplace_requests_total{endpoint="mapping",status="error"} 1'
+            in exported
+        )
+        assert 'marketplace_request_errors_total{endpoint="wb_stocks"} 1' in exported
+        assert 'marketplace_request_items_total{endpoint="wb_stocks"} 6' in exported
+        assert (
+            'marketplace_request_bytes_total{direction="sent",endpoint="wb_stocks"}'
+            not in exported
+        )
+        assert (
+            'marketplace_request_bytes_total{endpoint="wb_stocks",direction="sent"} 30'
+            in exported
+        )
+        assert (
+            'marketplace_request_duration_seconds_bucket{endpoint="wb_stocks",le="+Inf"} 3'
+            in exported
+        )
+        assert 'marketplace_request_duration_seconds_count{endpoint="mapping"} 1' in (
+            exported
+        )
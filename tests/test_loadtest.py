@@ -0,0 +1,44 @@
+import requests
+
+from loadtest.driver import parse_args, run
+from loadtest.fake_servers import FakeServer, FakeServices, FaultProfile, Latency
+from marketpalce_handler.config import settings
+
+
+def args(*argv):
+    return parse_args(
+        [*argv, "--items", "20", "--iterations", "2", "--latency-ms", "0"]
+    )
+
+
+class TestLoadDriver:
+    def test_scenarios(self, monkeypatch):
+        monkeypatch.setattr(settings, "WB_PRICE_STEP_INTERVAL", 0)
+        wb_api_url = settings.wb_api_url
+
+        report = run(args("wb_stocks", "wb_prices", "ozon_stocks"))
+
+        assert settings.wb_api_url == wb_api_url
+        for result in report["scenarios"].values():
+            assert result["operations"] == 2
+            assert result["failures"] == 0
+            assert result["p99_ms"] >= result["p50_ms"] > 0
+        assert report["server"]["wb"]["204"] == 2
+        assert report["server"]["ozon"]["200"] == 2
+
+    def test_faults(self):
+        services = FakeServices(
+            profiles={
+                "wb": FaultProfile(latency=Latency(mean_ms=0), error_rate=1),
+                "ozon": FaultProfile(latency=Latency(mean_ms=0), quota=(1, 1)),
+            }
+        )
+        with FakeServer(services) as server:
+            assert requests.put(f"{server.url}wb/api/v3/stocks/1").status_code == 503
+            url = f"{server.url}ozon/v1/product/import/stocks"
+            assert requests.post(url, json={"stocks": []}).status_code == 200
+            throttled = requests.post(url, json={"stocks": []})
+        assert throttled.status_code == 429
+        assert float(throttled.headers["Retry-After"]) > 0
+        assert services.stats["wb"]["5xx"] == 1
+        assert services.stats["ozon"]["429_quota"] == 1
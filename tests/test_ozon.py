@@ -1,7 +1,10 @@
 import pytest
 from pydantic import ValidationError
+from requests import HTTPError
 
+from marketpalce_handler.config import settings
 from marketpalce_handler.schemas import CollectorItem
+from marketpalce_handler.state import SyncStateStore
 
 
 class TestOzon:
@@ -24,6 +27,17 @@ class TestOzon:
     def test_refresh_price(self, ozon, collector, ozon_prices):
         assert ozon.refresh_price("1", 100)
 
+    def test_refresh_price_error_is_not_committed(self, mock_api, ozon, collector):
+        ozon._state_store = SyncStateStore()
+        mock_api.post(
+            f"{settings.ozon_api_url}v1/product/import/prices",
+            status_code=400,
+            json={"result": [{"offer_id": "123", "updated": True}]},
+        )
+        with pytest.raises(HTTPError):
+            ozon.refresh_price("1", 100)
+        assert len(ozon._state_store) == 0
+
     @pytest.mark.parametrize(
         "ms_id, value",
         [
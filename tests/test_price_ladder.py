@@ -0,0 +1,59 @@
+import pytest
+
+from marketpalce_handler.price_ladder import plan_price_ladder, price_steps
+from marketpalce_handler.schemas import WbUpdateItem
+
+
+def item(nm_id, current_value, value):
+    return WbUpdateItem(
+        ms_id=str(nm_id),
+        barcodes="1",
+        nm_id=nm_id,
+        name="name",
+        value=value,
+        current_value=current_value,
+    )
+
+
+class TestPriceLadder:
+    @pytest.mark.parametrize(
+        "current_value, value, steps",
+        [
+            (10, 100, [20, 40, 80, 100]),
+            (10, 20, [20]),
+            (10, 5, [5]),
+            (0, 5, [5]),
+        ],
+    )
+    def test_price_steps(self, current_value, value, steps):
+        assert price_steps(current_value, value) == steps
+
+    def test_rounds_contain_only_unfinished_items(self):
+        rounds = plan_price_ladder([item(1, 10, 100), item(2, 10, 15)], "price")
+        assert rounds == [
+            [[{"nmId": 1, "price": 20}, {"nmId": 2, "price": 15}]],
+            [[{"nmId": 1, "price": 40}]],
+            [[{"nmId": 1, "price": 80}]],
+            [[{"nmId": 1, "price": 100}]],
+        ]
+
+    def test_discounts_are_sent_in_one_round(self):
+        rounds = plan_price_ladder([item(1, 10, 100)], "discount")
+        assert rounds == [[[{"nmId": 1, "discount": 100}]]]
+
+    def test_rounds_are_chunked(self):
+        items = [item(i, 10, 1000) for i in range(2500)]
+        rounds = plan_price_ladder(items, "price")
+        assert len(rounds) == 7
+        assert [len(chunk) for chunk in rounds[0]] == [1000, 1000, 500]
+
+    def test_wildberries_sends_minimum_upload_tasks(
+        self, mock_api, wildberries, wb_prices
+    ):
+        assert wildberries.refresh_prices(["1", "2"], [1000, 25])
+        uploads = [
+            request
+            for request in mock_api.request_history
+            if request.path == "/api/v2/upload/task"
+        ]
+        assert [len(request.json()["data"]) for request in uploads] == [2] + [1] * 6
@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from marketpalce_handler.config import settings
+from marketpalce_handler.price_snapshot import PriceSnapshot
+
+PRICES_URL = f"{settings.wb_price_url}api/v2/list/goods/filter"
+
+
+def goods_requests(mock_api):
+    return [
+        request
+        for request in mock_api.request_history
+        if request.method == "GET" and request.url.startswith(PRICES_URL)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def no_point_lookups(monkeypatch):
+    monkeypatch.setattr(settings, "WB_PRICE_LOOKUP_RATIO", 0)
+
+
+class TestPriceSnapshot:
+    def test_catalog_is_loaded_once(self, mock_api, wildberries, wb_prices):
+        wildberries.refresh_price("1", 10)
+        wildberries.refresh_prices(["1", "2"], [10, 20])
+        wildberries.refresh_discounts(["1", "2"], [5, 5])
+        assert len(goods_requests(mock_api)) == 1
+
+    def test_snapshot_is_updated_after_upload(self, mock_api, wildberries, wb_prices):
+        wildberries.refresh_price("1", 100)
+        wildberries.refresh_discounts(["1", "2"], [15, 20])
+        assert wildberries.price_snapshot.get(1231312) == {
+            "price": 100,
+            "discount": 15,
+        }
+        assert wildberries.price_snapshot.get(1323312) == {
+            "price": 20,
+            "discount": 20,
+        }
+
+    def test_zero_ttl_reloads_catalog(self, mock_api, wildberries, wb_prices):
+        wildberries.price_snapshot.ttl = 0
+        wildberries.refresh_price("1", 10)
+        wildberries.refresh_price("1", 10)
+        assert len(goods_requests(mock_api)) == 2
+
+    def test_unknown_nm_id_reloads_once(self):
+        catalogs = [{1: {"price": 10}}, {1: {"price": 10}, 2: {"price": 20}}]
+        snapshot = PriceSnapshot(lambda: catalogs.pop(0))
+        assert snapshot.get(1) == {"price": 10}
+        assert snapshot.get(2) == {"price": 20}
+        assert snapshot.get(3) is None
+        assert not catalogs
+
+    def test_background_refresh(self):
+        loaded = threading.Event()
+
+        def loader():
+            loaded.set()
+            return {1: {"price": 10}}
+
+        snapshot = PriceSnapshot(loader)
+        snapshot.start_background_refresh(interval=60)
+        assert loaded.wait(1)
+        snapshot.stop_background_refresh()
+        assert snapshot.is_fresh
@@ -0,0 +1,113 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from marketpalce_handler.client import Client, adapter_retry
+from marketpalce_handler.config import settings
+from marketpalce_handler.rate_limit import RateLimiter, TokenBucket, parse_retry_after
+
+
+class TestRateLimiter:
+    @pytest.mark.parametrize(
+        "headers, expected",
+        [
+            ({"Retry-After": "2"}, 2),
+            ({"X-Ratelimit-Retry": "1.5"}, 1.5),
+            ({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}, 0),
+            ({"Retry-After": "soon"}, None),
+            ({}, None),
+        ],
+    )
+    def test_parse_retry_after(self, headers, expected):
+        assert parse_retry_after(headers) == expected
+
+    def test_bucket_allows_burst_then_paces(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        delays = [bucket.reserve() for _ in range(4)]
+        assert delays[:2] == [0, 0]
+        assert delays[2] == pytest.approx(0.1, abs=0.01)
+        assert delays[3] == pytest.approx(0.2, abs=0.01)
+
+    def test_bucket_adapts_to_429(self):
+        bucket = TokenBucket(rate=8, capacity=8)
+        bucket.on_response(429, retry_after=0.5)
+        assert bucket.rate == 4
+        assert bucket.reserve() >= 0.25
+        for _ in range(100):
+            bucket.on_response(200)
+        assert bucket.rate == 8
+        assert bucket.metrics()["throttled"] == 1
+
+    def test_buckets_are_per_endpoint_and_report_queue(self):
+        limiter = RateLimiter({"slow": (5, 1), "default": (100, 100)})
+        limiter.acquire("slow")
+        waiter = threading.Thread(target=limiter.acquire, args=("slow",))
+        waiter.start()
+        time.sleep(0.05)
+        assert limiter.metrics()["slow"]["queued"] == 1
+        limiter.acquire("fast")
+        waiter.join()
+        assert limiter.metrics()["slow"]["queued"] == 0
+        assert limiter.metrics()["fast"]["rate"] == 100
+
+    def test_wildberries_retries_after_429(self, mock_api, wildberries):
+        mock_api.put(
+            f"{settings.wb_api_url}api/v3/stocks/{wildberries.warehouse_id}",
+            [
+                {"status_code": 429, "headers": {"Retry-After": "0"}},
+                {"status_code": 204},
+            ],
+        )
+        assert wildberries.refresh_stocks(["1", "2"], [1, 2])
+        assert wildberries.rate_limiter.metrics()["wb_stocks"]["throttled"] == 1
+
+    def test_adapter_retry_follows_settings(self, monkeypatch):
+        monkeypatch.setattr(settings, "REQUEST_RETRIES", 5)
+        monkeypatch.setattr(settings, "REQUEST_BACKOFF_FACTOR", 0.1)
+        retry = adapter_retry()
+        assert retry.total == 5
+        assert retry.backoff_factor == 0.1
+        assert not retry.respect_retry_after_header
+
+    def test_adapter_leaves_429_to_rate_limiter(self):
+        hits = []
+
+        class Throttled(BaseHTTPRequestHandler):
+            def do_PUT(self):
+                hits.append(self.path)
+                self.rfile.read(int(self.headers["Content-Length"]))
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Throttled)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            session = requests.Session()
+            session.mount("http://", HTTPAdapter(max_retries=adapter_retry()))
+            client = Client(session, RateLimiter({"default": (1000, 1000)}))
+            response = client._request(
+                "wb_stocks",
+                "PUT",
+                f"http://127.0.0.1:{server.server_port}/stocks",
+                json={"stocks": []},
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert response.status_code == 429
+        assert len(hits) == settings.RATE_LIMIT_RETRIES + 1
+        assert (
+            client.rate_limiter.metrics()["wb_stocks"]["throttled"]
+            == settings.RATE_LIMIT_RETRIES + 1
+        )
@@ -0,0 +1,43 @@
+import pytest
+import requests
+from pydantic import ValidationError
+
+from marketpalce_handler.mapping import Mapping
+from marketpalce_handler.schemas import MappedItem, MsItem
+
+ROW = {"ms_id": "1", "barcodes": "12313", "nm_id": 1231312, "name": "some_name"}
+
+
+class TestMappedItem:
+    def test_from_mapping(self):
+        item = MappedItem.from_mapping(ROW, 5)
+        assert item == MappedItem("1", "12313", 1231312, "some_name", 5)
+        assert item.current_value is None
+        assert not hasattr(item, "__dict__")
+        assert item.to_ms_item() == MsItem(**ROW, value=5)
+
+    def test_coerces_like_ms_item(self):
+        item = MappedItem.from_mapping({**ROW, "nm_id": "1231312"}, 5)
+        assert item.nm_id == 1231312
+
+    @pytest.mark.parametrize(
+        "row, value",
+        [
+            ({**ROW, "nm_id": "abc"}, 5),
+            ({key: ROW[key] for key in ("ms_id", "nm_id", "name")}, 5),
+            (ROW, None),
+        ],
+    )
+    def test_invalid_rows(self, row, value):
+        with pytest.raises(ValidationError):
+            MappedItem.from_mapping(row, value)
+
+    def test_mapping_records(self, mock_api, mapping):
+        service = Mapping("https://mapping_url", requests.Session())
+
+        records = service.get_records(["1", "2"], [1, 2])
+        items = service.get_mapped_data(["1", "2"], [1, 2])
+
+        assert all(isinstance(record, MappedItem) for record in records)
+        assert [record.to_ms_item() for record in records] == items
+        assert all(isinstance(item, MsItem) for item in items)
@@ -0,0 +1,109 @@
+import pytest
+from requests import HTTPError
+
+from marketpalce_handler.cache import MappingCache
+from marketpalce_handler.config import settings
+from marketpalce_handler.state import SyncStateStore, select_changed
+
+
+class TestSyncStateStore:
+    def test_changed_and_commit(self):
+        store = SyncStateStore()
+        assert store.changed("stocks", ["1", "2"], [1, 2]) == [0, 1]
+
+        store.commit("stocks", [("1", 1), ("2", 2)])
+
+        assert store.changed("stocks", ["1", "2", "3"], [1, 5, 3]) == [1, 2]
+        assert store.changed("prices", ["1"], [1]) == [0]
+        assert len(store) == 2
+
+    def test_persists_between_instances(self, tmp_path):
+        path = str(tmp_path / "state.sqlite")
+        store = SyncStateStore(path)
+        store.commit("stocks", [("1", 1)])
+        store.close()
+
+        assert SyncStateStore(path).get_many("stocks", ["1", "2"]) == {"1": 1}
+
+    def test_large_lookup_is_batched(self):
+        store = SyncStateStore()
+        keys = [str(i) for i in range(settings.STATE_QUERY_LIMIT * 2 + 1)]
+        store.commit("stocks", ((key, 0) for key in keys))
+        assert store.changed("stocks", keys, [0] * len(keys)) == []
+
+    def test_invalidate(self):
+        store = SyncStateStore()
+        store.commit("stocks", [("1", 1), ("2", 2)])
+        store.commit("prices", [("1", 1)])
+
+        store.invalidate("stocks", ["1"])
+        assert store.get_many("stocks", ["1", "2"]) == {"2": 2}
+        store.invalidate("stocks")
+        assert len(store) == 1
+        store.invalidate()
+        assert len(store) == 0
+
+    def test_select_changed(self):
+        store = SyncStateStore()
+        store.commit("stocks", [("1", 1)])
+        assert select_changed(store, "stocks", ["1", "2"], [1, 2], ["a", "b"]) == (
+            ["2"],
+            [2],
+            ["b"],
+        )
+        assert select_changed(None, "stocks", ["1"], [1]) == (["1"], [1])
+
+
+class TestDeltaSync:
+    def test_wildberries_sends_only_changed_stocks(
+        self, mock_api, wildberries, echo_mapping
+    ):
+        wildberries._state_store = SyncStateStore()
+        put = mock_api.put(
+            f"{settings.wb_api_url}api/v3/stocks/{wildberries.warehouse_id}",
+            status_code=204,
+        )
+
+        assert wildberries.refresh_stocks(["1", "2"], [1, 2])
+        assert wildberries.refresh_stocks(["1", "2"], [1, 2])
+        assert wildberries.refresh_stocks(["1", "2"], [1, 3])
+
+        assert [r.json() for r in put.request_history] == [
+            {"stocks": [{"sku": "1", "amount": 1}, {"sku": "2", "amount": 2}]},
+            {"stocks": [{"sku": "2", "amount": 3}]},
+        ]
+
+    def test_wildberries_keeps_state_on_failure(
+        self, mock_api, wildberries, echo_mapping
+    ):
+        wildberries._state_store = SyncStateStore()
+        mock_api.put(
+            f"{settings.wb_api_url}api/v3/stocks/{wildberries.warehouse_id}",
+            status_code=400,
+        )
+
+        with pytest.raises(HTTPError):
+            wildberries.refresh_stocks(["1"], [1])
+        assert len(wildberries._state_store) == 0
+
+    def test_ozon_commits_confirmed_rows(self, mock_api, ozon, collector):
+        ozon._state_store = SyncStateStore()
+        ozon._collector_service.cache = MappingCache()
+        post = mock_api.post(
+            f"{settings.ozon_api_url}v1/product/import/stocks",
+            json={
+                "result": [
+                    {"offer_id": "123", "updated": True, "errors": []},
+                    {"offer_id": "124", "updated": False, "errors": [{}]},
+                ]
+            },
+        )
+
+        ozon.refresh_stocks(["1", "2"], [1, 2])
+        assert ozon.refresh_stocks(["1"], [1]) == {"result": []}
+        ozon.refresh_stocks(["1", "2"], [1, 2])
+
+        assert [r.json()["stocks"] for r in post.request_history] == [
+            [{"offer_id": "123", "stock": 1}, {"offer_id": "124", "stock": 2}],
+            [{"offer_id": "124", "stock": 2}],
+        ]
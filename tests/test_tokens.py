@@ -0,0 +1,136 @@
+import asyncio
+import os
+import stat
+import time
+
+import pytest
+import requests
+
+from marketpalce_handler import Wildberries
+from marketpalce_handler.config import settings
+from marketpalce_handler.exceptions import (
+    InitialisationException,
+    InvalidArgumentsException,
+)
+from marketpalce_handler.tokens import TokenProvider, get_token_provider
+
+TOKENS = [
+    {"warehouse_id": 123, "id": 1, "common_token": "token"},
+    {"warehouse_id": 456, "id": 2, "common_token": "other"},
+]
+
+
+def build(token_id=1, **kwargs):
+    return Wildberries(
+        token_id=token_id,
+        token_service_token="token",
+        token_service_url="https://token_service_url",
+        mapping_url="https://mapping_url",
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def token_service(mock_api):
+    return mock_api.get("https://token_service_url", json=TOKENS)
+
+
+class TestTokenProvider:
+    def test_lookup_is_lazy_and_shared(self, mock_api, mapping, token_service):
+        first, second = build(1), build(2)
+        assert token_service.call_count == 0
+
+        put = mock_api.put(f"{settings.wb_api_url}api/v3/stocks/123", status_code=204)
+        assert first.refresh_stock("1", 1)
+        assert second.warehouse_id == 456
+        assert token_service.call_count == 1
+        assert put.last_request.headers["Authorization"] == "token"
+
+    def test_refreshes_on_unauthorized(self, mock_api, mapping, token_service):
+        put = mock_api.put(
+            f"{settings.wb_api_url}api/v3/stocks/123",
+            [{"status_code": 401}, {"status_code": 204}],
+        )
+        assert build().refresh_stock("1", 1)
+        assert put.call_count == 2
+        assert token_service.call_count == 2
+
+    def test_unknown_token(self, token_service):
+        with pytest.raises(InitialisationException):
+            build(3).warehouse_id
+
+    def test_token_service_error(self, mock_api):
+        mock_api.get("https://token_service_url", status_code=500)
+        with pytest.raises(InitialisationException):
+            build().warehouse_id
+
+    def test_ttl(self, token_service):
+        provider = TokenProvider("https://token_service_url", "token", ttl=0)
+        provider.get(1)
+        provider.get(1)
+        assert provider.lookups == 2
+
+    def test_disk_cache(self, tmp_path, token_service):
+        path = str(tmp_path / "tokens.json")
+        TokenProvider("https://token_service_url", "token", cache_path=path).get(1)
+
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        provider = TokenProvider("https://token_service_url", "token", cache_path=path)
+        assert provider.get(2).common_token == "other"
+        assert provider.lookups == 0
+        assert token_service.call_count == 1
+
+    def test_unwritable_disk_cache(self, tmp_path, token_service, monkeypatch):
+        blocker = tmp_path / "blocker"
+        blocker.write_text("")
+        provider = TokenProvider(
+            "https://token_service_url", "token", cache_path=str(blocker / "t.json")
+        )
+        assert provider.get(1).common_token == "token"
+
+        def replace(src, dst):
+            raise PermissionError(13, "Permission denied", dst)
+
+        monkeypatch.setattr(os, "replace", replace)
+        path = str(tmp_path / "tokens.json")
+        provider = TokenProvider("https://token_service_url", "token", cache_path=path)
+        assert provider.get(2).common_token == "other"
+        assert os.listdir(tmp_path) == ["blocker"]
+
+    def test_background_refresh(self, token_service):
+        provider = get_token_provider("https://token_service_url", "token")
+        provider.start_background_refresh(interval=0.01)
+        deadline = time.monotonic() + 1
+        while provider.lookups < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        provider.stop_background_refresh()
+        assert provider.lookups >= 2
+
+    def test_async_clients_share_lookup(self, async_wildberries):
+        async def call():
+            async with async_wildberries:
+                pass
+            async with async_wildberries:
+                return async_wildberries.warehouse_id
+
+        assert asyncio.run(call()) == 123
+        provider = get_token_provider("https://token_service_url", "token")
+        assert provider.lookups == 1
+
+    def test_conflicting_provider_kwargs(self, tmp_path):
+        path = str(tmp_path / "tokens.json")
+        provider = get_token_provider(
+            "https://token_service_url", "token", ttl=60, cache_path=path
+        )
+        assert get_token_provider("https://token_service_url", "token") is provider
+        assert (
+            get_token_provider("https://token_service_url", "token", ttl=60) is provider
+        )
+        with pytest.raises(InvalidArgumentsException, match="ttl"):
+            get_token_provider("https://token_service_url", "token", ttl=30)
+        with pytest.raises(InvalidArgumentsException, match="cache_path"):
+            get_token_provider("https://token_service_url", "token", cache_path=None)
+        with pytest.raises(InvalidArgumentsException, match="session"):
+            get_token_provider(
+                "https://token_service_url", "token", session=requests.Session()
+            )
@@ -0,0 +1,75 @@
+import asyncio
+from contextlib import contextmanager
+
+from marketpalce_handler.config import settings
+from marketpalce_handler.tracing import (
+    NoopTracer,
+    get_tracer,
+    set_tracer,
+    span,
+    trace,
+    tracing_enabled,
+)
+
+
+class TestTracing:
+    def test_noop_by_default(self):
+        assert isinstance(get_tracer(), NoopTracer)
+        assert not tracing_enabled()
+        with span("stage", items=1) as current:
+            assert not current.is_recording()
+
+    def test_wildberries_stages(self, mock_api, wildberries, wb_prices):
+        with trace() as tracer:
+            assert wildberries.refresh_prices(["1", "2"], [0, 1])
+
+        assert not tracing_enabled()
+        assert [root.name for root in tracer.roots] == ["wildberries.refresh_prices"]
+        stages = tracer.stages()
+        for stage in (
+            "validate",
+            "mapping",
+            "build_models",
+            "current_prices",
+            "build_payload",
+            "serialize",
+            "http.wait",
+            "parse",
+        ):
+            assert stage in stages
+        stacks = {line.rsplit(" ", 1)[0] for line in tracer.folded().splitlines()}
+        assert "wildberries.refresh_prices;mapping;http;http.wait" in stacks
+        assert "wildberries.refresh_prices;http;http.wait" in stacks
+
+    def test_async_stages(self, mock_aio, async_wildberries, tmp_path):
+        mock_aio.put(f"{settings.wb_api_url}api/v3/stocks/123", status=204)
+
+        async def call():
+            async with async_wildberries:
+                with trace() as tracer:
+                    await async_wildberries.refresh_stocks(["1", "2"], [1, 2])
+                return tracer
+
+        tracer = asyncio.run(call())
+        path = tmp_path / "trace.folded"
+        tracer.dump_folded(str(path))
+        lines = path.read_text().splitlines()
+        assert all(line.startswith("wildberries.refresh_stocks") for line in lines)
+        assert any(";http;http.wait " in line for line in lines)
+
+    def test_custom_tracer(self, mock_api, wildberries, wb_prices):
+        names = []
+
+        class Tracer:
+            @contextmanager
+            def start_as_current_span(self, name, attributes=None):
+                names.append(name)
+                yield
+
+        set_tracer(Tracer())
+        try:
+            wildberries.get_price()
+        finally:
+            set_tracer(None)
+        assert names[0] == "wildberries.get_price"
+        assert "http" in names
@@ -0,0 +1,87 @@
+import subprocess
+import sys
+
+import pytest
+from pydantic import ValidationError
+
+from marketpalce_handler.batch import BatchExecutor
+from marketpalce_handler.exceptions import InvalidArgumentsException
+from marketpalce_handler.validators import (
+    check_ids_and_values,
+    check_statuses,
+    check_warehouse_ids,
+    trusted_input,
+    validate_ids_and_values,
+)
+
+
+class Target:
+    @validate_ids_and_values
+    def call(self, ms_ids, values):
+        return list(zip(ms_ids, values))
+
+
+class TestValidators:
+    def test_valid_input(self):
+        check_ids_and_values(["1", " 2 "], [1, 2])
+        check_statuses([1, 2], ["confirm", "cancel"])
+        check_warehouse_ids(["1"], [1], [10])
+        check_ids_and_values([], [])
+
+    def test_falls_back_to_schema_coercion(self):
+        check_ids_and_values(["1", "2"], [1, "2"])
+
+    @pytest.mark.parametrize(
+        "ms_ids, values, loc",
+        [
+            (["1", 2], [1, 2], ("ms_ids", 1)),
+            (["1", " "], [1, 2], ("ms_ids", 1)),
+            (["1", "2", "3"], [1, 2, "x"], ("values", 2)),
+        ],
+    )
+    def test_reports_index(self, ms_ids, values, loc):
+        with pytest.raises(ValidationError) as error:
+            check_ids_and_values(ms_ids, values)
+        assert [e["loc"] for e in error.value.errors()] == [loc]
+
+    def test_length_mismatch(self):
+        with pytest.raises(InvalidArgumentsException, match="ms_ids=2, values=1"):
+            check_ids_and_values(["1", "2"], [1])
+        with pytest.raises(AssertionError):
+            check_warehouse_ids(["1"], [1], [])
+
+    def test_trusted_input(self):
+        with trusted_input():
+            assert Target().call(["1", 2], [1, 2]) == [("1", 1), (2, 2)]
+        with pytest.raises(ValidationError):
+            Target().call(["1", 2], [1, 2])
+
+    def test_trusted_input_reaches_executor_workers(self):
+        target = Target()
+        with trusted_input():
+            result = BatchExecutor(2).map(
+                target.call, [["1", 2], [3]], [[1, 2], [3]], limit=1
+            )
+            streamed = list(
+                BatchExecutor(2).stream(target.call, [(["1", 2], [1, 2]), ([3], [3])])
+            )
+        assert result.ok
+        assert all(chunk.ok for chunk in streamed)
+        result = BatchExecutor(2).map(
+            target.call, [["1", 2], [3]], [[1, 2], [3]], limit=1
+        )
+        assert [type(error) for error in result.errors] == [
+            ValidationError,
+            ValidationError,
+        ]
+
+    def test_checks_survive_optimized_mode(self):
+        code = (
+            "from marketpalce_handler.validators import check_ids_and_values\n"
+            "check_ids_and_values(['1'], [1, 2])\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-O", "-c", code], capture_output=True, text=True
+        )
+        assert result.returncode == 1
+        assert "InvalidArgumentsException" in result.stderr
@@ -4,6 +4,7 @@ from requests import HTTPError
 
 from marketpalce_handler.config import settings
 from marketpalce_handler.exceptions import InvalidStatusException
+from marketpalce_handler.state import SyncStateStore
 
 
 class TestWildberries:
@@ -38,6 +39,20 @@ class TestWildberries:
         )
         assert wildberries.refresh_stocks(["1", "2"], [1, 3])
 
+    def test_push_stock_records(self, mock_api, wildberries):
+        put = mock_api.put(
+            f"{settings.wb_api_url}api/v3/stocks/{wildberries.warehouse_id}",
+            status_code=204,
+        )
+        wildberries._state_store = SyncStateStore()
+        records = wildberries.get_stock_records(["1", "2"])
+        assert sorted(records) == ["1", "2"]
+
+        assert wildberries.push_stock_records(["1", "2"], [1, 3], records).ok
+        assert wildberries.push_stock_records(["1", "2"], [1, 4], records).ok
+        assert put.call_count == 2
+        assert put.last_request.json() == {"stocks": [{"sku": "22313", "amount": 4}]}
+
     def test_refresh_stocks_with_invalid_id(self, mock_api, wildberries):
         mock_api.put(
             f"{settings.wb_api_url}api/v3/stocks/{wildberries.warehouse_id}",
@@ -127,6 +142,42 @@ class TestWildberries:
     def test_refresh_statuses(self, wildberries, wb_statuses):
         assert wildberries.refresh_statuses([1234567, 1234568], ["confirm", "cancel"])
 
+    def test_refresh_statuses_reports_per_order(self, mock_api, wildberries):
+        supplies = mock_api.post(
+            f"{settings.wb_api_url}api/v3/supplies", json={"id": "WB-GI-1"}
+        )
+        mock_api.patch(
+            f"{settings.wb_api_url}api/v3/supplies/WB-GI-1/orders/1", status_code=204
+        )
+        mock_api.patch(
+            f"{settings.wb_api_url}api/v3/supplies/WB-GI-1/orders/2", status_code=409
+        )
+        mock_api.patch(f"{settings.wb_api_url}api/v3/orders/3/cancel", status_code=204)
+
+        result = wildberries.refresh_statuses(
+            [1, 2, 3], ["confirm", "confirm", "cancel"]
+        )
+
+        assert not result
+        assert supplies.call_count == 1
+        assert [chunk.args[0] for chunk in result.chunks if not chunk.ok] == [2]
+        assert isinstance(result.errors[0], HTTPError)
+
+    def test_refresh_statuses_without_confirms(self, mock_api, wildberries):
+        supplies = mock_api.post(f"{settings.wb_api_url}api/v3/supplies")
+        mock_api.patch(f"{settings.wb_api_url}api/v3/orders/1/cancel", status_code=204)
+
+        assert wildberries.refresh_statuses([1], ["cancel"])
+        assert supplies.call_count == 0
+
+    def test_refresh_statuses_supply_failure(self, mock_api, wildberries):
+        mock_api.post(f"{settings.wb_api_url}api/v3/supplies", status_code=500)
+        mock_api.patch(f"{settings.wb_api_url}api/v3/orders/2/cancel", status_code=204)
+
+        result = wildberries.refresh_statuses([1, 2], ["confirm", "cancel"])
+
+        assert [chunk.ok for chunk in result.chunks] == [False, True]
+
     def test_refresh_statuses_with_invalid_length(self, wildberries, wb_statuses):
         with pytest.raises(AssertionError):
             wildberries.refresh_statuses(
@@ -176,3 +227,87 @@ class TestWildberries:
     ):
         with pytest.raises(AssertionError):
             wildberries.refresh_discounts(["1", "2"], [1, 2, 3])
+
+    def test_refresh_price_uses_point_lookup(self, mock_api, wildberries, wb_prices):
+        assert wildberries.refresh_price("1", 0)
+        lookups = [
+            request
+            for request in mock_api.request_history
+            if request.path == "/api/v2/list/goods/filter"
+        ]
+        assert [request.method for request in lookups] == ["POST"]
+        assert lookups[0].json() == {"nmList": [1231312]}
+
+    def test_get_price_by_nm_ids_in_batches(self, mock_api, wildberries, wb_prices):
+        prices = wildberries.get_price_by_nm_ids(list(range(2500)))
+        lookups = [
+            request
+            for request in mock_api.request_history
+            if request.path == "/api/v2/list/goods/filter"
+        ]
+        assert [len(request.json()["nmList"]) for request in lookups] == [
+            1000,
+            1000,
+            500,
+        ]
+        assert prices[1231312] == {"price": 10, "discount": 10}
+
+    def test_point_lookup_falls_back_to_listing(self, mock_api, wildberries, wb_prices):
+        mock_api.post(
+            f"{settings.wb_price_url}api/v2/list/goods/filter", status_code=404
+        )
+        assert wildberries.refresh_discount("1", 0)
+        assert wildberries.price_snapshot.is_fresh
+
+    def test_point_lookup_falls_back_for_missing_nm_ids(
+        self, mock_api, wildberries, wb_prices
+    ):
+        mock_api.post(
+            f"{settings.wb_price_url}api/v2/list/goods/filter",
+            json={"data": {"listGoods": []}},
+        )
+        assert wildberries.refresh_discount("1", 0)
+        assert wildberries.price_snapshot.is_fresh
+
+    def test_large_reprice_uses_snapshot(self, mock_api, wildberries, wb_prices):
+        wildberries.price_snapshot.refresh()
+        wildberries.price_snapshot.ttl = 0
+        assert wildberries.refresh_prices(["1", "2"], [0, 1])
+        methods = [
+            request.method
+            for request in mock_api.request_history
+            if request.path == "/api/v2/list/goods/filter"
+        ]
+        assert methods == ["GET", "GET"]
+
+    @pytest.mark.parametrize(
+        "catalog_size, max_requests",
+        [(2500, 4), (10_000, 6)],
+    )
+    def test_get_price_fetches_pages_in_parallel(
+        self, mock_api, wildberries, catalog_size, max_requests
+    ):
+        def page(request, context):
+            offset = int(request.qs["offset"][0])
+            limit = int(request.qs["limit"][0])
+            return {
+                "data": {
+                    "listGoods": [
+                        {"nmID": nm_id, "sizes": [{"price": 1}], "discount": 0}
+                        for nm_id in range(offset, min(offset + limit, catalog_size))
+                    ]
+                }
+            }
+
+        mock_api.get(f"{settings.wb_price_url}api/v2/list/goods/filter", json=page)
+        wildberries._concurrency_limit = 2
+
+        prices = wildberries.get_price()
+
+        offsets = [
+            int(request.qs["offset"][0])
+            for request in mock_api.request_history
+            if request.path == "/api/v2/list/goods/filter"
+        ]
+        assert len(prices) == min(catalog_size, 6 * settings.WB_ITEMS_REFRESH_LIMIT)
+        assert len(offsets) == len(set(offsets)) <= max_requests